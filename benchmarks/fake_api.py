@@ -0,0 +1,400 @@
+"""Local stand-in for the Kaggle API endpoints that kagglesdk talks to.
+
+Every RPC that kagglesdk can issue is answered with a JSON payload generated
+from the SDK's own response type, so tools parse and format realistic
+objects without network access or credentials. Latency, list lengths,
+string sizes and the share of calls rejected with 429 are configurable.
+Download RPCs redirect to a generated file served with Range support, and
+blob upload URLs accept resumable PUTs. It also stands in for an OTLP/HTTP
+trace collector: spans posted to ``/v1/traces`` are kept in ``spans``.
+
+Run it standalone and point the server at it with
+``KAGGLE_API_ENVIRONMENT=TEST`` (which targets http://localhost:7777)::
+
+    python benchmarks/fake_api.py --port 7777 --latency 50 --throttle-rate 0.1
+"""
+
+import argparse
+import enum
+import functools
+import importlib
+import inspect
+import json
+import pkgutil
+import random
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+_RPC_PATTERN = re.compile(r'\.call\("([\w.]+)", "(\w+)", request, (\w+)\)')
+_API_PREFIX = "/api/v1/"
+_FILES_PREFIX = "/files/"
+_TRACES_PATH = "/v1/traces"
+_NESTED_LIST_SIZE = 2
+_MAX_DEPTH = 3
+
+# Fields forced to fixed values so that tools terminate and take their normal path:
+# a single page of results, no error messages, and kernel sessions that have finished.
+_FIELD_OVERRIDES = {"nextPageToken": "", "error": "", "errorMessage": ""}
+_RPC_OVERRIDES: dict[str, dict[str, Any]] = {
+    "GetKernelSessionStatus": {"status": "COMPLETE"},
+}
+
+
+@dataclass
+class FakeApiConfig:
+    """Shape of the generated responses and the faults to inject."""
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    list_size: int = 20
+    string_size: int = 24
+    file_size: int = 256 * 1024
+    throttle_rate: float = 0.0
+    retry_after: float = 0.0
+    seed: int = 0
+
+
+@dataclass
+class RpcStats:
+    """Requests answered per RPC name."""
+
+    requests: Counter = field(default_factory=Counter)
+    throttled: Counter = field(default_factory=Counter)
+    bytes_sent: int = 0
+
+    def total(self) -> int:
+        return sum(self.requests.values())
+
+
+@functools.cache
+def rpc_table() -> dict[tuple[str, str], type | None]:
+    """(service, RPC name) -> response type, read from kagglesdk's service clients."""
+    import kagglesdk
+
+    table: dict[tuple[str, str], type | None] = {}
+    for info in pkgutil.walk_packages(kagglesdk.__path__, "kagglesdk."):
+        if ".services." not in info.name:
+            continue
+        module = importlib.import_module(info.name)
+        for service, rpc, type_name in _RPC_PATTERN.findall(inspect.getsource(module)):
+            table[(service, rpc)] = getattr(module, type_name, None)
+    return table
+
+
+def _is_download(response_type: type | None) -> bool:
+    return response_type is not None and response_type.__name__ in ("FileDownload", "HttpRedirect")
+
+
+class PayloadGenerator:
+    """Builds response dicts for kagglesdk types from their field metadata."""
+
+    def __init__(self, config: FakeApiConfig, base_url: str):
+        self.config = config
+        self.base_url = base_url
+        self._now = datetime.now(timezone.utc).replace(tzinfo=None)
+
+    def _string(self, name: str, i: int) -> str:
+        lower = name.lower()
+        if lower.endswith("url"):
+            return f"{self.base_url}{_FILES_PREFIX}{name}-{i}.bin"
+        if lower == "ref":
+            return f"bench/item-{i}"
+        text = f"{name}-{i} "
+        return (text * (self.config.string_size // len(text) + 1))[: max(self.config.string_size, len(text))]
+
+    def _value(self, field_type: Any, name: str, i: int, depth: int) -> Any:
+        from kagglesdk.kaggle_object import KaggleObject
+
+        if isinstance(field_type, type) and issubclass(field_type, enum.Enum):
+            members = list(field_type)
+            return members[min(1, len(members) - 1)].name
+        if isinstance(field_type, type) and issubclass(field_type, KaggleObject):
+            return self.build(field_type, depth + 1, i) if depth + 1 < _MAX_DEPTH else None
+        if field_type is bool:
+            return True
+        if field_type is int:
+            return i + 1
+        if field_type is float:
+            return round(0.5 + i / 100, 4)
+        if field_type is datetime:
+            return (self._now - timedelta(minutes=30 * i)).isoformat(timespec="milliseconds") + "Z"
+        if field_type is timedelta:
+            return f"{60 + i}s"
+        if field_type is str:
+            return self._string(name, i)
+        return None
+
+    def build(self, cls: type, depth: int = 0, index: int = 0) -> dict[str, Any]:
+        """A populated dict for cls; repeated fields get list_size items at the top level."""
+        from kagglesdk.kaggle_object import ListSerializer, MapSerializer
+
+        out: dict[str, Any] = {}
+        for meta in getattr(cls, "_fields", []):
+            if meta.json_name in _FIELD_OVERRIDES:
+                out[meta.json_name] = _FIELD_OVERRIDES[meta.json_name]
+                continue
+            if isinstance(meta.serializer, ListSerializer):
+                count = self.config.list_size if depth == 0 else _NESTED_LIST_SIZE
+                items = [self._value(meta.field_type, meta.field_name, j, depth) for j in range(count)]
+                value = [v for v in items if v is not None]
+            elif isinstance(meta.serializer, MapSerializer):
+                item = self._value(meta.field_type, meta.field_name, index, depth)
+                value = {} if item is None else {"key-0": item}
+            else:
+                value = self._value(meta.field_type, meta.field_name, index, depth)
+            if value is not None:
+                out[meta.json_name] = value
+        return out
+
+
+class FakeKaggleApi:
+    """Threaded HTTP server answering kagglesdk RPCs with generated payloads."""
+
+    def __init__(self, config: FakeApiConfig | None = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or FakeApiConfig()
+        self.stats = RpcStats()
+        self._lock = threading.Lock()
+        self._random = random.Random(self.config.seed)
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.api = self
+        self._thread: threading.Thread | None = None
+        self.generator = PayloadGenerator(self.config, self.url)
+        self._payloads: dict[str, bytes] = {}
+        self.spans: list[dict[str, Any]] = []
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeKaggleApi":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-kaggle-api", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Serve on the calling thread until interrupted."""
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeKaggleApi":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _delay(self) -> None:
+        delay = self.config.latency
+        if self.config.jitter:
+            with self._lock:
+                delay += self._random.uniform(0, self.config.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _should_throttle(self) -> bool:
+        if self.config.throttle_rate <= 0:
+            return False
+        with self._lock:
+            return self._random.random() < self.config.throttle_rate
+
+    def _payload(self, rpc: str, response_type: type | None) -> bytes:
+        """Generated response body for an RPC, built once and reused."""
+        body = self._payloads.get(rpc)
+        if body is None:
+            data = self.generator.build(response_type) if response_type is not None else {}
+            data.update(_RPC_OVERRIDES.get(rpc, {}))
+            body = self._payloads[rpc] = json.dumps(data).encode()
+        return body
+
+    def file_bytes(self) -> bytes:
+        """Deterministic content served for every download."""
+        body = self._payloads.get(_FILES_PREFIX)
+        if body is None:
+            pattern = b"kaggle-mcp fake file content\n"
+            body = (pattern * (self.config.file_size // len(pattern) + 1))[: self.config.file_size]
+            self._payloads[_FILES_PREFIX] = body
+        return body
+
+    def _count(self, rpc: str, sent: int, throttled: bool = False) -> None:
+        with self._lock:
+            self.stats.requests[rpc] += 1
+            if throttled:
+                self.stats.throttled[rpc] += 1
+            self.stats.bytes_sent += sent
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, delayed ACKs on
+    # keep-alive connections add ~40 ms to every response.
+    disable_nagle_algorithm = True
+
+    @property
+    def api(self) -> FakeKaggleApi:
+        return self.server.api
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def _reply(self, status: int, body: bytes = b"", headers: dict[str, str] | None = None) -> None:
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body and self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _drain(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _collect_spans(self, body: bytes) -> None:
+        try:
+            payload = json.loads(body)
+            spans = [
+                span
+                for resource in payload.get("resourceSpans", [])
+                for scope in resource.get("scopeSpans", [])
+                for span in scope.get("spans", [])
+            ]
+        except (ValueError, AttributeError):
+            self._reply(400)
+            return
+        with self.api._lock:
+            self.api.spans.extend(spans)
+        self._reply(200, b"{}", {"Content-Type": "application/json"})
+
+    def do_POST(self) -> None:
+        body = self._drain()
+        if self.path == _TRACES_PATH:
+            self._collect_spans(body)
+            return
+        if not self.path.startswith(_API_PREFIX):
+            self._reply(404)
+            return
+        service, _, rpc = self.path[len(_API_PREFIX):].partition("/")
+        rpc = rpc.split("?", 1)[0]
+        self.api._delay()
+        if self.api._should_throttle():
+            body = json.dumps({"code": 429, "message": "Too many requests"}).encode()
+            self.api._count(rpc, len(body), throttled=True)
+            self._reply(429, body, {
+                "Content-Type": "application/json",
+                "Retry-After": f"{self.api.config.retry_after:g}",
+            })
+            return
+        if (service, rpc) not in rpc_table():
+            body = json.dumps({"code": 404, "message": f"Unknown RPC {service}/{rpc}"}).encode()
+            self.api._count(rpc, len(body))
+            self._reply(404, body, {"Content-Type": "application/json"})
+            return
+        response_type = rpc_table()[(service, rpc)]
+        if _is_download(response_type):
+            self.api._count(rpc, 0)
+            self._reply(302, headers={"Location": f"{self.api.url}{_FILES_PREFIX}{rpc}.zip"})
+            return
+        body = self.api._payload(rpc, response_type)
+        self.api._count(rpc, len(body))
+        self._reply(200, body, {"Content-Type": "application/json"})
+
+    def do_GET(self) -> None:
+        if not self.path.startswith(_FILES_PREFIX):
+            self._reply(404)
+            return
+        data = self.api.file_bytes()
+        headers = {"Content-Type": "application/octet-stream", "Accept-Ranges": "bytes"}
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if match:
+            start = int(match.group(1))
+            end = min(int(match.group(2) or len(data) - 1), len(data) - 1)
+            headers["Content-Range"] = f"bytes {start}-{end}/{len(data)}"
+            body, status = data[start:end + 1], 206
+        else:
+            body, status = data, 200
+        with self.api._lock:
+            self.api.stats.bytes_sent += len(body)
+        self._reply(status, body, headers)
+
+    do_HEAD = do_GET
+
+    def do_PUT(self) -> None:
+        self._drain()
+        content_range = self.headers.get("Content-Range", "")
+        match = re.fullmatch(r"bytes (\d+)-(\d+)/(\d+)", content_range)
+        if match and int(match.group(2)) + 1 < int(match.group(3)):
+            self._reply(308, headers={"Range": f"bytes=0-{match.group(2)}"})
+        elif content_range.startswith("bytes */") and content_range != "bytes */0":
+            # Offset query of a resumed upload: nothing has been received yet.
+            self._reply(308)
+        else:
+            self._reply(200, b"{}", {"Content-Type": "application/json"})
+
+
+def config_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the FakeApiConfig options to a command-line parser."""
+    defaults = FakeApiConfig()
+    parser.add_argument("--latency", type=float, default=defaults.latency * 1000,
+                        help="Milliseconds added to every API response (default: 0).")
+    parser.add_argument("--jitter", type=float, default=defaults.jitter * 1000,
+                        help="Extra random latency of up to this many milliseconds (default: 0).")
+    parser.add_argument("--list-size", type=int, default=defaults.list_size,
+                        help=f"Items in each top-level list of a response (default: {defaults.list_size}).")
+    parser.add_argument("--string-size", type=int, default=defaults.string_size,
+                        help=f"Characters in each generated string field (default: {defaults.string_size}).")
+    parser.add_argument("--file-size", type=int, default=defaults.file_size,
+                        help=f"Bytes served for each download (default: {defaults.file_size}).")
+    parser.add_argument("--throttle-rate", type=float, default=defaults.throttle_rate,
+                        help="Fraction of API calls rejected with HTTP 429 (default: 0).")
+    parser.add_argument("--retry-after", type=float, default=defaults.retry_after,
+                        help="Retry-After seconds sent with each 429 (default: 0).")
+    parser.add_argument("--seed", type=int, default=defaults.seed,
+                        help="Seed for jitter and 429 injection (default: 0).")
+
+
+def config_from_args(args: argparse.Namespace) -> FakeApiConfig:
+    """FakeApiConfig from options added by config_arguments."""
+    return FakeApiConfig(
+        latency=args.latency / 1000,
+        jitter=args.jitter / 1000,
+        list_size=args.list_size,
+        string_size=args.string_size,
+        file_size=args.file_size,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+
+
+def main() -> None:
+    """Serve the fake API until interrupted."""
+    parser = argparse.ArgumentParser(prog="python benchmarks/fake_api.py", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1", help="Address to bind (default: 127.0.0.1).")
+    parser.add_argument("--port", type=int, default=7777, help="Port to listen on (default: 7777).")
+    config_arguments(parser)
+    args = parser.parse_args()
+    api = FakeKaggleApi(config_from_args(args), host=args.host, port=args.port)
+    print(f"Fake Kaggle API on {api.url} ({len(rpc_table())} RPCs)")
+    api.serve_forever()
+    print(f"Answered {api.stats.total()} requests ({sum(api.stats.throttled.values())} throttled), "
+          f"collected {len(api.spans)} trace spans")
+
+
+if __name__ == "__main__":
+    main()
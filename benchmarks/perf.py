@@ -0,0 +1,297 @@
+"""Per-tool latency harness running every registered tool against the fake API.
+
+Starts a FakeKaggleApi on a free port, points kagglesdk at it and calls each
+MCP tool from an in-memory client session, so every call takes the full
+protocol path: JSON-RPC, argument validation, worker pool and response cache.
+For every tool it reports p50/p95/p99 latency, throughput, upstream requests
+per call and peak RSS, optionally as JSON and compared against a previous run::
+
+    python benchmarks/perf.py --iterations 50 --latency 20 --json after.json --baseline before.json
+
+The harness runs with its own HOME so local stores (uploads, kernel sources,
+discussion index) start empty and the user's caches are left untouched.
+"""
+
+import argparse
+import asyncio
+import fnmatch
+import json
+import math
+import os
+import resource
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+import fake_api
+
+# Arguments for required tool parameters, by parameter name. Paths are filled in
+# from the working directory; anything else falls back to a value of its JSON type.
+SAMPLE_ARGS: dict[str, Any] = {
+    "competition": "bench-competition",
+    "owner": "bench",
+    "owner_slug": "bench",
+    "user_name": "bench",
+    "benchmark_slug": "bench-benchmark",
+    "dataset_slug": "bench-dataset",
+    "kernel_slug": "bench-kernel",
+    "model_slug": "bench-model",
+    "slug": "bench-new",
+    "instance_slug": "default",
+    "framework": "pytorch",
+    "title": "Bench title",
+    "text": "print('hello')\n",
+    "message": "bench submission",
+    "version_notes": "bench version",
+    "blob_file_tokens": "bench-token",
+    "file_name": "data.csv",
+    "content": "a,b\n1,2\n",
+    "query": "bench",
+    "source_type": "competition",
+    "discussion_id": 1,
+    "submission_id": 1,
+}
+
+# Per-tool overrides, applied on top of SAMPLE_ARGS.
+TOOL_ARGS: dict[str, dict[str, Any]] = {
+    "wait_for_kernel_session": {"timeout_seconds": 30},
+    "discussions_by_source": {"source_type": "competition"},
+}
+
+
+@dataclass
+class ToolResult:
+    """Measurements of one tool."""
+
+    tool: str
+    calls: int
+    errors: int
+    upstream_per_call: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    throughput: float
+    peak_rss_mb: float
+    first_error: str = ""
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of values (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def _reset_peak_rss() -> bool:
+    """Reset the kernel's peak-RSS counter for this process (Linux only)."""
+    try:
+        Path("/proc/self/clear_refs").write_text("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size since the last reset (or since start), in MiB."""
+    try:
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _isolate(workdir: Path, api_url: str) -> None:
+    """Point the process at the fake API with a fresh HOME; must run before importing the server."""
+    os.environ["HOME"] = str(workdir / "home")
+    os.environ["KAGGLE_CONFIG_DIR"] = str(workdir / "home" / ".kaggle")
+    os.environ["KAGGLE_API_TOKEN"] = "fake-api-token"
+    os.environ["KAGGLE_API_ENVIRONMENT"] = "TEST"
+    os.environ.pop("KAGGLE_MCP_DISK_CACHE", None)
+    # Keep retries for injected 429s but do not let client-side pacing dominate timings.
+    os.environ.setdefault("KAGGLE_MCP_RATE_LIMIT", "1000")
+    os.environ.setdefault("KAGGLE_MCP_RATE_BURST", "1000")
+    (workdir / "home" / ".kaggle").mkdir(parents=True, exist_ok=True)
+
+    from kaggle_mcp.client import get_pool
+
+    for account in get_pool().accounts:
+        account.client.http_client()._endpoint = api_url
+
+
+def _prepare_paths(workdir: Path) -> dict[str, Any]:
+    """Local files and directories used by upload and download tools."""
+    upload_dir = workdir / "upload"
+    upload_dir.mkdir(exist_ok=True)
+    for i in range(3):
+        (upload_dir / f"part-{i}.csv").write_text("id,value\n" + "".join(f"{j},{j * i}\n" for j in range(1000)))
+    return {"upload_dir": upload_dir, "upload_file": upload_dir / "part-0.csv", "downloads": workdir / "downloads"}
+
+
+def sample_arguments(tool_name: str, schema: dict[str, Any], paths: dict[str, Any]) -> dict[str, Any]:
+    """Arguments for one call of a tool: every required parameter, plus local paths."""
+    args: dict[str, Any] = {}
+    required = set(schema.get("required", []))
+    for name, prop in schema.get("properties", {}).items():
+        if name == "local_dir":
+            args[name] = str(paths["downloads"] / tool_name)
+        elif name == "path":
+            args[name] = str(paths["upload_dir"] if tool_name == "dataset_upload_files" else paths["upload_file"])
+        elif name in required:
+            if name in SAMPLE_ARGS:
+                args[name] = SAMPLE_ARGS[name]
+            else:
+                args[name] = {"integer": 1, "number": 1.0, "boolean": False}.get(prop.get("type"), "bench")
+    args.update(TOOL_ARGS.get(tool_name, {}))
+    return args
+
+
+async def _measure(session, api: fake_api.FakeKaggleApi, name: str, args: dict[str, Any],
+                   iterations: int, concurrency: int, warmup: int, keep_cache: bool) -> ToolResult:
+    from kaggle_mcp.cache import response_cache
+
+    async def call() -> tuple[float, str]:
+        if not keep_cache:
+            response_cache.clear()
+        start = time.perf_counter()
+        result = await session.call_tool(name, args)
+        elapsed = time.perf_counter() - start
+        text = "".join(getattr(block, "text", "") for block in result.content)
+        if result.isError and not text.startswith("Error"):
+            text = f"Error: {text}"
+        return elapsed, text
+
+    for _ in range(warmup):
+        await call()
+
+    latencies: list[float] = []
+    errors: list[str] = []
+    remaining = iterations
+
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            elapsed, text = await call()
+            latencies.append(elapsed)
+            if text.startswith("Error"):
+                errors.append(text)
+
+    upstream_before = api.stats.total()
+    _reset_peak_rss()
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    wall = time.perf_counter() - start
+    upstream = api.stats.total() - upstream_before
+
+    return ToolResult(
+        tool=name,
+        calls=len(latencies),
+        errors=len(errors),
+        upstream_per_call=upstream / max(1, len(latencies)),
+        p50_ms=percentile(latencies, 50) * 1000,
+        p95_ms=percentile(latencies, 95) * 1000,
+        p99_ms=percentile(latencies, 99) * 1000,
+        throughput=len(latencies) / wall if wall > 0 else 0.0,
+        peak_rss_mb=_peak_rss_mb(),
+        first_error=errors[0][:200] if errors else "",
+    )
+
+
+async def run(config: fake_api.FakeApiConfig, patterns: list[str], skip: list[str],
+              iterations: int = 20, concurrency: int = 1, warmup: int = 1,
+              keep_cache: bool = False) -> list[ToolResult]:
+    """Benchmark every registered tool matching patterns and not matching skip."""
+    from mcp.shared.memory import create_connected_server_and_client_session
+
+    with tempfile.TemporaryDirectory(prefix="kaggle-mcp-perf-") as tmp, fake_api.FakeKaggleApi(config) as api:
+        workdir = Path(tmp)
+        _isolate(workdir, api.url)
+        paths = _prepare_paths(workdir)
+        from kaggle_mcp.server import mcp
+
+        results = []
+        async with create_connected_server_and_client_session(mcp) as session:
+            for tool in (await session.list_tools()).tools:
+                if not any(fnmatch.fnmatch(tool.name, p) for p in patterns):
+                    continue
+                if any(fnmatch.fnmatch(tool.name, p) for p in skip):
+                    continue
+                args = sample_arguments(tool.name, tool.inputSchema, paths)
+                result = await _measure(session, api, tool.name, args, iterations, concurrency, warmup, keep_cache)
+                print(f"  {tool.name}: p50 {result.p50_ms:.1f} ms", file=sys.stderr)
+                results.append(result)
+        return results
+
+
+def format_table(results: list[ToolResult], baseline: dict[str, dict[str, Any]] | None = None) -> str:
+    """Markdown table of results, with p50/p95 change against a baseline run if given."""
+    header = "| Tool | Calls | Errors | Upstream/call | p50 ms | p95 ms | p99 ms | Calls/s | Peak RSS MiB |"
+    rule = "|---|---:|---:|---:|---:|---:|---:|---:|---:|"
+    if baseline is not None:
+        header += " Δp50 | Δp95 |"
+        rule += "---:|---:|"
+    lines = [header, rule]
+
+    def delta(new: float, old: float | None) -> str:
+        if not old:
+            return "—"
+        return f"{(new - old) / old:+.0%}"
+
+    for r in results:
+        line = (
+            f"| `{r.tool}` | {r.calls} | {r.errors} | {r.upstream_per_call:.1f} | {r.p50_ms:.1f} "
+            f"| {r.p95_ms:.1f} | {r.p99_ms:.1f} | {r.throughput:.1f} | {r.peak_rss_mb:.1f} |"
+        )
+        if baseline is not None:
+            old = baseline.get(r.tool, {})
+            line += f" {delta(r.p50_ms, old.get('p50_ms'))} | {delta(r.p95_ms, old.get('p95_ms'))} |"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main() -> None:
+    """Run the harness from the command line."""
+    parser = argparse.ArgumentParser(prog="python benchmarks/perf.py", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tools", nargs="*", default=["*"], metavar="GLOB",
+                        help="Tool name patterns to run (default: all).")
+    parser.add_argument("--skip", nargs="*", default=[], metavar="GLOB", help="Tool name patterns to leave out.")
+    parser.add_argument("--iterations", type=int, default=20, help="Measured calls per tool (default: 20).")
+    parser.add_argument("--concurrency", type=int, default=1, help="Concurrent calls per tool (default: 1).")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured calls before each tool (default: 1).")
+    parser.add_argument("--cache", action="store_true",
+                        help="Keep the in-process response cache between calls (default: cleared before each call).")
+    parser.add_argument("--json", metavar="PATH", help="Also write the results as JSON.")
+    parser.add_argument("--baseline", metavar="PATH", help="JSON from an earlier run to compare against.")
+    fake_api.config_arguments(parser)
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        baseline = {r["tool"]: r for r in json.loads(Path(args.baseline).read_text())["results"]}
+
+    config = fake_api.config_from_args(args)
+    results = asyncio.run(run(config, args.tools, args.skip, args.iterations,
+                              args.concurrency, args.warmup, args.cache))
+    print(format_table(results, baseline))
+    for r in results:
+        if r.first_error:
+            print(f"\n`{r.tool}` error: {r.first_error}")
+    if args.json:
+        Path(args.json).write_text(json.dumps({
+            "config": asdict(config),
+            "iterations": args.iterations,
+            "concurrency": args.concurrency,
+            "results": [asdict(r) for r in results],
+        }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
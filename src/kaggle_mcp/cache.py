@@ -0,0 +1,345 @@
+"""In-process TTL + LRU response cache for read-only tools."""
+
+import functools
+import inspect
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+from typing import Any
+
+from mcp.server.fastmcp import FastMCP
+
+from . import disk_cache, singleflight
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+# Time-to-live in seconds for each cacheable tool. Tools not listed here are never cached.
+TOOL_TTLS: dict[str, float] = {
+    # Competitions
+    "competitions_list": 300,
+    "competition_get": 3600,
+    "competition_files": 3600,
+    "competition_data_summary": 3600,
+    "competition_leaderboard": 300,
+    "competition_submissions": 60,
+    # Datasets
+    "datasets_list": 300,
+    "dataset_get": 1800,
+    "dataset_metadata": 1800,
+    "dataset_files": 1800,
+    # Kernels
+    "kernels_list": 300,
+    # Models
+    "models_list": 300,
+    "model_get": 1800,
+    "model_instances_list": 1800,
+    "model_instance_get": 1800,
+    "model_instance_versions": 600,
+    # Benchmarks
+    "benchmark_leaderboard": 600,
+    # Discussions
+    "discussions_search": 300,
+    "discussion_detail": 600,
+    "discussion_comments": 300,
+    "discussion_comments_search": 300,
+    "discussions_solutions": 1800,
+    "discussions_writeups": 1800,
+}
+
+# Read tools whose entries a write tool makes stale. An entry is dropped when every
+# argument it shares with the write call (after renaming via the alias map) is equal,
+# or empty on the read side (e.g. models_list without an owner filter).
+_DATASET_READS = ("dataset_get", "dataset_metadata", "dataset_files", "datasets_list")
+_MODEL_READS = ("model_get", "models_list")
+_MODEL_INSTANCE_READS = ("model_instances_list", "model_instance_get", "model_instance_versions")
+
+INVALIDATES: dict[str, tuple[tuple[str, ...], dict[str, str]]] = {
+    "dataset_create": (_DATASET_READS, {"dataset_slug": "slug"}),
+    "dataset_create_version": (_DATASET_READS, {}),
+    "dataset_upload_files": (_DATASET_READS, {}),
+    "dataset_update_metadata": (_DATASET_READS, {}),
+    "dataset_delete": (_DATASET_READS, {}),
+    "model_create": (_MODEL_READS, {"model_slug": "slug"}),
+    "model_update": (_MODEL_READS, {}),
+    "model_delete": (_MODEL_READS + _MODEL_INSTANCE_READS, {}),
+    "model_instance_create": (_MODEL_READS + _MODEL_INSTANCE_READS, {}),
+    "model_instance_version_create": (_MODEL_INSTANCE_READS, {}),
+    "competition_submit": (("competition_submissions", "competition_leaderboard"), {}),
+    "kernel_push": (("kernels_list",), {}),
+}
+
+
+@dataclass
+class _Entry:
+    value: Any
+    args: dict[str, Any]
+    expires_at: float
+    size: int
+
+
+@dataclass
+class _Counters:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+
+def _sizeof(value: Any) -> int:
+    """Approximate memory of a value, counting the contents of lists, tuples, sets and dicts."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_sizeof(k) + _sizeof(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(_sizeof(v) for v in value)
+    return size
+
+
+class ResponseCache:
+    """Thread-safe, byte-bounded LRU cache with per-entry expiry."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._bytes = 0
+        self._counters: dict[str, _Counters] = {}
+        self._lock = threading.Lock()
+
+    def _count(self, tool: str) -> _Counters:
+        return self._counters.setdefault(tool, _Counters())
+
+    def _drop(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def get(self, tool: str, key: Hashable) -> tuple[bool, Any]:
+        """Return (hit, value) for a key, counting the lookup against the tool."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self._count(tool).misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self._count(tool).hits += 1
+            return True, entry.value
+
+    def set(self, key: Hashable, value: Any, args: dict[str, Any], ttl: float) -> None:
+        """Store a value, evicting least recently used entries to stay under max_bytes."""
+        size = _sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = _Entry(value, args, time.monotonic() + ttl, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                old_key, _ = next(iter(self._entries.items()))
+                self._drop(old_key)
+                self._count(old_key[0]).evictions += 1
+
+    def invalidate(self, tools: tuple[str, ...], args: dict[str, Any]) -> int:
+        """Drop entries of the given tools whose arguments match args."""
+        with self._lock:
+            stale = [
+                key
+                for key, entry in self._entries.items()
+                if key[0] in tools
+                and all(
+                    entry.args[name] in ("", None, value)
+                    for name, value in args.items()
+                    if name in entry.args
+                )
+            ]
+            for key in stale:
+                self._drop(key)
+                self._count(key[0]).invalidations += 1
+            return len(stale)
+
+    def clear(self) -> None:
+        """Drop every entry and reset counters."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._counters.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """Snapshot of size and per-tool hit/miss counters."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "tools": {name: vars(c).copy() for name, c in self._counters.items()},
+            }
+
+
+def _max_bytes_from_env() -> int:
+    raw = os.getenv("KAGGLE_MCP_CACHE_MAX_BYTES", "")
+    try:
+        return int(raw)
+    except ValueError:
+        if raw:
+            logger.warning("Ignoring invalid KAGGLE_MCP_CACHE_MAX_BYTES=%r", raw)
+        return DEFAULT_MAX_BYTES
+
+
+response_cache = ResponseCache(max_bytes=_max_bytes_from_env())
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def _bind_args(sig: inspect.Signature, args: tuple, kwargs: dict) -> dict[str, Any]:
+    bound = sig.bind(*args, **kwargs)
+    bound.apply_defaults()
+    return {name: _normalize(value) for name, value in bound.arguments.items()}
+
+
+def _key(name: str, args: dict[str, Any]) -> Hashable:
+    return (name, tuple(sorted(args.items())))
+
+
+def lookup(name: str, **args: Any) -> tuple[bool, Any]:
+    """Look up a value a tool stored with store() under the same name and arguments.
+
+    For tools that cache an intermediate result themselves, e.g. one reused
+    across several values of an argument left out of the key. Keys are built
+    like those of cached(), so invalidation rules and stats apply alike.
+    """
+    return response_cache.get(name, _key(name, {k: _normalize(v) for k, v in args.items()}))
+
+
+def store(name: str, value: Any, ttl: float, **args: Any) -> None:
+    """Store value for lookup() under a tool name and arguments for ttl seconds."""
+    args = {k: _normalize(v) for k, v in args.items()}
+    response_cache.set(_key(name, args), value, args, ttl)
+
+
+def _is_error(result: Any) -> bool:
+    return isinstance(result, str) and result.startswith("Error")
+
+
+def cached(fn: Callable[..., Any], name: str | None = None) -> Callable[..., Any]:
+    """Wrap a tool with response caching and/or write invalidation.
+
+    Tools listed in TOOL_TTLS are served from response_cache keyed by tool name and
+    normalized arguments; error strings are never stored. Tools listed in
+    INVALIDATES drop matching read entries after they run. Other tools are
+    returned unchanged.
+    """
+    name = name or fn.__name__
+    ttl = TOOL_TTLS.get(name)
+    rule = INVALIDATES.get(name)
+    if ttl is None and rule is None:
+        return fn
+    sig = inspect.signature(fn)
+
+    def lookup(args: tuple, kwargs: dict) -> tuple[dict[str, Any], Hashable, bool, Any]:
+        bound = _bind_args(sig, args, kwargs)
+        key = _key(name, bound)
+        if ttl is None:
+            return bound, key, False, None
+        hit, value = response_cache.get(name, key)
+        return bound, key, hit, value
+
+    def store(bound: dict[str, Any], key: Hashable, result: Any) -> None:
+        if ttl is not None and not _is_error(result):
+            response_cache.set(key, result, bound, ttl)
+
+    def invalidate(bound: dict[str, Any]) -> None:
+        if rule is None:
+            return
+        tools, aliases = rule
+        write_args = {k: v for k, v in bound.items() if k not in aliases.values()}
+        write_args.update({read: bound[write] for read, write in aliases.items()})
+        dropped = response_cache.invalidate(tools, write_args)
+        if dropped:
+            logger.debug("%s invalidated %d cached responses", name, dropped)
+
+    if inspect.iscoroutinefunction(fn):
+
+        @functools.wraps(fn)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            bound, key, hit, value = lookup(args, kwargs)
+            if hit:
+                return value
+            try:
+                result = await fn(*args, **kwargs)
+            finally:
+                invalidate(bound)
+            store(bound, key, result)
+            return result
+
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        bound, key, hit, value = lookup(args, kwargs)
+        if hit:
+            return value
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            invalidate(bound)
+        store(bound, key, result)
+        return result
+
+    return wrapper
+
+
+def register(mcp: FastMCP) -> None:
+    """Register cache inspection tools."""
+
+    @mcp.tool()
+    def cache_stats() -> str:
+        """Show response cache size and per-tool hit/miss counters.
+
+        Includes the persistent disk cache when it is enabled.
+        """
+        s = response_cache.stats()
+        lines = [
+            f"**Entries**: {s['entries']} | **Size**: {s['bytes']} / {s['max_bytes']} bytes",
+        ]
+        total_hits = sum(c["hits"] for c in s["tools"].values())
+        total_lookups = total_hits + sum(c["misses"] for c in s["tools"].values())
+        if total_lookups:
+            lines.append(
+                f"**Hit ratio**: {total_hits / total_lookups:.1%} ({total_hits}/{total_lookups})"
+            )
+        for tool, c in sorted(s["tools"].items()):
+            lookups = c["hits"] + c["misses"]
+            ratio = f"{c['hits'] / lookups:.0%}" if lookups else "N/A"
+            lines.append(
+                f"- `{tool}`: {c['hits']} hits / {c['misses']} misses ({ratio})"
+                f" | evicted: {c['evictions']} | invalidated: {c['invalidations']}"
+            )
+        flights = singleflight.stats()
+        if flights["coalesced"]:
+            lines.append(
+                f"**Coalesced API reads**: {flights['coalesced']} calls shared "
+                f"an in-flight request ({flights['leaders']} sent upstream)"
+            )
+        disk = disk_cache.get_cache()
+        if disk is not None:
+            d = disk.stats()
+            lines.append(
+                f"\n**Disk cache** (`{d['path']}`): {d['entries']} entries, "
+                f"{d['bytes']} / {d['max_bytes']} bytes\n"
+                f"Fresh hits: {d['hits']} | Stale hits (revalidated): {d['stale_hits']} "
+                f"| Misses: {d['misses']}"
+            )
+        return "\n".join(lines)
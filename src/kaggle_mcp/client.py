@@ -1,17 +1,313 @@
-"""Kaggle API client wrapper using kagglesdk."""
+"""Kaggle API client wrapper using kagglesdk.
 
+By default every call uses the credentials found in the environment. A team
+deployment can instead list several Kaggle accounts in a JSON file (``--accounts``
+or ``KAGGLE_MCP_ACCOUNTS``)::
+
+    [
+        {"username": "alice", "api_token": "KGAT_..."},
+        {"username": "bob", "key": "0123abcd..."}
+    ]
+
+Each entry takes either an ``api_token`` or a legacy API ``key``. Calls are then
+routed per request by ClientPool: anything concerning a resource owned by a
+pooled account (a tool called with that owner, or a request naming it) goes to
+that account. Other writes, and reads whose answer depends on who is asking
+(own submissions, competition data downloads, "your work" listings), go to the
+first account; all other reads are spread over every account.
+"""
+
+import contextvars
+import functools
+import inspect
+import itertools
+import json
 import logging
+import os
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
-from kagglesdk import KaggleClient
+from . import disk_cache, metrics, ratelimit, singleflight, tracing
+
+if TYPE_CHECKING:
+    from kagglesdk import KaggleClient
 
 logger = logging.getLogger(__name__)
 
-_client: KaggleClient | None = None
+# Connections kept open to the Kaggle API; enough for every worker thread of a
+# shared HTTP-transport server, where requests' default of 10 would churn.
+POOL_SIZE = 64
+
+ROUTING = ("least-throttled", "round-robin")
+_READ_PREFIXES = ("Get", "List", "Download")
+# Request fields naming the account that owns the resource a request is about.
+_OWNER_FIELDS = ("owner_slug", "user_name", "owner", "user", "username", "owner_name")
+# Tool parameters naming that account.
+_OWNER_ARGS = ("owner", "owner_slug", "user_name", "user")
+# Reads answered differently per account: the caller's own submissions, and
+# competition data, which is only served to accounts that accepted the rules.
+_USER_SCOPED_RPCS = ("ListSubmissions", "GetSubmission", "DownloadDataFile", "DownloadDataFiles")
+
+_client: "KaggleClient | None" = None
+_pool: "ClientPool | None" = None
+_client_lock = threading.Lock()
+_accounts_path: str | None = None
+_owner: contextvars.ContextVar[str | None] = contextvars.ContextVar("kaggle_mcp_owner", default=None)
+
+
+@dataclass
+class Account:
+    """One set of Kaggle credentials and the calls made with it."""
+
+    name: str
+    client: "KaggleClient"
+    call: Callable[..., Any]
+    requests: int = 0
+    # Monotonic time of the last 429 that reached the pool, per service; used
+    # when the rate limiter (which records its own) is disabled.
+    throttled_at: dict[str, float] = field(default_factory=dict)
+
+
+class ClientPool:
+    """Routes Kaggle API requests over one or more accounts (thread-safe).
+
+    Requests about a resource owned by a pooled account go to that account, so
+    writes land in the right place and private resources stay visible. Other
+    writes, and reads scoped to the calling user, go to the first account, so
+    they agree with each other and every cache (which is keyed without the
+    account) only ever holds that account's answer. Other reads go round-robin,
+    or with "least-throttled" routing to the account whose rate limit for the
+    service was hit longest ago, taking turns between equally good ones.
+    """
+
+    def __init__(self, accounts: list[Account], routing: str = "least-throttled"):
+        if not accounts:
+            raise ValueError("ClientPool needs at least one account")
+        self.accounts = accounts
+        self.routing = routing
+        self._by_name = {a.name.lower(): a for a in accounts if a.name}
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+
+    def owner_account(self, request: Any) -> Account | None:
+        """The pooled account owning what request is about, if any."""
+        names = [_owner.get()] + [getattr(request, f, None) for f in _OWNER_FIELDS]
+        slug = getattr(request, "slug", None)
+        if isinstance(slug, str) and "/" in slug:
+            names.append(slug.split("/", 1)[0])
+        for name in names:
+            if isinstance(name, str) and name.lower() in self._by_name:
+                return self._by_name[name.lower()]
+        return None
+
+    @staticmethod
+    def user_scoped(request_name: str, request: Any) -> bool:
+        """Whether a read's answer depends on the account that sends it."""
+        if request_name in _USER_SCOPED_RPCS:
+            return True
+        # Listing groups other than the default (entered competitions, "my"
+        # datasets, ...) and "your work" searches are relative to the caller.
+        group = getattr(request, "group", None)
+        if group is not None and int(getattr(group, "value", group) or 0):
+            return True
+        list_type = getattr(getattr(request, "filters", None), "list_type", None)
+        return list_type is not None and int(getattr(list_type, "value", list_type) or 0) != 0
+
+    def _throttled_at(self, account: Account, service: str) -> float:
+        limiter = ratelimit.get_limiter()
+        if limiter is not None:
+            return limiter.bucket(service, account.name).throttled_at
+        return account.throttled_at.get(service.split(".", 1)[0], 0.0)
+
+    def pick(self, service: str, request_name: str, request: Any) -> Account:
+        """The account a request should be sent with."""
+        if len(self.accounts) == 1:
+            return self.accounts[0]
+        owner = self.owner_account(request)
+        if owner is not None:
+            return owner
+        if not request_name.startswith(_READ_PREFIXES) or self.user_scoped(request_name, request):
+            return self.accounts[0]
+        start = next(self._turn)
+        ordered = [self.accounts[(start + i) % len(self.accounts)] for i in range(len(self.accounts))]
+        if self.routing == "round-robin":
+            return ordered[0]
+        return min(ordered, key=lambda a: self._throttled_at(a, service))
+
+    def call(self, service: str, request_name: str, request, response_type):
+        """``KaggleHttpClient.call`` over the pool."""
+        account = self.pick(service, request_name, request)
+        with self._lock:
+            account.requests += 1
+        if len(self.accounts) > 1:
+            span = tracing.current()
+            if span is not None:
+                span.set(account=account.name)
+        try:
+            return account.call(service, request_name, request, response_type)
+        except Exception as e:
+            if getattr(getattr(e, "response", None), "status_code", None) == 429:
+                account.throttled_at[service.split(".", 1)[0]] = time.monotonic()
+            raise
+
+    def stats(self) -> list[dict[str, Any]]:
+        """Requests sent per account."""
+        with self._lock:
+            return [{"name": a.name, "requests": a.requests} for a in self.accounts]
+
+
+def _process_response(response) -> None:
+    metrics.record_response(response)
+    tracing.record_response(response)
+
+
+def _new_client(**credentials: str) -> "KaggleClient":
+    # kagglesdk loads every service module; it is imported on first use (or by
+    # warm_up) so the server can answer the MCP handshake without it.
+    from kagglesdk import KaggleClient
+    from requests.adapters import HTTPAdapter
 
+    client = KaggleClient(response_processor=_process_response, **credentials)
+    http = client.http_client()
+    http._init_session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE)
+    http._session.mount("https://", adapter)
+    http._session.mount("http://", adapter)
+    return client
 
-def get_client() -> KaggleClient:
-    """Get authenticated KaggleClient instance (lazy init)."""
-    global _client
+
+def load_accounts(path: str | Path) -> list[dict[str, str]]:
+    """Credential sets from an accounts file, checked for the required keys.
+
+    Raises:
+        ValueError: If the file is missing, not valid JSON or an entry lacks
+            a username, or both or neither of api_token and key.
+    """
+    try:
+        entries = json.loads(Path(path).expanduser().read_text())
+    except (OSError, ValueError) as e:
+        raise ValueError(f"cannot read accounts file {path}: {e}") from e
+    if not isinstance(entries, list) or not entries:
+        raise ValueError(f"accounts file {path} must hold a non-empty JSON list")
+    accounts = []
+    for i, entry in enumerate(entries):
+        if not isinstance(entry, dict) or not entry.get("username"):
+            raise ValueError(f"account {i} in {path} has no username")
+        if bool(entry.get("api_token")) == bool(entry.get("key")):
+            raise ValueError(f"account {entry['username']} in {path} needs exactly one of api_token or key")
+        if entry.get("api_token"):
+            accounts.append({"username": entry["username"], "api_token": entry["api_token"]})
+        else:
+            accounts.append({"username": entry["username"], "password": entry["key"]})
+    return accounts
+
+
+def configure_accounts(path: str | Path | None) -> None:
+    """Use the accounts listed in path (None for the environment's credentials).
+
+    Must be called before the first API call.
+
+    Raises:
+        ValueError: If the accounts file is invalid.
+    """
+    global _accounts_path
+    if path is not None:
+        load_accounts(path)
+    _accounts_path = str(path) if path is not None else None
+
+
+def _build_pool() -> ClientPool:
+    path = _accounts_path or os.getenv("KAGGLE_MCP_ACCOUNTS") or None
+    credentials: list[dict[str, str]] = [{}]
+    if path:
+        try:
+            credentials = load_accounts(path)
+        except ValueError as e:
+            logger.warning("Ignoring KAGGLE_MCP_ACCOUNTS: %s", e)
+    routing = os.getenv("KAGGLE_MCP_ACCOUNT_ROUTING", "") or ROUTING[0]
+    if routing not in ROUTING:
+        logger.warning("Ignoring invalid KAGGLE_MCP_ACCOUNT_ROUTING=%r", routing)
+        routing = ROUTING[0]
+
+    accounts = []
+    for creds in credentials:
+        client = _new_client(**creds)
+        # A lone account keeps unprefixed rate-limit buckets.
+        name = creds.get("username", "") if len(credentials) > 1 else ""
+        http = client.http_client()
+        # Each attempt is timed by metrics and traced, within the account's own
+        # rate limit and retries.
+        accounts.append(Account(name, client, ratelimit.wrap(tracing.wrap_http(metrics.wrap(http.call)), name)))
+    return ClientPool(accounts, routing)
+
+
+def get_pool() -> ClientPool:
+    """Get the shared account pool (lazy init, thread-safe)."""
+    get_client()
+    assert _pool is not None
+    return _pool
+
+
+def get_client() -> "KaggleClient":
+    """Get authenticated KaggleClient instance (lazy init, thread-safe).
+
+    With several accounts this is the first account's client, whose requests
+    are routed over the whole pool.
+    """
+    global _client, _pool
     if _client is None:
-        _client = KaggleClient()
+        with _client_lock:
+            if _client is None:
+                pool = _build_pool()
+                client = pool.accounts[0].client
+                # Every service client funnels its RPCs through this single method.
+                # Disk cache hits are answered first; identical concurrent misses
+                # then share one request, which the pool sends with one of its
+                # accounts. Trace spans cover the whole request.
+                client.http_client().call = tracing.wrap_request(disk_cache.wrap(singleflight.wrap(pool.call)))
+                _pool = pool
+                _client = client
     return _client
+
+
+def pin_owner(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Route all requests of a tool call to the account named by its owner argument.
+
+    A tool taking ``owner``, ``owner_slug``, ``user_name`` or ``user`` acts on
+    that account's resources, including requests (such as blob uploads) that do
+    not name it. Only owners that are pooled accounts have an effect.
+    """
+    params = [p for p in _OWNER_ARGS if p in inspect.signature(fn).parameters]
+    if not params:
+        return fn
+    sig = inspect.signature(fn)
+
+    def owner_of(args: tuple, kwargs: dict) -> str | None:
+        bound = sig.bind_partial(*args, **kwargs).arguments
+        return next((bound[p] for p in params if isinstance(bound.get(p), str) and bound[p]), None)
+
+    if inspect.iscoroutinefunction(fn):
+
+        @functools.wraps(fn)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            token = _owner.set(owner_of(args, kwargs))
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                _owner.reset(token)
+
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        token = _owner.set(owner_of(args, kwargs))
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _owner.reset(token)
+
+    return wrapper
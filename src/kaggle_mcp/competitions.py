@@ -2,9 +2,28 @@
 
 from mcp.server.fastmcp import FastMCP
 
+from . import downloads, pagination
 from .client import get_client
 
 
+def _listed_size(competition: str, file_name: str) -> int | None:
+    """Look up total_bytes for a competition data file, or None if unknown."""
+    from kagglesdk.competitions.services.competition_api_service import (
+        ApiListDataFilesRequest,
+    )
+
+    req = ApiListDataFilesRequest()
+    req.competition_name = competition
+    try:
+        resp = get_client().competitions.competition_api_client.list_data_files(req)
+    except Exception:
+        return None
+    for f in resp.files or []:
+        if f.name == file_name:
+            return f.total_bytes or None
+    return None
+
+
 def register(mcp: FastMCP) -> None:
     """Register competition tools."""
 
@@ -14,6 +33,7 @@ def register(mcp: FastMCP) -> None:
         category: str = "",
         sort_by: str = "",
         page: int = 1,
+        max_results: int = 0,
     ) -> str:
         """Search and list Kaggle competitions.
 
@@ -22,25 +42,33 @@ def register(mcp: FastMCP) -> None:
             category: Filter by category (e.g. featured, research, playground).
             sort_by: Sort order (latestDeadline, numberOfTeams, recentlyCreated).
             page: Page number for pagination.
+            max_results: If > 0, walk pages starting at `page` (prefetching ahead
+                concurrently) and return up to this many unique competitions.
         """
         from kagglesdk.competitions.services.competition_api_service import (
             ApiListCompetitionsRequest,
         )
 
-        req = ApiListCompetitionsRequest()
-        if search:
-            req.search = search
-        if category:
-            req.category = category
-        if sort_by:
-            req.sort_by = sort_by
-        req.page = page
+        def fetch(p: int) -> list:
+            req = ApiListCompetitionsRequest()
+            if search:
+                req.search = search
+            if category:
+                req.category = category
+            if sort_by:
+                req.sort_by = sort_by
+            req.page = p
+            resp = get_client().competitions.competition_api_client.list_competitions(req)
+            return resp.competitions or []
 
         try:
-            resp = get_client().competitions.competition_api_client.list_competitions(req)
+            if max_results > 0:
+                pages = pagination.iter_numbered_pages(fetch, page, prefetch=pagination.prefetch_for(max_results))
+                comps = pagination.collect(pages, max_results, key=lambda c: c.ref)
+            else:
+                comps = fetch(page)
         except Exception as e:
             return f"Error listing competitions: {e}"
-        comps = resp.competitions
         if not comps:
             return "No competitions found."
         lines = []
@@ -75,12 +103,15 @@ def register(mcp: FastMCP) -> None:
         return "\n".join(lines)
 
     @mcp.tool()
-    def competition_download(competition: str, file_name: str = "") -> str:
+    def competition_download(competition: str, file_name: str = "", local_dir: str = "") -> str:
         """Download competition data files. Returns download URL.
 
         Args:
             competition: Competition URL suffix (e.g. 'titanic').
             file_name: Specific file to download. Empty for all files.
+            local_dir: If set, download into this directory with parallel ranged
+                requests (resuming partial files) and return the local path and
+                throughput instead of the URL.
         """
         if file_name:
             from kagglesdk.competitions.services.competition_api_service import (
@@ -99,7 +130,17 @@ def register(mcp: FastMCP) -> None:
             req = ApiDownloadDataFilesRequest()
             req.competition_name = competition
             resp = get_client().competitions.competition_api_client.download_data_files(req)
-        return f"Download URL: {resp.url}"
+        if not local_dir:
+            return f"Download URL: {resp.url}"
+
+        expected = _listed_size(competition, file_name) if file_name else None
+        try:
+            result = downloads.download(
+                resp.url, local_dir, file_name or f"{competition}.zip", expected_size=expected
+            )
+        except Exception as e:
+            return f"Error downloading competition data: {e}"
+        return result.summary()
 
     @mcp.tool()
     def competition_submit(
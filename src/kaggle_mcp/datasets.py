@@ -1,11 +1,145 @@
 """Dataset tools for Kaggle MCP Server."""
 
-import requests
+import glob
+import os
+import time
+from pathlib import Path
+
 from mcp.server.fastmcp import FastMCP
 
+from . import downloads, executor, manifests, pagination, uploads
 from .client import get_client
 
 
+def _listed_size(owner: str, dataset_slug: str, file_name: str) -> int | None:
+    """Look up total_bytes for a dataset file, or None if unknown."""
+    from kagglesdk.datasets.services.dataset_api_service import (
+        ApiListDatasetFilesRequest,
+    )
+
+    req = ApiListDatasetFilesRequest()
+    req.owner_slug = owner
+    req.dataset_slug = dataset_slug
+    try:
+        resp = get_client().datasets.dataset_api_client.list_dataset_files(req)
+    except Exception:
+        return None
+    for f in resp.files or []:
+        if f.name == file_name:
+            return f.total_bytes or None
+    return None
+
+
+def _download_to(url: str, local_dir: str, owner: str, dataset_slug: str, file_name: str) -> str:
+    expected = _listed_size(owner, dataset_slug, file_name) if file_name else None
+    result = downloads.download(
+        url, local_dir, file_name or f"{dataset_slug}.zip", expected_size=expected
+    )
+    return result.summary()
+
+
+def _new_files(tokens: list[str]) -> list:
+    from kagglesdk.datasets.types.dataset_api_service import ApiDatasetNewFile
+
+    files = []
+    for t in tokens:
+        f = ApiDatasetNewFile()
+        f.token = t.strip()
+        files.append(f)
+    return files
+
+
+def _create_dataset(
+    owner: str,
+    slug: str,
+    title: str,
+    tokens: list[str],
+    license_name: str,
+    is_private: bool,
+):
+    from kagglesdk.datasets.services.dataset_api_service import (
+        ApiCreateDatasetRequest,
+    )
+
+    req = ApiCreateDatasetRequest()
+    req.owner_slug = owner
+    req.slug = slug
+    req.title = title
+    req.license_name = license_name
+    req.is_private = is_private
+    if tokens:
+        req.files = _new_files(tokens)
+    return get_client().datasets.dataset_api_client.create_dataset(req)
+
+
+def _create_version(owner: str, dataset_slug: str, version_notes: str, tokens: list[str]):
+    from kagglesdk.datasets.services.dataset_api_service import (
+        ApiCreateDatasetVersionRequest,
+    )
+    from kagglesdk.datasets.types.dataset_api_service import (
+        ApiCreateDatasetVersionRequestBody,
+    )
+
+    body = ApiCreateDatasetVersionRequestBody()
+    body.version_notes = version_notes
+    if tokens:
+        body.files = _new_files(tokens)
+
+    req = ApiCreateDatasetVersionRequest()
+    req.owner_slug = owner
+    req.dataset_slug = dataset_slug
+    req.body = body
+    return get_client().datasets.dataset_api_client.create_dataset_version(req)
+
+
+def _tokens_rejected(error: object) -> bool:
+    """Whether a publish error says the upload tokens it was given are invalid or expired."""
+    response = getattr(error, "response", None)
+    if getattr(response, "status_code", None) in (401, 403):
+        # Credential problems, however they word "token".
+        return False
+    text = f"{error} {getattr(response, 'text', '') or ''}".lower()
+    if "blob" in text:
+        return True
+    return "token" in text and any(w in text for w in ("expired", "invalid", "not found", "unknown"))
+
+
+def _remote_sizes(owner: str, dataset_slug: str) -> dict[str, int]:
+    """Map of file name to total_bytes for the dataset's current version."""
+    from kagglesdk.datasets.services.dataset_api_service import (
+        ApiListDatasetFilesRequest,
+    )
+
+    sizes: dict[str, int] = {}
+    page_token = ""
+    while True:
+        req = ApiListDatasetFilesRequest()
+        req.owner_slug = owner
+        req.dataset_slug = dataset_slug
+        if page_token:
+            req.page_token = page_token
+        resp = get_client().datasets.dataset_api_client.list_dataset_files(req)
+        if resp.error_message:
+            raise RuntimeError(resp.error_message)
+        for f in resp.files or []:
+            sizes[f.name] = f.total_bytes
+        page_token = resp.next_page_token
+        if not page_token:
+            return sizes
+
+
+def _collect_files(path: str) -> list[Path]:
+    """Expand a directory (its top-level files) or a glob pattern into file paths."""
+    p = Path(path).expanduser()
+    if p.is_dir():
+        files = [f for f in p.iterdir() if f.is_file() and not f.name.startswith(".")]
+    elif p.is_file():
+        files = [p]
+    else:
+        files = [Path(f) for f in glob.glob(str(p), recursive=True) if os.path.isfile(f)]
+    return sorted(files)
+
+
 def register(mcp: FastMCP) -> None:
     """Register dataset tools."""
 
@@ -15,6 +149,7 @@ def register(mcp: FastMCP) -> None:
         sort_by: str = "",
         file_type: str = "",
         page: int = 1,
+        max_results: int = 0,
     ) -> str:
         """Search and list Kaggle datasets.
 
@@ -23,22 +158,29 @@ def register(mcp: FastMCP) -> None:
             sort_by: Sort order (hottest, votes, updated, active).
             file_type: Filter by file type (csv, json, sqlite, etc).
             page: Page number.
+            max_results: If > 0, walk pages starting at `page` (prefetching ahead
+                concurrently) and return up to this many unique datasets.
         """
         from kagglesdk.datasets.services.dataset_api_service import (
             ApiListDatasetsRequest,
         )
 
-        req = ApiListDatasetsRequest()
-        if search:
-            req.search = search
-        if sort_by:
-            req.sort_by = sort_by
-        if file_type:
-            req.file_type = file_type
-        req.page = page
-
-        resp = get_client().datasets.dataset_api_client.list_datasets(req)
-        ds = resp.datasets
+        def fetch(p: int) -> list:
+            req = ApiListDatasetsRequest()
+            if search:
+                req.search = search
+            if sort_by:
+                req.sort_by = sort_by
+            if file_type:
+                req.file_type = file_type
+            req.page = p
+            return get_client().datasets.dataset_api_client.list_datasets(req).datasets or []
+
+        if max_results > 0:
+            pages = pagination.iter_numbered_pages(fetch, page, prefetch=pagination.prefetch_for(max_results))
+            ds = pagination.collect(pages, max_results, key=lambda d: d.ref)
+        else:
+            ds = fetch(page)
         if not ds:
             return "No datasets found."
         lines = []
@@ -72,13 +214,18 @@ def register(mcp: FastMCP) -> None:
         return "\n".join(lines)
 
     @mcp.tool()
-    def dataset_download(owner: str, dataset_slug: str, file_name: str = "") -> str:
+    def dataset_download(
+        owner: str, dataset_slug: str, file_name: str = "", local_dir: str = ""
+    ) -> str:
         """Download dataset files. Returns download URL.
 
         Args:
             owner: Dataset owner username.
             dataset_slug: Dataset slug name.
             file_name: Specific file. Empty for all.
+            local_dir: If set, download into this directory with parallel ranged
+                requests (resuming partial files) and return the local path and
+                throughput instead of the URL.
         """
         from kagglesdk.datasets.services.dataset_api_service import (
             ApiDownloadDatasetRequest,
@@ -90,7 +237,12 @@ def register(mcp: FastMCP) -> None:
         if file_name:
             req.file_name = file_name
         resp = get_client().datasets.dataset_api_client.download_dataset(req)
-        return f"Download URL: {resp.url}"
+        if not local_dir:
+            return f"Download URL: {resp.url}"
+        try:
+            return _download_to(resp.url, local_dir, owner, dataset_slug, file_name)
+        except Exception as e:
+            return f"Error downloading dataset: {e}"
 
     @mcp.tool()
     def dataset_metadata(owner: str, dataset_slug: str) -> str:
@@ -129,25 +281,8 @@ def register(mcp: FastMCP) -> None:
             license_name: License (e.g. CC0-1.0, CC-BY-SA-4.0).
             is_private: Whether dataset is private.
         """
-        from kagglesdk.datasets.services.dataset_api_service import (
-            ApiCreateDatasetRequest,
-        )
-        from kagglesdk.datasets.types.dataset_api_service import ApiDatasetNewFile
-
-        req = ApiCreateDatasetRequest()
-        req.owner_slug = owner
-        req.slug = slug
-        req.title = title
-        req.license_name = license_name
-        req.is_private = is_private
-        if file_tokens:
-            files = []
-            for t in file_tokens.split(","):
-                f = ApiDatasetNewFile()
-                f.token = t.strip()
-                files.append(f)
-            req.files = files
-        resp = get_client().datasets.dataset_api_client.create_dataset(req)
+        tokens = file_tokens.split(",") if file_tokens else []
+        resp = _create_dataset(owner, slug, title, tokens, license_name, is_private)
         return str(resp.to_dict())
 
     @mcp.tool()
@@ -158,24 +293,36 @@ def register(mcp: FastMCP) -> None:
             file_name: File name (e.g. 'data.csv', 'config.json').
             content: File content as text.
         """
-        from kagglesdk.datasets.services.dataset_api_service import (
-            ApiUploadDatasetFileRequest,
-        )
+        try:
+            result = uploads.upload_bytes(content.encode("utf-8"), file_name)
+        except Exception as e:
+            return f"Error uploading file: {e}"
+        return f"Token: {result.token}"
 
-        data = content.encode("utf-8")
-        c = get_client()
-        req = ApiUploadDatasetFileRequest()
-        req.file_name = file_name
-        req.content_length = len(data)
-        req.last_modified_epoch_seconds = 0
-        resp = c.datasets.dataset_api_client.upload_dataset_file(req)
-
-        requests.put(
-            resp.create_url,
-            data=data,
-            headers={"Content-Type": "application/octet-stream"},
-        )
-        return f"Token: {resp.token}"
+    @mcp.tool()
+    def file_upload_path(path: str, file_name: str = "") -> str:
+        """Upload a local file to Kaggle by streaming it from disk; get a token for dataset_create.
+
+        Works for text and binary files of any size. The file is sent in fixed-size
+        chunks, and an interrupted upload resumes from the last acknowledged byte,
+        including when the tool is called again for the same unchanged file.
+
+        Args:
+            path: Local path of the file to upload.
+            file_name: Name in the dataset (defaults to the file's base name).
+        """
+        try:
+            result = uploads.upload_file(path, file_name)
+        except Exception as e:
+            return f"Error uploading file: {e}"
+        lines = [
+            f"Token: {result.token}",
+            f"Uploaded: {result.file_name} ({result.size} bytes) in {result.seconds:.1f}s "
+            f"({result.throughput / 1_000_000:.1f} MB/s)",
+        ]
+        if result.resumed_bytes:
+            lines.append(f"Resumed: {result.resumed_bytes} bytes were already uploaded")
+        return "\n".join(lines)
 
     @mcp.tool()
     def dataset_get(owner: str, dataset_slug: str) -> str:
@@ -214,33 +361,137 @@ def register(mcp: FastMCP) -> None:
             file_tokens: Comma-separated file tokens from file_upload.
         """
         try:
-            from kagglesdk.datasets.services.dataset_api_service import (
-                ApiCreateDatasetVersionRequest,
-            )
-            from kagglesdk.datasets.types.dataset_api_service import (
-                ApiCreateDatasetVersionRequestBody,
-                ApiDatasetNewFile,
-            )
-
-            body = ApiCreateDatasetVersionRequestBody()
-            body.version_notes = version_notes
-            if file_tokens:
-                files = []
-                for t in file_tokens.split(","):
-                    f = ApiDatasetNewFile()
-                    f.token = t.strip()
-                    files.append(f)
-                body.files = files
-
-            req = ApiCreateDatasetVersionRequest()
-            req.owner_slug = owner
-            req.dataset_slug = dataset_slug
-            req.body = body
-            resp = get_client().datasets.dataset_api_client.create_dataset_version(req)
+            tokens = file_tokens.split(",") if file_tokens else []
+            resp = _create_version(owner, dataset_slug, version_notes, tokens)
             return str(resp.to_dict())
         except Exception as e:
             return f"Error creating dataset version: {e}"
 
+    @mcp.tool()
+    def dataset_upload_files(
+        owner: str,
+        dataset_slug: str,
+        path: str,
+        version_notes: str = "",
+        create: bool = False,
+        title: str = "",
+        license_name: str = "CC0-1.0",
+        is_private: bool = True,
+        max_parallel: int = 4,
+        delta: bool = False,
+    ) -> str:
+        """Upload many local files concurrently, then create a dataset or new version in one call.
+
+        Args:
+            owner: Dataset owner username.
+            dataset_slug: Dataset slug name.
+            path: Local directory (its top-level files), single file, or glob
+                pattern (e.g. '/data/out/*.csv', '/data/**/*.parquet').
+            version_notes: Notes for the new version (ignored when create=True).
+            create: If True, create a new dataset instead of a new version.
+            title: Dataset title (required when create=True).
+            license_name: License when creating (e.g. CC0-1.0, CC-BY-SA-4.0).
+            is_private: Whether a newly created dataset is private.
+            max_parallel: Maximum number of files uploaded (or hashed) at the same time.
+            delta: For new versions, only upload files that are new or changed since
+                the last delta publish (by size and SHA-256 against a local manifest
+                and the current version's file list); unchanged files reuse their
+                previous upload token.
+        """
+        files = _collect_files(path)
+        if not files:
+            return f"No files matched '{path}'."
+        names = [f.name for f in files]
+        dupes = sorted({n for n in names if names.count(n) > 1})
+        if dupes:
+            return f"Error: duplicate file names would collide in the dataset: {', '.join(dupes)}"
+        if create and not title:
+            return "Error: title is required when create=True."
+
+        manifest = None
+        states: dict[str, manifests.FileState] = {}
+        reused: list[Path] = []
+        dropped: list[str] = []
+        if delta and not create:
+            try:
+                manifest = manifests.Manifest(owner, dataset_slug)
+                states = manifest.scan(files, max_parallel)
+                remote = _remote_sizes(owner, dataset_slug)
+            except Exception as e:
+                return f"Error preparing delta upload: {e}"
+            reused = [
+                f
+                for f in files
+                if states[f.name].token and remote.get(f.name) == states[f.name].size
+            ]
+            dropped = sorted(set(remote) - set(names))
+
+        def upload(batch: list[Path]) -> tuple[list[str], list[str]]:
+            results = executor.map_threads(uploads.upload_file, batch, max_parallel)
+            ok, failed = [], []
+            for f, r in zip(batch, results):
+                if isinstance(r, Exception):
+                    failed.append(f"- `{f.name}` — failed: {r}")
+                    continue
+                if f.name in states:
+                    states[f.name].token = r.token
+                else:
+                    states[f.name] = manifests.FileState(r.size, 0, "", r.token)
+                ok.append(
+                    f"- `{r.file_name}` — {r.size} bytes in {r.seconds:.1f}s "
+                    f"({r.throughput / 1_000_000:.1f} MB/s)"
+                )
+            return ok, failed
+
+        def publish():
+            tokens = [states[n].token for n in names]
+            if create:
+                return _create_dataset(owner, dataset_slug, title, tokens, license_name, is_private)
+            return _create_version(owner, dataset_slug, version_notes, tokens)
+
+        to_upload = [f for f in files if f not in reused]
+        started = time.monotonic()
+        lines, failed = upload(to_upload)
+        report = (
+            f"**Uploaded** {len(lines)}/{len(to_upload)} files, "
+            f"{sum(f.stat().st_size for f in to_upload)} bytes "
+            f"in {time.monotonic() - started:.1f}s (max_parallel={max_parallel})"
+        )
+        if delta and not create:
+            report += f"\n**Unchanged** (token reused): {len(reused)} files"
+            if dropped:
+                report += f"\n**Removed** from the dataset: {', '.join(dropped)}"
+        if failed:
+            return "\n".join(
+                [f"Error uploading {len(failed)} file(s); no dataset was changed.", report]
+                + failed
+                + lines
+            )
+
+        action = "creating dataset" if create else "creating dataset version"
+
+        def attempt():
+            try:
+                resp = publish()
+            except Exception as e:
+                return None, e
+            return resp, getattr(resp, "error", None) or None
+
+        resp, error = attempt()
+        if error is not None and reused and _tokens_rejected(error):
+            # Previously issued tokens have expired; upload those files too and retry once.
+            retry_lines, failed = upload(reused)
+            lines += retry_lines
+            report += f"\nReused tokens were rejected ({error}); re-uploaded {len(retry_lines)} files"
+            if failed:
+                return "\n".join([f"Error {action}: {error}", report] + failed + lines)
+            resp, error = attempt()
+        if error is not None:
+            return f"Error {action}: {error}\n{report}"
+        if manifest is not None:
+            manifest.save(states)
+        return "\n".join([str(resp.to_dict()), "", report] + lines)
+
     @mcp.tool()
     def dataset_update_metadata(
         owner: str,
@@ -310,13 +561,18 @@ def register(mcp: FastMCP) -> None:
             return f"Error deleting dataset: {e}"
 
     @mcp.tool()
-    def dataset_download_file(owner: str, dataset_slug: str, file_name: str) -> str:
+    def dataset_download_file(
+        owner: str, dataset_slug: str, file_name: str, local_dir: str = ""
+    ) -> str:
         """Download a single file from a dataset. Returns download URL.
 
         Args:
             owner: Dataset owner username.
             dataset_slug: Dataset slug name.
             file_name: Name of the specific file to download.
+            local_dir: If set, download into this directory with parallel ranged
+                requests (resuming partial files) and return the local path and
+                throughput instead of the URL.
         """
         try:
             from kagglesdk.datasets.services.dataset_api_service import (
@@ -328,6 +584,8 @@ def register(mcp: FastMCP) -> None:
             req.dataset_slug = dataset_slug
             req.file_name = file_name
             resp = get_client().datasets.dataset_api_client.download_dataset(req)
+            if local_dir:
+                return _download_to(resp.url, local_dir, owner, dataset_slug, file_name)
             return f"Download URL: {resp.url}"
         except Exception as e:
             return f"Error downloading file: {e}"
@@ -0,0 +1,227 @@
+"""Persistent local index of discussion documents keyed by ID.
+
+Every document returned by a discussion search is stored here, so looking a
+discussion up by ID again is a single primary-key read instead of a series of
+search calls. Documents are replaced whenever a newer search returns them.
+
+Title, message, author and source are also kept in an FTS5 full-text index, so
+everything already fetched can be searched offline with ranked results.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = Path.home() / ".cache" / "kaggle-mcp" / "discussions.sqlite3"
+DEFAULT_MAX_DOCUMENTS = 50_000
+
+_SCHEMA_VERSION = 2
+_SOURCE_PREFIX = "SEARCH_DISCUSSIONS_SOURCE_TYPE_"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER NOT NULL,
+    document_type TEXT NOT NULL,
+    body TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    title TEXT NOT NULL,
+    message TEXT NOT NULL,
+    author TEXT NOT NULL,
+    source TEXT NOT NULL,
+    votes INTEGER NOT NULL,
+    PRIMARY KEY (document_type, id)
+);
+CREATE INDEX IF NOT EXISTS documents_fetched ON documents (fetched_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    title, message, author, source,
+    content='documents', content_rowid='rowid', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS documents_ai AFTER INSERT ON documents BEGIN
+    INSERT INTO documents_fts (rowid, title, message, author, source)
+    VALUES (new.rowid, new.title, new.message, new.author, new.source);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_ad AFTER DELETE ON documents BEGIN
+    INSERT INTO documents_fts (documents_fts, rowid, title, message, author, source)
+    VALUES ('delete', old.rowid, old.title, old.message, old.author, old.source);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_au AFTER UPDATE ON documents BEGIN
+    INSERT INTO documents_fts (documents_fts, rowid, title, message, author, source)
+    VALUES ('delete', old.rowid, old.title, old.message, old.author, old.source);
+    INSERT INTO documents_fts (rowid, title, message, author, source)
+    VALUES (new.rowid, new.title, new.message, new.author, new.source);
+END;
+"""
+
+# Column weights for bm25(): title matches count most, then author, message, source.
+_BM25_WEIGHTS = "10.0, 1.0, 2.0, 0.5"
+
+
+def _row(d: dict, document_type: str, now: float) -> tuple:
+    doc = d.get("discussionDocument") or {}
+    source = str(doc.get("sourceType") or "")
+    if source.startswith(_SOURCE_PREFIX):
+        source = source[len(_SOURCE_PREFIX):].lower()
+    return (
+        d["id"],
+        document_type,
+        json.dumps(d),
+        now,
+        d.get("title") or "",
+        doc.get("messageMarkdown") or doc.get("messageStripped") or "",
+        (d.get("ownerUser") or {}).get("displayName") or "",
+        source,
+        int(d.get("votes") or 0),
+    )
+
+
+def _match_expression(query: str) -> str:
+    """Turn free text into an FTS5 query matching every word, as literal terms."""
+    terms = ['"' + word.replace('"', '""') + '"' for word in query.split()]
+    return " ".join(terms)
+
+
+class DiscussionIndex:
+    """SQLite store of search documents, capped at max_documents rows."""
+
+    def __init__(self, path: str | Path, max_documents: int = DEFAULT_MAX_DOCUMENTS):
+        self.path = Path(path).expanduser()
+        self.max_documents = max_documents
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        (version,) = self._conn.execute("PRAGMA user_version").fetchone()
+        if version != _SCHEMA_VERSION:
+            # The index only holds copies of fetched documents, so rebuild it.
+            self._conn.executescript(
+                "DROP TABLE IF EXISTS documents_fts; DROP TABLE IF EXISTS documents;"
+            )
+            self._conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def add(self, documents: list[dict], document_type: str = "TOPIC") -> None:
+        """Store or refresh documents that carry an ID."""
+        now = time.time()
+        rows = [_row(d, document_type, now) for d in documents if isinstance(d.get("id"), int)]
+        if not rows:
+            return
+        # An upsert (not INSERT OR REPLACE) so the update trigger keeps the FTS index in sync.
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO documents VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (document_type, id) DO UPDATE SET body = excluded.body, "
+                "fetched_at = excluded.fetched_at, title = excluded.title, "
+                "message = excluded.message, author = excluded.author, "
+                "source = excluded.source, votes = excluded.votes",
+                rows,
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        (total,) = self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()
+        if total <= self.max_documents:
+            return
+        self._conn.execute(
+            "DELETE FROM documents WHERE rowid IN "
+            "(SELECT rowid FROM documents ORDER BY fetched_at LIMIT ?)",
+            (total - self.max_documents,),
+        )
+
+    def get(self, discussion_id: int, document_type: str = "TOPIC") -> dict | None:
+        """Return the stored document for an ID, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body FROM documents WHERE document_type = ? AND id = ?",
+                (document_type, discussion_id),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def search(
+        self,
+        query: str,
+        source: str = "",
+        document_type: str = "",
+        sort_by: str = "relevance",
+        limit: int = 20,
+    ) -> list[tuple[dict, str]]:
+        """Ranked full-text search over stored documents.
+
+        Args:
+            query: Free text; every word must match (title, message, author or source).
+            source: Only documents from this source type (e.g. competition_solution).
+            document_type: Only TOPIC or COMMENT documents.
+            sort_by: "relevance" (bm25, title weighted highest) or "votes".
+            limit: Maximum number of results.
+
+        Returns:
+            (document dict, message snippet with matches in bold) pairs.
+        """
+        match = _match_expression(query)
+        if not match:
+            return []
+        sql = (
+            "SELECT d.body, snippet(documents_fts, 1, '**', '**', ' … ', 24) "
+            "FROM documents_fts JOIN documents d ON d.rowid = documents_fts.rowid "
+            "WHERE documents_fts MATCH ?"
+        )
+        params: list = [match]
+        if source:
+            sql += " AND d.source = ?"
+            params.append(source)
+        if document_type:
+            sql += " AND d.document_type = ?"
+            params.append(document_type.upper())
+        if sort_by == "votes":
+            sql += " ORDER BY d.votes DESC"
+        else:
+            sql += f" ORDER BY bm25(documents_fts, {_BM25_WEIGHTS})"
+        sql += " LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [(json.loads(body), snippet) for body, snippet in rows]
+
+    def count(self) -> int:
+        """Number of stored documents."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def clear(self) -> None:
+        """Drop every stored document."""
+        with self._lock:
+            self._conn.execute("DELETE FROM documents")
+
+
+_index: DiscussionIndex | None = None
+_index_lock = threading.Lock()
+_disabled = False
+
+
+def get_index() -> DiscussionIndex | None:
+    """Get the shared index (lazy init), or None when disabled or unavailable.
+
+    KAGGLE_MCP_DISCUSSION_INDEX overrides the location; ``0``/``false`` disables it.
+    """
+    global _index, _disabled
+    if _index is not None or _disabled:
+        return _index
+    with _index_lock:
+        if _index is None and not _disabled:
+            raw = os.getenv("KAGGLE_MCP_DISCUSSION_INDEX", "").strip()
+            if raw.lower() in ("0", "false", "no"):
+                _disabled = True
+                return None
+            path = raw if raw and raw.lower() not in ("1", "true", "yes") else DEFAULT_PATH
+            try:
+                _index = DiscussionIndex(path)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning("Discussion index unavailable at %s: %s", path, e)
+                _disabled = True
+    return _index
@@ -1,9 +1,14 @@
 """Discussion tools for Kaggle MCP Server."""
 
 import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
 
 from mcp.server.fastmcp import FastMCP
 
+from . import discussion_index, executor, pagination
 from .client import get_client
 
 logger = logging.getLogger(__name__)
@@ -54,7 +59,7 @@ def _fmt_doc(d: dict) -> str:
     return f"- [{did}] **{title}** (votes: {votes}{author_str}{date_str})"
 
 
-def _search_via_sdk(
+def _search_page(
     query: str = "",
     source_type: str = "",
     sort_by: str = "",
@@ -63,8 +68,9 @@ def _search_via_sdk(
     list_type: str = "",
     page_size: int = 20,
     discussions_order_by: str = "",
-) -> list[dict]:
-    """Search discussions via kagglesdk search API.
+    page_token: str = "",
+) -> tuple[list[dict], str]:
+    """Fetch one page of discussions via kagglesdk search API.
 
     Args:
         query: Free-text search query.
@@ -74,9 +80,12 @@ def _search_via_sdk(
         write_up_types: List of WriteUpType enum name strings.
         list_type: "your_work" to filter to current user's content.
         page_size: Max results to return.
+        discussions_order_by: SearchDiscussionsOrderBy enum name string.
+        page_token: Token of the page to fetch; empty for the first page.
 
     Returns:
-        List of document dicts from the API response.
+        (document dicts from the API response, next page token). A failed
+        search raises, so callers can tell it from the end of the results.
     """
     from kagglesdk.search.services.search_api_service import ListEntitiesRequest
     from kagglesdk.search.types.search_api_service import (
@@ -125,6 +134,8 @@ def _search_via_sdk(
 
     req.filters = f
     req.page_size = page_size
+    if page_token:
+        req.page_token = page_token
 
     if sort_by and sort_by in _SORT_MAP:
         enum_name = _SORT_MAP[sort_by]
@@ -136,12 +147,170 @@ def _search_via_sdk(
         if order_enum is not None:
             req.discussions_order_by = order_enum
 
+    resp = get_client().search.search_api_client.list_entities(req)
+    results = [doc.to_dict() for doc in resp.documents]
+
+    index = discussion_index.get_index()
+    if index is not None:
+        try:
+            index.add(results, document_type)
+        except Exception as e:
+            logger.warning("Discussion index update failed: %s", e)
+    return results, resp.next_page_token
+
+
+def _search_via_sdk(
+    query: str = "",
+    source_type: str = "",
+    sort_by: str = "",
+    document_type: str = "TOPIC",
+    write_up_types: list[str] | None = None,
+    list_type: str = "",
+    page_size: int = 20,
+    discussions_order_by: str = "",
+) -> list[dict]:
+    """Search discussions via kagglesdk search API; first page only.
+
+    Takes the same arguments as _search_page and returns its document dicts.
+    A failed search is logged and returns no documents.
+    """
     try:
-        resp = get_client().search.search_api_client.list_entities(req)
-        return [doc.to_dict() for doc in resp.documents]
+        results, _ = _search_page(
+            query=query,
+            source_type=source_type,
+            sort_by=sort_by,
+            document_type=document_type,
+            write_up_types=write_up_types,
+            list_type=list_type,
+            page_size=page_size,
+            discussions_order_by=discussions_order_by,
+        )
     except Exception as e:
         logger.warning("Search API failed: %s", e)
         return []
+    return results
+
+
+# Newest-first page size used when walking a feed back to a time cutoff.
+_RECENT_PAGE_SIZE = 50
+_RECENT_MAX_DOCS = 500
+# Feeds remembered at once (least recently polled dropped first), so a
+# long-running server holds at most _MAX_FEEDS * _RECENT_MAX_DOCS documents.
+_MAX_FEEDS = 32
+_EPOCH = datetime.min.replace(tzinfo=timezone.utc)
+
+
+@dataclass
+class _Feed:
+    """Documents already seen for one discussions_list feed, newest first."""
+
+    docs: list[dict]
+    newest: datetime
+    # Every document of the feed newer than this is in docs.
+    covered_from: datetime
+
+
+_feeds: OrderedDict[tuple[str, str, str], _Feed] = OrderedDict()
+_feeds_lock = threading.Lock()
+
+
+def _timestamp(d: dict, time_key: str) -> datetime | None:
+    ts = d.get(time_key) or d.get("createTime", "")
+    if not ts:
+        return None
+    try:
+        return datetime.fromisoformat(ts.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def _recent_discussions(
+    query: str,
+    source_type: str,
+    new_only: bool,
+    cutoff: datetime,
+    limit: int,
+) -> list[dict]:
+    """Documents of a feed newer than cutoff, newest first, at most limit of them.
+
+    Pages are fetched newest first and paging stops at the first document older
+    than the cutoff. When an earlier poll of the same feed already covers the
+    window, paging also stops at the newest document that poll saw, and the
+    rest of the answer comes from its remembered documents.
+    """
+    time_key = "createTime" if new_only else "updateTime"
+    feed_key = (source_type, query, time_key)
+    with _feeds_lock:
+        known = _feeds.get(feed_key)
+        if known is not None:
+            _feeds.move_to_end(feed_key)
+    if known is not None and known.covered_from > cutoff:
+        known = None
+
+    next_token = ""
+
+    def fetch(token: str) -> tuple[list[dict], str]:
+        # Search errors propagate: an empty page here would read as the end of
+        # the feed and be remembered as covering all of it.
+        nonlocal next_token
+        docs, next_token = _search_page(
+            query=query,
+            source_type=source_type,
+            sort_by="created" if new_only else "",
+            discussions_order_by="" if new_only else "SEARCH_DISCUSSIONS_ORDER_BY_LAST_TOPIC_COMMENT_DATE",
+            page_size=_RECENT_PAGE_SIZE,
+            page_token=token,
+        )
+        return docs, next_token
+
+    fresh: list[tuple[datetime, dict]] = []
+    seen: set = set()
+    stopped = "end"
+    for page in pagination.iter_token_pages(fetch):
+        for d in page:
+            dt = _timestamp(d, time_key)
+            if dt is None or d.get("id") in seen:
+                continue
+            if dt < cutoff:
+                stopped = "cutoff"
+            elif known is not None and dt <= known.newest:
+                stopped = "known"
+            else:
+                fresh.append((dt, d))
+                seen.add(d.get("id"))
+                if len(fresh) >= limit:
+                    stopped = "limit"
+            if stopped != "end":
+                break
+        if stopped != "end":
+            break
+
+    if stopped == "known":
+        carried = [(_timestamp(d, time_key), d) for d in known.docs if d.get("id") not in seen]
+        entries = fresh + [(dt, d) for dt, d in carried if dt is not None]
+        covered_from = known.covered_from
+    elif stopped == "limit":
+        entries, covered_from = fresh, fresh[-1][0]
+    elif stopped == "cutoff":
+        entries, covered_from = fresh, cutoff
+    elif next_token:
+        # The walk hit the page cap with more pages left: only what was seen is covered.
+        entries = fresh
+        covered_from = min(dt for dt, _ in fresh) if fresh else datetime.now(timezone.utc)
+    else:
+        entries, covered_from = fresh, _EPOCH
+    entries.sort(key=lambda e: e[0], reverse=True)
+    if len(entries) > _RECENT_MAX_DOCS:
+        entries = entries[:_RECENT_MAX_DOCS]
+        covered_from = entries[-1][0]
+
+    newest = entries[0][0] if entries else max(cutoff, known.newest if known else cutoff)
+    with _feeds_lock:
+        _feeds[feed_key] = _Feed([d for _, d in entries], newest, covered_from)
+        _feeds.move_to_end(feed_key)
+        while len(_feeds) > _MAX_FEEDS:
+            _feeds.popitem(last=False)
+    return [d for dt, d in entries if dt >= cutoff][:limit]
 
 
 def register(mcp: FastMCP) -> None:
@@ -187,12 +356,13 @@ def register(mcp: FastMCP) -> None:
             competition: Competition slug to filter.
             dataset: Dataset ref to filter.
             page_size: Number of results (max 50).
-            since_hours: If > 0, only return discussions within the last N hours.
-                         Fetches up to 100 results and filters client-side.
+            since_hours: If > 0, only return discussions within the last N hours,
+                         newest first. Pages are fetched until the cutoff is passed;
+                         repeat polls only fetch what is newer than the last one.
             new_only: If True, filter by createTime (newly posted threads only).
                       If False (default), filter by updateTime (includes threads with new replies).
         """
-        from datetime import datetime, timezone, timedelta
+        from datetime import timedelta
 
         try:
             source = ""
@@ -204,36 +374,11 @@ def register(mcp: FastMCP) -> None:
                 source = "dataset"
                 query = dataset
 
-            fetch_size = max(page_size, 100) if since_hours > 0 else page_size
-            if since_hours > 0:
-                order_by = "" if new_only else "SEARCH_DISCUSSIONS_ORDER_BY_LAST_TOPIC_COMMENT_DATE"
-                sort_by = "created" if new_only else ""
-            else:
-                order_by = ""
-                sort_by = ""
-
-            results = _search_via_sdk(
-                query=query,
-                source_type=source,
-                page_size=fetch_size,
-                discussions_order_by=order_by,
-                sort_by=sort_by,
-            )
-
             if since_hours > 0:
                 cutoff = datetime.now(timezone.utc) - timedelta(hours=since_hours)
-                time_key = "createTime" if new_only else "updateTime"
-                filtered = []
-                for d in results:
-                    ts = d.get(time_key) or d.get("createTime", "")
-                    if ts:
-                        try:
-                            dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
-                            if dt >= cutoff:
-                                filtered.append(d)
-                        except ValueError:
-                            pass
-                results = filtered[:page_size]
+                results = _recent_discussions(query, source, new_only, cutoff, page_size)
+            else:
+                results = _search_via_sdk(query=query, source_type=source, page_size=page_size)
 
             if not results:
                 label = "新发布" if new_only else "活跃"
@@ -251,39 +396,42 @@ def register(mcp: FastMCP) -> None:
             discussion_id: Numeric discussion ID.
             competition: Competition slug to narrow the search (recommended for accuracy).
         """
-        def _find_in_results(results: list) -> str | None:
-            for d in results:
-                if d.get("id") == discussion_id:
-                    doc = d.get("discussionDocument", {})
-                    author = d.get("ownerUser", {}).get("displayName", "Unknown")
-                    votes = d.get("votes", 0)
-                    body = doc.get("messageMarkdown") or doc.get("messageStripped", "")
-                    forum = doc.get("forumName", "")
-                    title = d.get("title", f"Discussion {discussion_id}")
-                    header = f"# {title}\n\n**Author:** {author} | **Votes:** {votes}"
-                    if forum:
-                        header += f" | **Forum:** {forum}"
-                    return f"{header}\n\n{body}" if body else header
-            return None
+        def _format(d: dict) -> str:
+            doc = d.get("discussionDocument", {})
+            author = d.get("ownerUser", {}).get("displayName", "Unknown")
+            votes = d.get("votes", 0)
+            body = doc.get("messageMarkdown") or doc.get("messageStripped", "")
+            forum = doc.get("forumName", "")
+            title = d.get("title", f"Discussion {discussion_id}")
+            header = f"# {title}\n\n**Author:** {author} | **Votes:** {votes}"
+            if forum:
+                header += f" | **Forum:** {forum}"
+            return f"{header}\n\n{body}" if body else header
 
         try:
-            # Strategy 1: search within competition context (most reliable)
-            if competition:
-                results = _search_via_sdk(
-                    query=competition,
-                    source_type="competition",
-                    page_size=50,
-                )
-                found = _find_in_results(results)
-                if found:
-                    return found
-
-            # Strategy 2: broader search across all source types
-            for source in ["competition", "dataset", "kernel", ""]:
-                results = _search_via_sdk(query=competition or "", source_type=source, page_size=50)
-                found = _find_in_results(results)
-                if found:
-                    return found
+            # Any search that has returned this discussion before has indexed it.
+            index = discussion_index.get_index()
+            if index is not None:
+                doc = index.get(discussion_id)
+                if doc is not None:
+                    return _format(doc)
+
+            # Search every source type at once; the competition context goes first
+            # because it is the most reliable.
+            sources = ["competition", "dataset", "kernel", ""]
+            searches = executor.map_threads(
+                lambda source: _search_via_sdk(
+                    query=competition or "", source_type=source, page_size=50
+                ),
+                sources,
+                len(sources),
+            )
+            for results in searches:
+                if isinstance(results, Exception):
+                    continue
+                for d in results:
+                    if d.get("id") == discussion_id:
+                        return _format(d)
 
             return (
                 f"Discussion {discussion_id} not found via search. "
@@ -293,6 +441,56 @@ def register(mcp: FastMCP) -> None:
         except Exception as e:
             return f"Error fetching discussion {discussion_id}: {e}"
 
+    @mcp.tool()
+    def discussions_local_search(
+        query: str,
+        source_type: str = "",
+        document_type: str = "",
+        sort_by: str = "relevance",
+        page_size: int = 20,
+    ) -> str:
+        """Search discussions and comments already fetched by other tools, offline.
+
+        Every document returned by a discussion tool is kept in a local full-text
+        index; this searches it without calling the Kaggle API. Run
+        discussions_solutions or discussions_search first to fill it.
+
+        Args:
+            query: Words to search for in title, message, author and source type.
+            source_type: Optional filter: competition, dataset, kernel, site_forum,
+                competition_solution, model, write_up, learn_track, benchmark, benchmark_task.
+            document_type: Optional filter: topic or comment.
+            sort_by: Sort order: relevance or votes.
+            page_size: Number of results.
+        """
+        try:
+            if source_type and source_type not in _SOURCE_MAP:
+                valid = ", ".join(_SOURCE_MAP.keys())
+                return f"Invalid source_type '{source_type}'. Valid values: {valid}"
+            index = discussion_index.get_index()
+            if index is None:
+                return "Local discussion index is disabled (KAGGLE_MCP_DISCUSSION_INDEX=0)."
+            results = index.search(
+                query,
+                source=source_type,
+                document_type=document_type,
+                sort_by=sort_by,
+                limit=page_size,
+            )
+            if not results:
+                return (
+                    f"No indexed discussions match '{query}' "
+                    f"({index.count()} documents indexed)."
+                )
+            lines = [f"## Local results for: {query}\n"]
+            for d, snippet in results:
+                lines.append(_fmt_doc(d))
+                if snippet:
+                    lines.append(f"  > {' '.join(snippet.split())}")
+            return "\n".join(lines)
+        except Exception as e:
+            return f"Error searching local discussion index: {e}"
+
     @mcp.tool()
     def discussion_comments(discussion_id: int, page_size: int = 20) -> str:
         """Get comments for a discussion.
@@ -0,0 +1,278 @@
+"""Persistent SQLite cache for read-only Kaggle SDK responses.
+
+The cache sits under the tool layer, around ``KaggleHttpClient.call``. Entries
+stay fresh for a per-RPC window; after that they are still served instantly
+(stale-while-revalidate) while a background refresh fetches a new copy.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from . import executor, tracing
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = Path.home() / ".cache" / "kaggle-mcp" / "responses.sqlite3"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_STALE = 7 * 24 * 3600
+
+# Seconds a stored response counts as fresh, per (service, RPC). Other RPCs are not cached.
+FRESH_FOR: dict[tuple[str, str], float] = {
+    ("competitions.CompetitionApiService", "GetCompetition"): 3600,
+    ("competitions.CompetitionApiService", "ListDataFiles"): 3600,
+    ("competitions.CompetitionApiService", "GetCompetitionDataFilesSummary"): 3600,
+    ("datasets.DatasetApiService", "GetDataset"): 1800,
+    ("datasets.DatasetApiService", "GetDatasetMetadata"): 1800,
+    ("datasets.DatasetApiService", "ListDatasetFiles"): 1800,
+    ("datasets.DatasetApiService", "GetDatasetFilesSummary"): 1800,
+    ("models.ModelApiService", "GetModel"): 1800,
+    ("models.ModelApiService", "GetModelInstance"): 1800,
+    ("models.ModelApiService", "ListModelInstances"): 1800,
+    ("models.ModelApiService", "ListModelInstanceVersions"): 600,
+    ("benchmarks.BenchmarksApiService", "GetBenchmarkLeaderboard"): 600,
+}
+
+# Request fields that identify the entity a call reads or writes. Write RPCs drop
+# every cached response of the same service with the same scope.
+_SCOPE_FIELDS = ("competition_name", "owner_slug", "dataset_slug", "model_slug", "benchmark_slug")
+_READ_PREFIXES = ("Get", "List", "Download")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    service TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    body TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at);
+CREATE INDEX IF NOT EXISTS responses_scope ON responses (service, scope);
+"""
+
+
+class DiskCache:
+    """SQLite response store with a size cap and least-recently-used eviction."""
+
+    def __init__(
+        self,
+        path: str | Path,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_stale: float = DEFAULT_MAX_STALE,
+    ):
+        self.path = Path(path).expanduser()
+        self.max_bytes = max_bytes
+        self.max_stale = max_stale
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._refreshing: set[str] = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> tuple[str, float] | None:
+        """Return (body, fetched_at) for a key and mark it recently used."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, fetched_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                self._conn.execute(
+                    "UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key)
+                )
+        return row
+
+    def put(self, key: str, service: str, scope: str, body: str) -> None:
+        """Store a response body and evict least recently used rows above max_bytes."""
+        size = len(body.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, service, scope, body, size, now, now),
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        (total,) = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        freed = 0
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+
+    def count(self, counter: str) -> None:
+        """Increment one of the hits/stale_hits/misses counters."""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def begin_refresh(self, key: str) -> bool:
+        """Claim a background refresh for key; False if one is already running."""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def end_refresh(self, key: str) -> None:
+        """Release a refresh claimed with begin_refresh."""
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def invalidate(self, service: str, scope: str) -> None:
+        """Drop every cached response of a service for the given scope."""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM responses WHERE service = ? AND scope = ?", (service, scope)
+            )
+
+    def clear(self) -> None:
+        """Drop every stored response."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def stats(self) -> dict[str, Any]:
+        """Row count, stored bytes and hit/miss counters."""
+        with self._lock:
+            rows, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {
+            "path": str(self.path),
+            "entries": rows,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+        }
+
+
+_cache: DiskCache | None = None
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = os.getenv(name, "")
+    try:
+        return float(raw)
+    except ValueError:
+        if raw:
+            logger.warning("Ignoring invalid %s=%r", name, raw)
+        return default
+
+
+def configure(path: str | Path | None) -> DiskCache | None:
+    """Enable the disk cache at path, or disable it when path is None."""
+    global _cache
+    if path is None:
+        _cache = None
+        return None
+    _cache = DiskCache(
+        path,
+        max_bytes=int(_env_float("KAGGLE_MCP_DISK_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+        max_stale=_env_float("KAGGLE_MCP_DISK_CACHE_MAX_STALE", DEFAULT_MAX_STALE),
+    )
+    return _cache
+
+
+def configure_from_env() -> DiskCache | None:
+    """Enable the disk cache if KAGGLE_MCP_DISK_CACHE is set.
+
+    A value of ``1``/``true`` uses the default location; anything else is a path.
+    """
+    raw = os.getenv("KAGGLE_MCP_DISK_CACHE", "").strip()
+    if not raw or raw.lower() in ("0", "false", "no"):
+        return None
+    if raw.lower() in ("1", "true", "yes"):
+        return configure(DEFAULT_PATH)
+    return configure(raw)
+
+
+def get_cache() -> DiskCache | None:
+    """Get the active disk cache, or None when disabled."""
+    return _cache
+
+
+def _scope(request: Any) -> str:
+    return "/".join(str(getattr(request, f, None) or "") for f in _SCOPE_FIELDS)
+
+
+def _key(service: str, request_name: str, request: Any) -> str:
+    raw = f"{service}/{request_name}:{request.to_json()}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _annotate(result: str) -> None:
+    span = tracing.current()
+    if span is not None:
+        span.set(disk_cache=result)
+
+
+def wrap(call: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap ``KaggleHttpClient.call`` so read-only RPCs go through the disk cache."""
+    def refresh(cache: DiskCache, key: str, service: str, request_name: str, request, response_type):
+        try:
+            resp = call(service, request_name, request, response_type)
+            cache.put(key, service, _scope(request), resp.to_json())
+        except Exception as e:
+            logger.warning("Background refresh of %s/%s failed: %s", service, request_name, e)
+        finally:
+            cache.end_refresh(key)
+
+    def cached_call(service: str, request_name: str, request, response_type):
+        cache = _cache
+        if cache is None:
+            return call(service, request_name, request, response_type)
+
+        fresh_for = FRESH_FOR.get((service, request_name))
+        if fresh_for is None:
+            resp = call(service, request_name, request, response_type)
+            if not request_name.startswith(_READ_PREFIXES):
+                cache.invalidate(service, _scope(request))
+            return resp
+
+        key = _key(service, request_name, request)
+        row = cache.get(key)
+        if row is not None:
+            body, fetched_at = row
+            age = time.time() - fetched_at
+            if age < fresh_for:
+                cache.count("hits")
+                _annotate("hit")
+                return response_type.from_json(body)
+            if age < cache.max_stale:
+                cache.count("stale_hits")
+                _annotate("stale_hit")
+                if cache.begin_refresh(key):
+                    executor.get_executor().submit(
+                        refresh, cache, key, service, request_name, request, response_type
+                    )
+                return response_type.from_json(body)
+
+        cache.count("misses")
+        _annotate("miss")
+        resp = call(service, request_name, request, response_type)
+        cache.put(key, service, _scope(request), resp.to_json())
+        return resp
+
+    return cached_call
@@ -0,0 +1,258 @@
+"""Parallel, resumable HTTP Range downloader for Kaggle signed URLs."""
+
+import base64
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONNECTIONS = 8
+SEGMENT_SIZE = 16 * 1024 * 1024
+_READ_SIZE = 1024 * 1024
+_RETRIES = 3
+
+_CONTENT_RANGE = re.compile(r"bytes \d+-\d+/(\d+)")
+_DISPOSITION_NAME = re.compile(r"filename\*?=(?:UTF-8'')?\"?([^\";]+)\"?", re.IGNORECASE)
+_GOOG_MD5 = re.compile(r"(?:^|,)\s*md5=([A-Za-z0-9+/=]+)")
+
+
+@dataclass
+class DownloadResult:
+    """Outcome of a download: where it landed and how fast it went."""
+
+    path: Path
+    size: int
+    seconds: float
+    resumed_bytes: int = 0
+    skipped: bool = False
+
+    @property
+    def transferred(self) -> int:
+        """Bytes fetched over the network in this run."""
+        return self.size - self.resumed_bytes
+
+    @property
+    def throughput(self) -> float:
+        """Bytes per second transferred in this run (excluding resumed bytes)."""
+        return self.transferred / self.seconds if self.seconds > 0 else 0.0
+
+    def summary(self) -> str:
+        """Markdown summary used by the download tools."""
+        if self.skipped:
+            return f"Already up to date: {self.path} ({self.size} bytes)"
+        line = (
+            f"Downloaded to: {self.path}\n"
+            f"Size: {self.size} bytes in {self.seconds:.1f}s "
+            f"({self.throughput / 1_000_000:.1f} MB/s)"
+        )
+        if self.resumed_bytes:
+            line += f"\nResumed: {self.resumed_bytes} bytes were already on disk"
+        return line
+
+
+def _connections_from_env() -> int:
+    raw = os.getenv("KAGGLE_MCP_DOWNLOAD_CONNECTIONS", "")
+    try:
+        return max(1, int(raw))
+    except ValueError:
+        return DEFAULT_CONNECTIONS
+
+
+def _file_name(response: httpx.Response, url: str, default: str) -> str:
+    m = _DISPOSITION_NAME.search(response.headers.get("content-disposition", ""))
+    if m:
+        return os.path.basename(unquote(m.group(1)))
+    if default:
+        return default
+    return os.path.basename(unquote(urlparse(url).path)) or "download"
+
+
+def _remote_md5(response: httpx.Response) -> str | None:
+    """Hex MD5 of the whole object from x-goog-hash or Content-MD5, if sent.
+
+    Content-MD5 describes the body only, so it is used only for a full (200)
+    response, never for a ranged one.
+    """
+    m = _GOOG_MD5.search(response.headers.get("x-goog-hash", ""))
+    raw = m.group(1) if m else response.headers.get("content-md5") if response.status_code == 200 else None
+    if not raw:
+        return None
+    try:
+        return base64.b64decode(raw).hex()
+    except ValueError:
+        return None
+
+
+def _md5(path: Path) -> str:
+    h = hashlib.md5()
+    with open(path, "rb") as f:
+        while block := f.read(_READ_SIZE):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _probe(client: httpx.Client, url: str) -> tuple[int | None, bool, httpx.Response]:
+    """Request the first byte to learn the total size and whether ranges are honoured."""
+    with client.stream("GET", url, headers={"Range": "bytes=0-0"}) as r:
+        r.raise_for_status()
+        if r.status_code == 206:
+            m = _CONTENT_RANGE.match(r.headers.get("content-range", ""))
+            return (int(m.group(1)) if m else None), m is not None, r
+        length = r.headers.get("content-length")
+        return (int(length) if length else None), False, r
+
+
+class _Progress:
+    """Sidecar file recording which segments of a .part file are complete."""
+
+    def __init__(self, path: Path, total: int, segment: int):
+        self.path = path
+        self.total = total
+        self.segment = segment
+        self.done: set[int] = set()
+        self._lock = threading.Lock()
+        try:
+            state = json.loads(path.read_text())
+            if state.get("total") == total and state.get("segment") == segment:
+                self.done = set(state.get("done", []))
+        except (OSError, ValueError):
+            pass
+
+    def mark(self, index: int) -> None:
+        with self._lock:
+            self.done.add(index)
+            self.path.write_text(
+                json.dumps({"total": self.total, "segment": self.segment, "done": sorted(self.done)})
+            )
+
+
+def _fetch_segment(client: httpx.Client, url: str, part: Path, start: int, end: int) -> None:
+    last_error: Exception | None = None
+    for attempt in range(_RETRIES):
+        try:
+            with client.stream("GET", url, headers={"Range": f"bytes={start}-{end}"}) as r:
+                r.raise_for_status()
+                if r.status_code != 206:
+                    raise httpx.HTTPError(f"server ignored Range header (HTTP {r.status_code})")
+                with open(part, "r+b") as f:
+                    f.seek(start)
+                    written = 0
+                    for chunk in r.iter_bytes(_READ_SIZE):
+                        f.write(chunk)
+                        written += len(chunk)
+            if written != end - start + 1:
+                raise httpx.HTTPError(f"short read: got {written} of {end - start + 1} bytes")
+            return
+        except httpx.HTTPError as e:
+            last_error = e
+            time.sleep(0.5 * 2**attempt)
+    raise last_error  # type: ignore[misc]
+
+
+def _download_single(client: httpx.Client, url: str, part: Path) -> int:
+    with client.stream("GET", url) as r:
+        r.raise_for_status()
+        with open(part, "wb") as f:
+            for chunk in r.iter_bytes(_READ_SIZE):
+                f.write(chunk)
+    return part.stat().st_size
+
+
+def download(
+    url: str,
+    dest_dir: str | Path,
+    file_name: str = "",
+    expected_size: int | None = None,
+    connections: int = 0,
+) -> DownloadResult:
+    """Download url into dest_dir using concurrent Range requests.
+
+    Interrupted downloads leave ``<name>.part`` and ``<name>.part.json`` behind
+    and pick up from the completed segments on the next call. The finished file
+    is checked against expected_size (e.g. ``total_bytes`` from a file listing)
+    when the server delivers the file under the requested name, and against the
+    MD5 the storage server reports, if any.
+
+    An existing file of the right size is kept (``skipped``) unless the server
+    reports an MD5 that differs from it.
+
+    Raises:
+        httpx.HTTPError: On network or HTTP failures.
+        ValueError: If the final size or checksum does not match.
+    """
+    connections = connections or _connections_from_env()
+    dest_dir = Path(dest_dir).expanduser()
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    started = time.monotonic()
+
+    timeout = httpx.Timeout(30.0, read=120.0)
+    with httpx.Client(follow_redirects=True, timeout=timeout) as client:
+        total, ranged, probe = _probe(client, url)
+        md5 = _remote_md5(probe)
+        name = _file_name(probe, url, file_name)
+        target = dest_dir / name
+        part = dest_dir / f"{name}.part"
+        sidecar = dest_dir / f"{name}.part.json"
+        if expected_size is not None and file_name and name != file_name:
+            logger.info("Server renamed %s to %s; skipping listed-size check", file_name, name)
+            expected_size = None
+
+        if (
+            target.exists()
+            and total is not None
+            and target.stat().st_size == total
+            and (md5 is None or _md5(target) == md5)
+        ):
+            return DownloadResult(
+                target, total, time.monotonic() - started, resumed_bytes=total, skipped=True
+            )
+
+        resumed = 0
+        if not ranged or not total:
+            size = _download_single(client, url, part)
+        else:
+            progress = _Progress(sidecar, total, SEGMENT_SIZE)
+            if not part.exists() or part.stat().st_size != total:
+                progress.done.clear()
+                with open(part, "wb") as f:
+                    f.truncate(total)
+            segments = [
+                (i, start, min(start + SEGMENT_SIZE, total) - 1)
+                for i, start in enumerate(range(0, total, SEGMENT_SIZE))
+            ]
+            resumed = sum(end - start + 1 for i, start, end in segments if i in progress.done)
+            pending = [s for s in segments if s[0] not in progress.done]
+
+            def fetch(segment: tuple[int, int, int]) -> None:
+                index, start, end = segment
+                _fetch_segment(client, url, part, start, end)
+                progress.mark(index)
+
+            with ThreadPoolExecutor(max_workers=min(connections, max(1, len(pending)))) as pool:
+                for _ in pool.map(fetch, pending):
+                    pass
+            size = part.stat().st_size
+
+    if total is not None and size != total:
+        raise ValueError(f"Size mismatch for {name}: got {size} bytes, server reported {total}")
+    if expected_size is not None and size != expected_size:
+        raise ValueError(f"Size mismatch for {name}: got {size} bytes, listing reports {expected_size}")
+    if md5 is not None and _md5(part) != md5:
+        # Every segment is marked complete, so resuming could never repair it.
+        part.unlink(missing_ok=True)
+        sidecar.unlink(missing_ok=True)
+        raise ValueError(f"Checksum mismatch for {name}: MD5 differs from the server's")
+    part.replace(target)
+    sidecar.unlink(missing_ok=True)
+    return DownloadResult(target, size, time.monotonic() - started, resumed_bytes=resumed)
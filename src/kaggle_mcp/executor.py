@@ -0,0 +1,117 @@
+"""Bounded worker pool for running blocking Kaggle SDK calls off the event loop."""
+
+import asyncio
+import contextvars
+import functools
+import inspect
+import logging
+import os
+import threading
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 8
+
+_executor: ThreadPoolExecutor | None = None
+_lock = threading.Lock()
+
+
+def _max_workers_from_env() -> int:
+    """Read the pool size from KAGGLE_MCP_MAX_WORKERS, falling back to the default."""
+    raw = os.getenv("KAGGLE_MCP_MAX_WORKERS", "")
+    try:
+        value = int(raw)
+    except ValueError:
+        if raw:
+            logger.warning("Ignoring invalid KAGGLE_MCP_MAX_WORKERS=%r", raw)
+        return DEFAULT_MAX_WORKERS
+    return max(1, value)
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Get the shared tool worker pool (lazy init)."""
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=_max_workers_from_env(),
+                    thread_name_prefix="kaggle-mcp",
+                )
+    return _executor
+
+
+def configure(max_workers: int) -> None:
+    """Replace the shared pool with one of the given size.
+
+    Calls already running on the previous pool are allowed to finish.
+    """
+    global _executor
+    with _lock:
+        old, _executor = _executor, ThreadPoolExecutor(
+            max_workers=max(1, max_workers),
+            thread_name_prefix="kaggle-mcp",
+        )
+    if old is not None:
+        old.shutdown(wait=False)
+
+
+async def run_sync(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking callable on the shared pool and await its result.
+
+    The caller's context variables are copied into the worker thread.
+    """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, fn, *args, **kwargs)
+    return await loop.run_in_executor(get_executor(), call)
+
+
+def offload(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Turn a synchronous tool into an async one that runs on the shared pool.
+
+    Coroutine functions are returned unchanged. The wrapper keeps the original
+    name, docstring and signature so FastMCP builds the same tool schema.
+    """
+    if inspect.iscoroutinefunction(fn):
+        return fn
+
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        return await run_sync(fn, *args, **kwargs)
+
+    return wrapper
+
+
+def map_threads(
+    fn: Callable[[Any], Any],
+    items: Iterable[Any],
+    max_workers: int,
+) -> list[Any]:
+    """Apply fn to every item concurrently and return results in input order.
+
+    Used for fan-out inside a tool that is already running on the shared pool;
+    the work gets its own short-lived threads so a saturated pool cannot deadlock
+    on itself. An item whose call raised yields the exception object instead of a
+    result. Context variables are propagated to each thread.
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    def call(item: Any) -> Any:
+        try:
+            return fn(item)
+        except Exception as e:
+            return e
+
+    ctx = contextvars.copy_context()
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(max_workers, len(items))),
+        thread_name_prefix="kaggle-mcp-fanout",
+    ) as pool:
+        futures = [pool.submit(ctx.copy().run, call, item) for item in items]
+        return [f.result() for f in futures]
@@ -0,0 +1,117 @@
+"""In-process registry of kernel sessions started or seen by this server.
+
+kernel_session_create, kernel_session_status and kernel_push record the
+kernels they touch here, together with the session ID whenever the API
+response reveals it. kernel_session_cancel can then cancel in a single call,
+and every session this server started can be listed or cancelled at once.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any
+from urllib.parse import urlparse
+
+_SESSION_ID_KEYS = ("kernelSessionId", "kernel_session_id")
+
+
+@dataclass
+class KernelSession:
+    """What the server knows about the latest session of one kernel."""
+
+    ref: str
+    session_id: int | None = None
+    origin: str = ""
+    status: str = ""
+    version: int | None = None
+    started_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+
+def normalize_ref(ref: str) -> str:
+    """``owner/slug`` from a kernel ref, URL or URL path such as ``/code/Owner/slug``.
+
+    Kaggle slugs are case-insensitive, so the result is lower-cased; every
+    per-kernel store keys kernels by it.
+    """
+    if "://" in ref:
+        ref = urlparse(ref).path
+    parts = [p for p in ref.strip("/").lower().split("/") if p]
+    if len(parts) == 3 and parts[0] == "code":
+        parts = parts[1:]
+    return "/".join(parts)
+
+
+def session_id_from(payload: Any) -> int | None:
+    """Extract a kernel session ID from an API response, if it carries one.
+
+    Looks at a ``kernel_session_id`` attribute and at the ``response``/``metadata``
+    dicts of a long-running Operation (where a session resource's own ``id``
+    also counts). Operation names are not used: they identify the operation.
+    """
+    value = getattr(payload, "kernel_session_id", None)
+    if isinstance(value, int) and value > 0:
+        return value
+    for part, keys in (("response", _SESSION_ID_KEYS + ("id",)), ("metadata", _SESSION_ID_KEYS)):
+        data = getattr(payload, part, None)
+        if isinstance(data, dict):
+            for key in keys:
+                value = data.get(key)
+                if isinstance(value, int) and value > 0:
+                    return value
+                if isinstance(value, str) and value.isdigit():
+                    return int(value)
+    return None
+
+
+class SessionRegistry:
+    """Thread-safe map of kernel ref to its latest KernelSession."""
+
+    def __init__(self):
+        self._sessions: dict[str, KernelSession] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        ref: str,
+        origin: str = "",
+        session_id: int | None = None,
+        status: str = "",
+        version: int | None = None,
+    ) -> KernelSession:
+        """Create or update the entry of a kernel.
+
+        A new origin (create or push) means a new run, so the previously known
+        session ID and status are dropped unless new ones are given.
+        """
+        ref = normalize_ref(ref)
+        now = time.time()
+        with self._lock:
+            entry = self._sessions.get(ref)
+            if entry is None or origin in ("create", "push"):
+                entry = KernelSession(ref, origin=origin or "status")
+                self._sessions[ref] = entry
+            if session_id:
+                entry.session_id = session_id
+            if status:
+                entry.status = status
+            if version is not None:
+                entry.version = version
+            entry.updated_at = now
+            return entry
+
+    def get(self, ref: str) -> KernelSession | None:
+        """The entry of a kernel, or None."""
+        with self._lock:
+            return self._sessions.get(normalize_ref(ref))
+
+    def list(self, origins: tuple[str, ...] = ()) -> list[KernelSession]:
+        """All entries, most recently started first, optionally filtered by origin."""
+        with self._lock:
+            entries = list(self._sessions.values())
+        if origins:
+            entries = [e for e in entries if e.origin in origins]
+        return sorted(entries, key=lambda e: e.started_at, reverse=True)
+
+
+registry = SessionRegistry()
@@ -0,0 +1,258 @@
+"""Versioned local store of kernel sources fetched by kernel_pull.
+
+Each pulled version is kept as ``<owner>/<slug>/v<N>.json`` under SOURCE_DIR
+(both parts lower-cased and restricted to Kaggle's slug characters),
+next to a ``latest.json`` pointer recording the newest version and when it was
+last confirmed. Within FRESH_FOR seconds of that confirmation the stored copy
+is used as is; after that a metadata-only listing call compares version numbers
+before the full source is downloaded again. A cell index of each version
+(``v<N>.cells.json`` and ``v<N>.cells.txt``) is built the first time it is read.
+"""
+
+import difflib
+import json
+import logging
+import os
+import re
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from . import kernel_sessions, notebook_cells
+from .client import get_client
+
+logger = logging.getLogger(__name__)
+
+SOURCE_DIR = Path.home() / ".cache" / "kaggle-mcp" / "kernels"
+FRESH_FOR = 600
+MAX_VERSIONS = 10
+_SLUG_PART = re.compile(r"[a-z0-9][a-z0-9_.-]*")
+
+
+@dataclass
+class KernelSource:
+    """One stored version of a kernel."""
+
+    ref: str
+    version: int
+    metadata: dict
+    source: str
+    fetched_at: float
+
+
+class SourceStore:
+    """JSON files of kernel versions, at most MAX_VERSIONS per kernel."""
+
+    def __init__(self, root: Path = SOURCE_DIR):
+        self.root = root
+
+    def _dir(self, ref: str) -> Path:
+        """Directory of a kernel; refs differing only in case or format share one.
+
+        Raises:
+            ValueError: If ref is not ``owner/slug`` made of slug characters.
+        """
+        parts = kernel_sessions.normalize_ref(ref).split("/")
+        if len(parts) != 2 or not all(_SLUG_PART.fullmatch(p) for p in parts):
+            raise ValueError(f"invalid kernel reference {ref!r}")
+        return self.root / parts[0] / parts[1]
+
+    def _read(self, path: Path) -> dict | None:
+        try:
+            return json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, path: Path, data: dict) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(data))
+        tmp.replace(path)
+
+    def latest(self, ref: str) -> tuple[int, float] | None:
+        """(newest stored version, time it was last confirmed current), or None."""
+        data = self._read(self._dir(ref) / "latest.json")
+        if not data:
+            return None
+        return data["version"], data["checked_at"]
+
+    def confirm(self, ref: str, version: int, checked_at: float | None = None) -> None:
+        """Record that version is the kernel's current one as of checked_at (default now)."""
+        stamp = time.time() if checked_at is None else checked_at
+        self._write(self._dir(ref) / "latest.json", {"version": version, "checked_at": stamp})
+
+    def expire(self, ref: str) -> None:
+        """Force the next pull of ref to check for a newer version.
+
+        Refs that do not name a kernel are ignored: nothing can be stored under them.
+        """
+        try:
+            latest = self.latest(ref)
+        except ValueError as e:
+            logger.debug("Not expiring kernel source: %s", e)
+            return
+        if latest is not None:
+            self.confirm(ref, latest[0], checked_at=0.0)
+
+    def versions(self, ref: str) -> list[int]:
+        """Stored version numbers, oldest first."""
+        d = self._dir(ref)
+        if not d.is_dir():
+            return []
+        found = []
+        for p in d.glob("v*.json"):
+            if p.name.endswith(".cells.json"):
+                continue
+            try:
+                found.append(int(p.stem[1:]))
+            except ValueError:
+                continue
+        return sorted(found)
+
+    def load(self, ref: str, version: int) -> KernelSource | None:
+        """A stored version, or None."""
+        data = self._read(self._dir(ref) / f"v{version}.json")
+        return KernelSource(**data) if data else None
+
+    def save(self, source: KernelSource) -> None:
+        """Store a version, mark it current and drop the oldest beyond MAX_VERSIONS.
+
+        Version 0 holds sources without a version number; it is overwritten by
+        every pull and never treated as current.
+        """
+        d = self._dir(source.ref)
+        self._write(d / f"v{source.version}.json", asdict(source))
+        for name in (f"v{source.version}.cells.json", f"v{source.version}.cells.txt"):
+            (d / name).unlink(missing_ok=True)
+        self.confirm(source.ref, source.version)
+        for old in self.versions(source.ref)[:-MAX_VERSIONS]:
+            for name in (f"v{old}.json", f"v{old}.cells.json", f"v{old}.cells.txt"):
+                (d / name).unlink(missing_ok=True)
+
+    def cell_index(self, ref: str, version: int) -> tuple[list[notebook_cells.Cell], Path] | None:
+        """Cell index of a stored version and the path of its blob, or None if not stored.
+
+        The index is built from the stored source on first use and reused after.
+        """
+        d = self._dir(ref)
+        index_path = d / f"v{version}.cells.json"
+        blob_path = d / f"v{version}.cells.txt"
+        cells = notebook_cells.load(index_path) if blob_path.exists() else None
+        if cells is None:
+            source = self.load(ref, version)
+            if source is None:
+                return None
+            cells, blob = notebook_cells.build(source.source)
+            notebook_cells.save(cells, blob, index_path, blob_path)
+        return cells, blob_path
+
+
+store = SourceStore()
+
+
+def _current_version(user_name: str, kernel_slug: str) -> int | None:
+    """Current version number from the kernel listing, without fetching the source."""
+    from kagglesdk.kernels.services.kernels_api_service import ApiListKernelsRequest
+
+    req = ApiListKernelsRequest()
+    req.user = user_name
+    req.search = kernel_slug.replace("-", " ")
+    req.page_size = 50
+    ref = f"{user_name}/{kernel_slug}".lower()
+    for k in get_client().kernels.kernels_api_client.list_kernels(req).kernels or []:
+        if (k.ref or "").strip("/").lower() == ref:
+            return k.current_version_number or None
+    return None
+
+
+def _fetch(user_name: str, kernel_slug: str) -> KernelSource:
+    from kagglesdk.kernels.services.kernels_api_service import ApiGetKernelRequest
+
+    req = ApiGetKernelRequest()
+    req.user_name = user_name
+    req.kernel_slug = kernel_slug
+    resp = get_client().kernels.kernels_api_client.get_kernel(req)
+    meta = resp.metadata.to_dict() if resp.metadata else {}
+    source = resp.blob.source if resp.blob else "(no source)"
+    version = resp.metadata.current_version_number if resp.metadata else 0
+    return KernelSource(f"{user_name}/{kernel_slug}", version or 0, meta, source, time.time())
+
+
+def _stored_current(user_name: str, kernel_slug: str) -> int | None:
+    """Newest stored version if it is still the kernel's current one, else None."""
+    ref = f"{user_name}/{kernel_slug}"
+    latest = store.latest(ref)
+    if latest is None or latest[0] <= 0:
+        return None
+    version, checked_at = latest
+    if version not in store.versions(ref):
+        return None
+    if time.time() - checked_at < FRESH_FOR:
+        return version
+    try:
+        current = _current_version(user_name, kernel_slug)
+    except Exception as e:
+        logger.warning("Version check for %s failed: %s", ref, e)
+        return None
+    if current != version:
+        return None
+    store.confirm(ref, version)
+    return version
+
+
+def pull(user_name: str, kernel_slug: str, refresh: bool = False) -> tuple[KernelSource, str]:
+    """Latest source of a kernel and where it came from ("cached" or "fetched").
+
+    Args:
+        user_name: Kernel owner username.
+        kernel_slug: Kernel slug name.
+        refresh: Skip the local store and download the source again.
+    """
+    version = None if refresh else _stored_current(user_name, kernel_slug)
+    if version is not None:
+        cached = store.load(f"{user_name}/{kernel_slug}", version)
+        if cached is not None:
+            return cached, "cached"
+
+    fetched = _fetch(user_name, kernel_slug)
+    store.save(fetched)
+    return fetched, "fetched"
+
+
+def current_version(user_name: str, kernel_slug: str, refresh: bool = False) -> int:
+    """Number of the current version in the store, pulling the source only if needed."""
+    version = None if refresh else _stored_current(user_name, kernel_slug)
+    if version is not None:
+        return version
+    return pull(user_name, kernel_slug, refresh=True)[0].version
+
+
+def _diffable_lines(source: str) -> list[str]:
+    """Notebook JSON rendered as cell sources without outputs; other sources as is."""
+    try:
+        nb = json.loads(source)
+    except ValueError:
+        return source.splitlines(keepends=True)
+    if not isinstance(nb, dict) or not isinstance(nb.get("cells"), list):
+        return source.splitlines(keepends=True)
+    lines = []
+    for i, cell in enumerate(nb["cells"]):
+        text = cell.get("source", "")
+        if isinstance(text, list):
+            text = "".join(text)
+        lines.append(f"# %% [{cell.get('cell_type', 'code')}] cell {i}\n")
+        lines.extend(line if line.endswith("\n") else line + "\n" for line in text.splitlines())
+    return lines
+
+
+def diff(ref: str, old: KernelSource, new: KernelSource, context_lines: int = 3) -> str:
+    """Unified diff between two stored versions of a kernel."""
+    return "".join(
+        difflib.unified_diff(
+            _diffable_lines(old.source),
+            _diffable_lines(new.source),
+            fromfile=f"{ref}@v{old.version}",
+            tofile=f"{ref}@v{new.version}",
+            n=context_lines,
+        )
+    )
@@ -1,9 +1,112 @@
 """Kernel/Notebook tools for Kaggle MCP Server."""
 
-from mcp.server.fastmcp import FastMCP
-
+import asyncio
+import fnmatch
+import math
+import re
+import time
+from pathlib import Path, PurePosixPath
+
+from mcp.server.fastmcp import Context, FastMCP
+
+from . import (
+    cache,
+    downloads,
+    executor,
+    kernel_sessions,
+    kernel_sources,
+    notebook_cells,
+    pagination,
+)
 from .client import get_client
 
+# Session states after which a kernel run will not change any more.
+_FINISHED_STATES = ("COMPLETE", "ERROR", "CANCEL_ACKNOWLEDGED")
+# wait_for_kernel_session polls every 2s at first, backing off to once a minute.
+_POLL_INITIAL = 2.0
+_POLL_MAX = 60.0
+_POLL_GROWTH = 1.5
+
+# competition_top_kernels fetches pages of this size concurrently and keeps the
+# ranked rows per (competition, sort) for a short while.
+_TOP_KERNELS_PAGE_SIZE = 20
+_TOP_KERNELS_TTL = 120
+# Scores authors put in titles, e.g. '[44/50]', '[0.371]', '(score: 0.88)', 'LB:0.95'.
+_SCORE_BRACKETED = re.compile(r"\[(\d+/\d+|\d+\.\d+)\]")
+_SCORE_LABELLED = re.compile(r"(?:LB|score)[:\s]+(\d+\.\d+)", re.IGNORECASE)
+
+
+def _extract_score(title: str) -> str:
+    m = _SCORE_BRACKETED.search(title) or _SCORE_LABELLED.search(title)
+    return m.group(1) if m else ""
+
+
+def _session_status(user_name: str, kernel_slug: str):
+    """Fetch the ApiGetKernelSessionStatusResponse of a kernel's latest session."""
+    from kagglesdk.kernels.types.kernels_api_service import (
+        ApiGetKernelSessionStatusRequest,
+    )
+
+    req = ApiGetKernelSessionStatusRequest()
+    req.user_name = user_name
+    req.kernel_slug = kernel_slug
+    resp = get_client().kernels.kernels_api_client.get_kernel_session_status(req)
+    kernel_sessions.registry.record(
+        f"{user_name}/{kernel_slug}",
+        session_id=kernel_sessions.session_id_from(resp),
+        status=_status_name(resp),
+    )
+    return resp
+
+
+def _status_name(resp) -> str:
+    return getattr(resp.status, "name", str(resp.status))
+
+
+def _cancel_session(ref: str, session_id: int | None) -> str:
+    """Send the cancel request; returns the API error message, or "" on success."""
+    from kagglesdk.kernels.types.kernels_api_service import (
+        ApiCancelKernelSessionRequest,
+    )
+
+    req = ApiCancelKernelSessionRequest()
+    if session_id:
+        req.kernel_session_id = session_id
+    resp = get_client().kernels.kernels_api_client.cancel_kernel_session(req)
+    err = getattr(resp, "error_message", None)
+    if not err:
+        kernel_sessions.registry.record(ref, status="CANCEL_REQUESTED")
+    return err or ""
+
+
+def _session_output_files(user_name: str, kernel_slug: str) -> list:
+    """List the output files of a kernel's latest session, following every page."""
+    from kagglesdk.kernels.types.kernels_api_service import (
+        ApiListKernelSessionOutputRequest,
+    )
+
+    def fetch(page_token: str) -> tuple[list, str]:
+        req = ApiListKernelSessionOutputRequest()
+        req.user_name = user_name
+        req.kernel_slug = kernel_slug
+        if page_token:
+            req.page_token = page_token
+        resp = get_client().kernels.kernels_api_client.list_kernel_session_output(req)
+        return resp.files or [], resp.next_page_token
+
+    return [f for page in pagination.iter_token_pages(fetch) for f in page]
+
+
+def _format_output_files(user_name: str, kernel_slug: str, files: list) -> str:
+    if not files:
+        return "No output files found."
+    lines = [f"**Output files** for `{user_name}/{kernel_slug}`:"]
+    for f in files:
+        name = getattr(f, "file_name", None) or getattr(f, "name", "unknown")
+        url = getattr(f, "url", "N/A")
+        lines.append(f"- `{name}` — {url}")
+    return "\n".join(lines)
+
 
 def register(mcp: FastMCP) -> None:
     """Register kernel tools."""
@@ -15,6 +118,7 @@ def register(mcp: FastMCP) -> None:
         dataset: str = "",
         sort_by: str = "",
         page: int = 1,
+        max_results: int = 0,
     ) -> str:
         """Search and list Kaggle notebooks/kernels.
 
@@ -24,6 +128,8 @@ def register(mcp: FastMCP) -> None:
             dataset: Filter by dataset.
             sort_by: Sort order (hotness, commentCount, dateCreated, dateRun, relevance, voteCount).
             page: Page number.
+            max_results: If > 0, walk pages starting at `page` (prefetching ahead
+                concurrently) and return up to this many unique kernels.
         """
         from kagglesdk.kernels.services.kernels_api_service import (
             ApiListKernelsRequest,
@@ -40,22 +146,27 @@ def register(mcp: FastMCP) -> None:
             "voteCount": KernelsListSortType.VOTE_COUNT,
         }
 
-        req = ApiListKernelsRequest()
-        if search:
-            req.search = search
-        if competition:
-            req.competition = competition
-        if dataset:
-            req.dataset = dataset
-        if sort_by and sort_by in _sort_map:
-            req.sort_by = _sort_map[sort_by]
-        req.page = page
+        def fetch(p: int) -> list:
+            req = ApiListKernelsRequest()
+            if search:
+                req.search = search
+            if competition:
+                req.competition = competition
+            if dataset:
+                req.dataset = dataset
+            if sort_by and sort_by in _sort_map:
+                req.sort_by = _sort_map[sort_by]
+            req.page = p
+            return get_client().kernels.kernels_api_client.list_kernels(req).kernels or []
 
         try:
-            resp = get_client().kernels.kernels_api_client.list_kernels(req)
+            if max_results > 0:
+                pages = pagination.iter_numbered_pages(fetch, page, prefetch=pagination.prefetch_for(max_results))
+                kernels = pagination.collect(pages, max_results, key=lambda k: k.ref)
+            else:
+                kernels = fetch(page)
         except Exception as e:
             return f"Error listing kernels: {e}"
-        kernels = resp.kernels
         if not kernels:
             return "No kernels found."
         lines = []
@@ -67,24 +178,148 @@ def register(mcp: FastMCP) -> None:
         return "\n".join(lines)
 
     @mcp.tool()
-    def kernel_pull(user_name: str, kernel_slug: str) -> str:
+    def kernel_pull(
+        user_name: str,
+        kernel_slug: str,
+        version: int = 0,
+        refresh: bool = False,
+    ) -> str:
         """Get a notebook's source code.
 
+        Pulled versions are stored locally; a recent copy is returned without
+        downloading the source again unless the kernel has a newer version.
+
         Args:
             user_name: Kernel owner username.
             kernel_slug: Kernel slug name.
+            version: Return this previously pulled version from the local store.
+            refresh: Download the latest source even if a stored copy is current.
         """
-        from kagglesdk.kernels.services.kernels_api_service import (
-            ApiGetKernelRequest,
-        )
+        if version:
+            src = kernel_sources.store.load(f"{user_name}/{kernel_slug}", version)
+            if src is None:
+                stored = kernel_sources.store.versions(f"{user_name}/{kernel_slug}")
+                return f"Version {version} is not stored locally. Stored versions: {stored or 'none'}"
+        else:
+            src, _ = kernel_sources.pull(user_name, kernel_slug, refresh=refresh)
+        return f"Metadata: {src.metadata}\n\nSource:\n{src.source}"
 
-        req = ApiGetKernelRequest()
-        req.user_name = user_name
-        req.kernel_slug = kernel_slug
-        resp = get_client().kernels.kernels_api_client.get_kernel(req)
-        meta = resp.metadata.to_dict() if resp.metadata else {}
-        source = resp.blob.source if resp.blob else "(no source)"
-        return f"Metadata: {meta}\n\nSource:\n{source}"
+    @mcp.tool()
+    def kernel_cells(
+        user_name: str,
+        kernel_slug: str,
+        cells: str = "",
+        cell_type: str = "",
+        include_outputs: bool = False,
+        version: int = 0,
+    ) -> str:
+        """Read selected cells of a notebook instead of its whole source.
+
+        With no cells or cell_type given, returns the cell index (type, line
+        count and size of every cell) so the relevant cells can be picked.
+        Outputs are left out unless include_outputs is set.
+
+        Args:
+            user_name: Kernel owner username.
+            kernel_slug: Kernel slug name.
+            cells: Cell numbers and ranges, e.g. '0,3,5-8'; negative numbers count
+                from the end ('-3--1' is the last three cells).
+            cell_type: Only cells of this type: code, markdown or raw.
+            include_outputs: Append each code cell's text outputs (streams, results, errors).
+            version: A previously pulled version (default: the current one).
+        """
+        ref = f"{user_name}/{kernel_slug}"
+        try:
+            version = version or kernel_sources.current_version(user_name, kernel_slug)
+            indexed = kernel_sources.store.cell_index(ref, version)
+            if indexed is None:
+                stored = kernel_sources.store.versions(ref)
+                return f"Version {version} is not stored locally. Stored versions: {stored or 'none'}"
+            index, blob_path = indexed
+
+            if not cells and not cell_type:
+                counts: dict[str, int] = {}
+                for c in index:
+                    counts[c.cell_type] = counts.get(c.cell_type, 0) + 1
+                summary = ", ".join(f"{n} {t}" for t, n in sorted(counts.items()))
+                total = sum(c.length for c in index)
+                lines = [f"**`{ref}` v{version}** — {len(index)} cells ({summary}), {total} bytes of source"]
+                for c in index:
+                    outputs = f", {c.outputs} outputs" if c.outputs else ""
+                    lines.append(f"- [{c.index}] {c.cell_type}, {c.lines} lines, {c.length} bytes{outputs}")
+                return "\n".join(lines)
+
+            selected = index
+            if cells:
+                selected = [index[i] for i in notebook_cells.parse_selection(cells, len(index))]
+            if cell_type:
+                selected = [c for c in selected if c.cell_type == cell_type]
+            if not selected:
+                return f"No {cell_type or ''} cells selected in `{ref}` v{version}."
+            texts = notebook_cells.read(blob_path, selected)
+            nb_cells: list[dict] = []
+            if include_outputs and any(c.outputs for c in selected):
+                nb_cells = notebook_cells.parse_cells(kernel_sources.store.load(ref, version).source)
+
+            parts = [f"**`{ref}` v{version}** — {len(selected)} of {len(index)} cells"]
+            for c, text in zip(selected, texts):
+                body = text.rstrip() if c.cell_type == "markdown" else f"```\n{text.rstrip()}\n```"
+                parts.append(f"### Cell {c.index} [{c.cell_type}]\n{body}")
+                if include_outputs and c.outputs:
+                    out = notebook_cells.outputs_text(nb_cells, c.index)
+                    if out:
+                        parts.append(f"Output:\n```\n{out.rstrip()}\n```")
+            return "\n\n".join(parts)
+        except Exception as e:
+            return f"Error reading notebook cells: {e}"
+
+    @mcp.tool()
+    def kernel_diff(
+        user_name: str,
+        kernel_slug: str,
+        from_version: int = 0,
+        to_version: int = 0,
+        context_lines: int = 3,
+    ) -> str:
+        """Show a unified diff between two locally stored versions of a notebook.
+
+        Notebooks are compared cell by cell without outputs. With no versions
+        given, the latest version is pulled (if it changed) and compared with
+        the previous stored one.
+
+        Args:
+            user_name: Kernel owner username.
+            kernel_slug: Kernel slug name.
+            from_version: Older version number (default: the one before to_version).
+            to_version: Newer version number (default: the latest).
+            context_lines: Unchanged lines shown around each change.
+        """
+        ref = f"{user_name}/{kernel_slug}"
+        try:
+            if not to_version:
+                to_version = kernel_sources.pull(user_name, kernel_slug)[0].version
+            stored = kernel_sources.store.versions(ref)
+            if not from_version:
+                older = [v for v in stored if v < to_version]
+                if not older:
+                    return (
+                        f"Only one version of `{ref}` is stored ({stored or 'none'}); "
+                        f"pull it again after it changes to compare."
+                    )
+                from_version = older[-1]
+            old = kernel_sources.store.load(ref, from_version)
+            new = kernel_sources.store.load(ref, to_version)
+            missing = [v for v, src in ((from_version, old), (to_version, new)) if src is None]
+            if missing:
+                return f"Version(s) {missing} of `{ref}` are not stored locally. Stored versions: {stored}"
+            text = kernel_sources.diff(ref, old, new, context_lines)
+            if not text:
+                return f"No source changes between v{from_version} and v{to_version} of `{ref}`."
+            if not text.endswith("\n"):
+                text += "\n"
+            return f"**Diff** `{ref}` v{from_version} → v{to_version}:\n```diff\n{text}```"
+        except Exception as e:
+            return f"Error diffing kernel versions: {e}"
 
     @mcp.tool()
     def kernel_push(
@@ -114,15 +349,20 @@ def register(mcp: FastMCP) -> None:
         req.kernel_type = kernel_type
         req.is_private = is_private
         resp = get_client().kernels.kernels_api_client.save_kernel(req)
+        if resp.ref and not resp.error:
+            kernel_sessions.registry.record(resp.ref, origin="push", version=resp.version_number)
+            kernel_sources.store.expire(resp.ref)
         return str(resp.to_dict())
 
     @mcp.tool()
-    def kernel_output(user_name: str, kernel_slug: str) -> str:
+    def kernel_output(user_name: str, kernel_slug: str, local_dir: str = "") -> str:
         """Download competition data files. Returns download URL.
 
         Args:
             user_name: Kernel owner username.
             kernel_slug: Kernel slug name.
+            local_dir: If set, download the output archive into this directory with
+                parallel ranged requests and return the local path and throughput.
         """
         from kagglesdk.kernels.types.kernels_api_service import (
             ApiDownloadKernelOutputRequest,
@@ -134,6 +374,8 @@ def register(mcp: FastMCP) -> None:
             req.kernel_slug = kernel_slug
             resp = get_client().kernels.kernels_api_client.download_kernel_output(req)
             url = getattr(resp, "url", None) or str(resp)
+            if local_dir:
+                return downloads.download(url, local_dir, f"{kernel_slug}-output.zip").summary()
             return f"Download URL: {url}"
         except Exception as e:
             return f"Error downloading kernel output: {e}"
@@ -154,6 +396,9 @@ def register(mcp: FastMCP) -> None:
             req = ApiCreateKernelSessionRequest()
             req.slug = f"{user_name}/{kernel_slug}"
             resp = get_client().kernels.kernels_api_client.create_kernel_session(req)
+            kernel_sessions.registry.record(
+                req.slug, origin="create", session_id=kernel_sessions.session_id_from(resp)
+            )
             return str(resp.to_dict())
         except Exception as e:
             return f"Error creating kernel session: {e}"
@@ -166,16 +411,9 @@ def register(mcp: FastMCP) -> None:
             user_name: Kernel owner username.
             kernel_slug: Kernel slug name.
         """
-        from kagglesdk.kernels.types.kernels_api_service import (
-            ApiGetKernelSessionStatusRequest,
-        )
-
         try:
-            req = ApiGetKernelSessionStatusRequest()
-            req.user_name = user_name
-            req.kernel_slug = kernel_slug
-            resp = get_client().kernels.kernels_api_client.get_kernel_session_status(req)
-            status = getattr(resp.status, "name", str(resp.status))
+            resp = _session_status(user_name, kernel_slug)
+            status = _status_name(resp)
             failure = resp.failure_message
             lines = [f"**Status**: {status}"]
             if failure:
@@ -192,26 +430,139 @@ def register(mcp: FastMCP) -> None:
             user_name: Kernel owner username.
             kernel_slug: Kernel slug name.
         """
-        from kagglesdk.kernels.types.kernels_api_service import (
-            ApiListKernelSessionOutputRequest,
-        )
+        try:
+            files = _session_output_files(user_name, kernel_slug)
+            return _format_output_files(user_name, kernel_slug, files)
+        except Exception as e:
+            return f"Error listing session output: {e}"
+
+    @mcp.tool()
+    def kernel_session_download_outputs(
+        user_name: str,
+        kernel_slug: str,
+        local_dir: str,
+        pattern: str = "",
+        max_parallel: int = 4,
+    ) -> str:
+        """Download a kernel session's output files into a local directory, in parallel.
+
+        Files already present with the same size (and the same MD5, when the
+        storage server reports one) are skipped.
 
+        Args:
+            user_name: Kernel owner username.
+            kernel_slug: Kernel slug name.
+            local_dir: Directory to download into; output subdirectories are kept.
+            pattern: Optional glob on the output file name (e.g. '*.csv', 'checkpoints/*').
+            max_parallel: Maximum number of files downloaded concurrently.
+        """
         try:
-            req = ApiListKernelSessionOutputRequest()
-            req.user_name = user_name
-            req.kernel_slug = kernel_slug
-            resp = get_client().kernels.kernels_api_client.list_kernel_session_output(req)
-            files = resp.files or []
-            if not files:
-                return "No output files found."
-            lines = [f"**Output files** for `{user_name}/{kernel_slug}`:"]
+            files = _session_output_files(user_name, kernel_slug)
+            wanted = []
             for f in files:
-                name = getattr(f, "file_name", None) or getattr(f, "name", "unknown")
-                url = getattr(f, "url", "N/A")
-                lines.append(f"- `{name}` — {url}")
+                name = f.file_name or PurePosixPath(f.url).name
+                if pattern and not fnmatch.fnmatch(name, pattern):
+                    continue
+                rel = PurePosixPath(name)
+                if rel.is_absolute() or ".." in rel.parts:
+                    return f"Error downloading session outputs: unsafe output path '{name}'"
+                wanted.append((name, f.url))
+            if not wanted:
+                suffix = f" matching '{pattern}'" if pattern else ""
+                return f"No output files{suffix} for `{user_name}/{kernel_slug}`."
+
+            root = Path(local_dir).expanduser()
+
+            def fetch(item: tuple[str, str]) -> downloads.DownloadResult:
+                name, url = item
+                rel = PurePosixPath(name)
+                return downloads.download(url, root.joinpath(*rel.parent.parts), rel.name)
+
+            started = time.monotonic()
+            results = executor.map_threads(fetch, wanted, max_parallel)
+            elapsed = time.monotonic() - started
+
+            fetched = skipped = failed = 0
+            transferred = 0
+            lines = []
+            for (name, _), r in zip(wanted, results):
+                if isinstance(r, Exception):
+                    failed += 1
+                    lines.append(f"- `{name}` — error: {r}")
+                elif r.skipped:
+                    skipped += 1
+                    lines.append(f"- `{name}` — unchanged, skipped ({r.size} bytes)")
+                else:
+                    fetched += 1
+                    transferred += r.transferred
+                    lines.append(f"- `{name}` — {r.size} bytes")
+            rate = transferred / elapsed if elapsed > 0 else 0.0
+            header = (
+                f"**Session outputs** of `{user_name}/{kernel_slug}` → {root}\n"
+                f"Downloaded: {fetched} | Skipped: {skipped} | Failed: {failed} | "
+                f"{transferred} bytes in {elapsed:.1f}s ({rate / 1_000_000:.1f} MB/s)\n"
+            )
+            return header + "\n".join(lines)
+        except Exception as e:
+            return f"Error downloading session outputs: {e}"
+
+    @mcp.tool()
+    async def wait_for_kernel_session(
+        user_name: str,
+        kernel_slug: str,
+        ctx: Context,
+        timeout_seconds: int = 1800,
+    ) -> str:
+        """Wait for a kernel session to finish, polling inside the server.
+
+        Polls every 2s at first and backs off to once a minute for long runs,
+        sending progress notifications along the way. Returns the final status
+        and the session's output files, or the current status if the deadline
+        passes first.
+
+        Args:
+            user_name: Kernel owner username.
+            kernel_slug: Kernel slug name.
+            timeout_seconds: Maximum time to wait (default 1800).
+        """
+        started = time.monotonic()
+        deadline = started + max(0, timeout_seconds)
+        delay = _POLL_INITIAL
+        polls = 0
+        last_status = ""
+        try:
+            while True:
+                resp = await executor.run_sync(_session_status, user_name, kernel_slug)
+                polls += 1
+                status = _status_name(resp)
+                elapsed = time.monotonic() - started
+                if status != last_status:
+                    # A state change (e.g. QUEUED -> RUNNING) starts the fast phase again.
+                    delay = _POLL_INITIAL
+                    last_status = status
+                await ctx.report_progress(
+                    min(elapsed, timeout_seconds), timeout_seconds, f"{status} after {elapsed:.0f}s"
+                )
+                remaining = deadline - time.monotonic()
+                if status in _FINISHED_STATES or remaining <= 0:
+                    break
+                await asyncio.sleep(min(delay, remaining))
+                delay = min(_POLL_MAX, delay * _POLL_GROWTH)
+
+            lines = [f"**Status**: {status} (after {elapsed:.0f}s, {polls} polls)"]
+            if resp.failure_message:
+                lines.append(f"**Failure message**: {resp.failure_message}")
+            if status not in _FINISHED_STATES:
+                lines.append(f"**Timed out** after {timeout_seconds}s; the session is still {status}.")
+                return "\n".join(lines)
+            try:
+                files = await executor.run_sync(_session_output_files, user_name, kernel_slug)
+                lines.append("\n" + _format_output_files(user_name, kernel_slug, files))
+            except Exception as e:
+                lines.append(f"\nError listing session output: {e}")
             return "\n".join(lines)
         except Exception as e:
-            return f"Error listing session output: {e}"
+            return f"Error waiting for kernel session: {e}"
 
     @mcp.tool()
     def kernel_session_cancel(user_name: str, kernel_slug: str) -> str:
@@ -221,31 +572,83 @@ def register(mcp: FastMCP) -> None:
             user_name: Kernel owner username.
             kernel_slug: Kernel slug name.
         """
-        from kagglesdk.kernels.types.kernels_api_service import (
-            ApiCancelKernelSessionRequest,
-        )
-
+        ref = f"{user_name}/{kernel_slug}"
         try:
-            req = ApiCancelKernelSessionRequest()
-            # Cancel requires kernel_session_id; fetch status first to resolve it
-            from kagglesdk.kernels.types.kernels_api_service import (
-                ApiGetKernelSessionStatusRequest,
-            )
-            status_req = ApiGetKernelSessionStatusRequest()
-            status_req.user_name = user_name
-            status_req.kernel_slug = kernel_slug
-            status_resp = get_client().kernels.kernels_api_client.get_kernel_session_status(status_req)
-            session_id = getattr(status_resp, "kernel_session_id", None)
-            if session_id:
-                req.kernel_session_id = session_id
-            resp = get_client().kernels.kernels_api_client.cancel_kernel_session(req)
-            err = getattr(resp, "error_message", None)
+            # Known sessions are cancelled in one call; otherwise resolve the
+            # kernel_session_id from the status endpoint first.
+            known = kernel_sessions.registry.get(ref)
+            session_id = known.session_id if known else None
+            if not session_id:
+                status_resp = _session_status(user_name, kernel_slug)
+                session_id = kernel_sessions.session_id_from(status_resp)
+            err = _cancel_session(ref, session_id)
             if err:
                 return f"Cancel failed: {err}"
             return "Session cancelled."
         except Exception as e:
             return f"Error cancelling session: {e}"
 
+    @mcp.tool()
+    def kernel_sessions_list(include_seen: bool = False) -> str:
+        """List kernel sessions started by this server (create and push).
+
+        Shows the session ID when known and the last status the server saw.
+
+        Args:
+            include_seen: Also list kernels whose status was only checked here.
+        """
+        origins = () if include_seen else ("create", "push")
+        entries = kernel_sessions.registry.list(origins)
+        if not entries:
+            return "No kernel sessions recorded by this server."
+        now = time.time()
+        lines = [f"**Kernel sessions** ({len(entries)}):"]
+        for e in entries:
+            sid = f"session {e.session_id}" if e.session_id else "session ID unknown"
+            version = f" v{e.version}" if e.version is not None else ""
+            status = e.status or "status not checked"
+            age = int(now - e.started_at)
+            lines.append(f"- `{e.ref}`{version} — {e.origin}, {sid}, {status} ({age}s ago)")
+        return "\n".join(lines)
+
+    @mcp.tool()
+    def kernel_sessions_cancel_all(max_parallel: int = 8) -> str:
+        """Cancel every unfinished kernel session started by this server.
+
+        Sessions whose ID is not known yet are checked first and, like in
+        kernel_session_cancel, cancelled without an ID if the status does not
+        reveal it; sessions already finished or being cancelled are skipped.
+
+        Args:
+            max_parallel: Maximum number of sessions handled concurrently.
+        """
+        entries = [
+            e for e in kernel_sessions.registry.list(("create", "push"))
+            if e.status not in _FINISHED_STATES + ("CANCEL_REQUESTED",)
+        ]
+        if not entries:
+            return "No unfinished kernel sessions started by this server."
+
+        def cancel(entry: kernel_sessions.KernelSession) -> str:
+            session_id = entry.session_id
+            if not session_id:
+                user_name, kernel_slug = entry.ref.split("/", 1)
+                resp = _session_status(user_name, kernel_slug)
+                status = _status_name(resp)
+                if status in _FINISHED_STATES:
+                    return f"already {status}"
+                session_id = kernel_sessions.session_id_from(resp)
+            err = _cancel_session(entry.ref, session_id)
+            return f"failed: {err}" if err else "cancelled"
+
+        results = executor.map_threads(cancel, entries, max_parallel)
+        lines = [f"**Cancel all** ({len(entries)} sessions):"]
+        for entry, result in zip(entries, results):
+            if isinstance(result, Exception):
+                result = f"error: {result}"
+            lines.append(f"- `{entry.ref}` — {result}")
+        return "\n".join(lines)
+
     @mcp.tool()
     def competition_top_kernels(competition: str, sort_by: str = "scoreDescending", page_size: int = 20) -> str:
         """List top public kernels/notebooks for a competition, sorted by public score.
@@ -260,7 +663,6 @@ def register(mcp: FastMCP) -> None:
                      voteCount, hotness, dateCreated, dateRun, commentCount.
             page_size: Number of results (max 100).
         """
-        import re
         from kagglesdk.kernels.services.kernels_api_service import ApiListKernelsRequest
         from kagglesdk.kernels.types.kernels_api_service import KernelsListSortType
 
@@ -273,35 +675,31 @@ def register(mcp: FastMCP) -> None:
             "dateRun": KernelsListSortType.DATE_RUN,
             "commentCount": KernelsListSortType.COMMENT_COUNT,
         }
+        sort = _sort_map.get(sort_by, KernelsListSortType.SCORE_DESCENDING)
 
-        def _extract_score(title: str) -> str:
-            # Match patterns like [44/50], [0.371], (score: 0.88), LB:0.95
-            m = re.search(r'\[(\d+/\d+|\d+\.\d+)\]', title)
-            if m:
-                return m.group(1)
-            m = re.search(r'(?:LB|score)[:\s]+(\d+\.\d+)', title, re.IGNORECASE)
-            if m:
-                return m.group(1)
-            return ""
-
-        try:
+        def fetch(p: int) -> list:
             req = ApiListKernelsRequest()
             req.competition = competition
-            req.sort_by = _sort_map.get(sort_by, KernelsListSortType.SCORE_DESCENDING)
-            req.page = 1
-
-            resp = get_client().kernels.kernels_api_client.list_kernels(req)
-            kernels = resp.kernels or []
-            if not kernels:
-                return f"No public kernels found for '{competition}'."
-
-            lines = [f"**Top public kernels for `{competition}`** (sorted by {sort_by}):"]
-            lines.append("*Score extracted from title where available; API does not return score values for active competitions.*\n")
-            for i, k in enumerate(kernels[:page_size], 1):
+            req.sort_by = sort
+            req.page = p
+            req.page_size = _TOP_KERNELS_PAGE_SIZE
+            return get_client().kernels.kernels_api_client.list_kernels(req).kernels or []
+
+        def ranked_rows() -> list[tuple[str, str, str, str]]:
+            """(ref, title, votes, score) rows, from the cache when it holds enough."""
+            hit, table = cache.lookup("competition_top_kernels", competition=competition, sort=sort.name)
+            if hit:
+                rows, complete = table
+                if complete or len(rows) >= page_size:
+                    return rows
+            pages_needed = math.ceil(page_size / _TOP_KERNELS_PAGE_SIZE)
+            pages = pagination.iter_numbered_pages(fetch, prefetch=pages_needed, max_pages=pages_needed)
+            kernels = pagination.collect(pages, page_size, key=lambda k: k.ref)
+            rows = []
+            for k in kernels:
                 kd = k.to_dict() if hasattr(k, "to_dict") else {}
                 ref = kd.get("ref", "")
                 title = kd.get("title", ref)
-                votes = kd.get("totalVotes", "N/A")
                 api_score = kd.get("bestPublicScore")
                 extracted = _extract_score(title)
                 if api_score is not None:
@@ -310,6 +708,23 @@ def register(mcp: FastMCP) -> None:
                     score_str = f" | Score: {extracted} (from title)"
                 else:
                     score_str = ""
+                rows.append((ref, title, str(kd.get("totalVotes", "N/A")), score_str))
+            complete = len(rows) < page_size
+            cache.store(
+                "competition_top_kernels", (rows, complete), _TOP_KERNELS_TTL,
+                competition=competition, sort=sort.name,
+            )
+            return rows
+
+        try:
+            page_size = max(1, min(page_size, 100))
+            rows = ranked_rows()
+            if not rows:
+                return f"No public kernels found for '{competition}'."
+
+            lines = [f"**Top public kernels for `{competition}`** (sorted by {sort_by}):"]
+            lines.append("*Score extracted from title where available; API does not return score values for active competitions.*\n")
+            for i, (ref, title, votes, score_str) in enumerate(rows[:page_size], 1):
                 lines.append(f"{i}. **{title}** (`{ref}`)\n   Votes: {votes}{score_str}")
             return "\n".join(lines)
         except Exception as e:
@@ -0,0 +1,77 @@
+"""Local hash manifests for delta-only dataset version publishing.
+
+A manifest remembers, per dataset file name, the size, mtime, SHA-256 and the
+upload token of the last published copy. Files whose size and mtime are
+unchanged are not re-hashed; files whose hash is unchanged can reuse their token
+instead of being uploaded again.
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from . import executor
+
+MANIFEST_DIR = Path.home() / ".cache" / "kaggle-mcp" / "manifests"
+_READ_SIZE = 1024 * 1024
+
+
+@dataclass
+class FileState:
+    """What the manifest knows about one dataset file."""
+
+    size: int
+    mtime_ns: int
+    sha256: str
+    token: str = ""
+
+
+def hash_file(path: Path) -> str:
+    """SHA-256 of a file, read in 1 MiB blocks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(_READ_SIZE):
+            h.update(block)
+    return h.hexdigest()
+
+
+class Manifest:
+    """Hash manifest of one dataset, persisted as JSON under MANIFEST_DIR."""
+
+    def __init__(self, owner: str, dataset_slug: str):
+        self.path = MANIFEST_DIR / f"{owner}__{dataset_slug}.json"
+        try:
+            raw = json.loads(self.path.read_text())
+            self.files = {name: FileState(**state) for name, state in raw.items()}
+        except (OSError, ValueError, TypeError):
+            self.files = {}
+
+    def scan(self, paths: list[Path], max_workers: int) -> dict[str, FileState]:
+        """Current state of each local file, hashing only those whose size or mtime moved.
+
+        Tokens are carried over from the manifest when the hash is unchanged.
+        """
+        stats = {p.name: os.stat(p) for p in paths}
+
+        def state(path: Path) -> FileState:
+            st = stats[path.name]
+            known = self.files.get(path.name)
+            if known and known.size == st.st_size and known.mtime_ns == st.st_mtime_ns:
+                return known
+            digest = hash_file(path)
+            token = known.token if known and known.sha256 == digest else ""
+            return FileState(st.st_size, st.st_mtime_ns, digest, token)
+
+        results = executor.map_threads(state, paths, max_workers)
+        for r in results:
+            if isinstance(r, Exception):
+                raise r
+        return {p.name: r for p, r in zip(paths, results)}
+
+    def save(self, files: dict[str, FileState]) -> None:
+        """Replace the manifest with the files of the version just published."""
+        self.files = dict(files)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps({n: asdict(s) for n, s in self.files.items()}))
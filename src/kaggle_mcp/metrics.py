@@ -0,0 +1,532 @@
+"""Per-tool and per-RPC metrics: latency histograms, upstream calls, bytes and errors.
+
+Every MCP tool is timed from the moment FastMCP hands it the arguments until
+its result is returned (cache hits included), and every HTTP request kagglesdk
+sends is timed on its own, attributed to the tool that made it. Tools turn
+exceptions into "Error ...: ..." strings; such results are counted as errors
+and classified by the last failed upstream request of the call (``HTTP 404``,
+``ConnectionError``, ...), or as ``unknown`` when no request failed.
+
+The numbers are shown by the ``server_stats`` tool and can be exported in
+OpenMetrics text format on a port (``--metrics-port``) or to a file rewritten
+every few seconds (``--metrics-file``) for Prometheus to scrape.
+"""
+
+import bisect
+import contextvars
+import copy
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from mcp.server.fastmcp import FastMCP
+
+from . import disk_cache, ratelimit, singleflight
+
+if TYPE_CHECKING:
+    import requests
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds of the latency histogram buckets (plus +Inf).
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+FILE_INTERVAL = 15.0
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram in the Prometheus layout."""
+
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """(le label, cumulative count) for every bucket, ending with +Inf."""
+        out, total = [], 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            total += n
+            out.append(("+Inf" if bound == float("inf") else f"{bound:g}", total))
+        return out
+
+    def quantile(self, q: float) -> float:
+        """Estimate of the q-quantile, interpolated within its bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+
+@dataclass
+class ToolStats:
+    latency: Histogram = field(default_factory=Histogram)
+    errors: Counter = field(default_factory=Counter)
+    bytes: int = 0
+    upstream: int = 0
+
+
+@dataclass
+class RpcStats:
+    latency: Histogram = field(default_factory=Histogram)
+    errors: Counter = field(default_factory=Counter)
+    bytes: int = 0
+    by_tool: Counter = field(default_factory=Counter)
+
+
+@dataclass
+class _ToolCall:
+    """State of one tool invocation, shared with the threads it runs on."""
+
+    tool: str
+    upstream: int = 0
+    error_class: str = ""
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+_current: contextvars.ContextVar[_ToolCall | None] = contextvars.ContextVar("kaggle_mcp_tool_call", default=None)
+_local = threading.local()
+
+
+class Metrics:
+    """Thread-safe store of tool and RPC statistics."""
+
+    def __init__(self):
+        self.started = time.time()
+        self._tools: dict[str, ToolStats] = {}
+        self._rpcs: dict[tuple[str, str], RpcStats] = {}
+        self._lock = threading.Lock()
+
+    def record_tool(self, tool: str, seconds: float, nbytes: int, upstream: int, error: str = "") -> None:
+        with self._lock:
+            stats = self._tools.setdefault(tool, ToolStats())
+            stats.latency.observe(seconds)
+            stats.bytes += nbytes
+            stats.upstream += upstream
+            if error:
+                stats.errors[error] += 1
+
+    def record_rpc(self, service: str, rpc: str, tool: str, seconds: float, error: str = "") -> None:
+        with self._lock:
+            stats = self._rpcs.setdefault((service, rpc), RpcStats())
+            stats.latency.observe(seconds)
+            stats.by_tool[tool] += 1
+            if error:
+                stats.errors[error] += 1
+
+    def record_rpc_bytes(self, service: str, rpc: str, nbytes: int) -> None:
+        with self._lock:
+            self._rpcs.setdefault((service, rpc), RpcStats()).bytes += nbytes
+
+    def snapshot(self) -> tuple[dict[str, ToolStats], dict[tuple[str, str], RpcStats]]:
+        """Copies of the tool and RPC statistics."""
+        with self._lock:
+            return copy.deepcopy(self._tools), copy.deepcopy(self._rpcs)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._tools.clear()
+            self._rpcs.clear()
+            self.started = time.time()
+
+
+registry = Metrics()
+
+
+def error_class(exc: BaseException) -> str:
+    """Short class of an upstream failure, e.g. ``HTTP 429`` or ``ConnectionError``."""
+    import requests
+
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return f"HTTP {exc.response.status_code}"
+    return type(exc).__name__
+
+
+def _result_size(result: Any) -> int:
+    if isinstance(result, str):
+        return len(result.encode("utf-8"))
+    return len(str(result).encode("utf-8")) if result is not None else 0
+
+
+def instrument(fn: Callable[..., Any], name: str) -> Callable[..., Any]:
+    """Wrap an (async) tool so each call is timed and its outcome recorded."""
+
+    def finish(call: _ToolCall, start: float, result: Any = None, exc: BaseException | None = None) -> None:
+        if exc is not None:
+            error = type(exc).__name__
+        elif isinstance(result, str) and result.startswith("Error"):
+            error = call.error_class or "unknown"
+        else:
+            error = ""
+        registry.record_tool(name, time.perf_counter() - start, _result_size(result), call.upstream, error)
+
+    if inspect.iscoroutinefunction(fn):
+
+        @functools.wraps(fn)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            call = _ToolCall(name)
+            token = _current.set(call)
+            start = time.perf_counter()
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception as e:
+                finish(call, start, exc=e)
+                raise
+            finally:
+                _current.reset(token)
+            finish(call, start, result)
+            return result
+
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        call = _ToolCall(name)
+        token = _current.set(call)
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            finish(call, start, exc=e)
+            raise
+        finally:
+            _current.reset(token)
+        finish(call, start, result)
+        return result
+
+    return wrapper
+
+
+def wrap(call: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap ``KaggleHttpClient.call`` so every HTTP request is timed and counted."""
+    def measured_call(service: str, request_name: str, request, response_type):
+        tool_call = _current.get()
+        tool = tool_call.tool if tool_call is not None else ""
+        if tool_call is not None:
+            with tool_call.lock:
+                tool_call.upstream += 1
+        _local.rpc = (service, request_name)
+        start = time.perf_counter()
+        try:
+            resp = call(service, request_name, request, response_type)
+        except Exception as e:
+            cls = error_class(e)
+            if tool_call is not None:
+                tool_call.error_class = cls
+            registry.record_rpc(service, request_name, tool, time.perf_counter() - start, cls)
+            raise
+        finally:
+            _local.rpc = None
+        registry.record_rpc(service, request_name, tool, time.perf_counter() - start)
+        return resp
+
+    return measured_call
+
+
+def record_response(response: "requests.Response") -> None:
+    """kagglesdk response processor: count the bytes of each JSON response body.
+
+    Streamed download bodies are left alone; reading them here would consume them.
+    """
+    rpc = getattr(_local, "rpc", None)
+    if rpc is None or "application/json" not in response.headers.get("Content-Type", ""):
+        return
+    registry.record_rpc_bytes(*rpc, len(response.content))
+
+
+def _quantiles_ms(h: Histogram) -> str:
+    return " / ".join(f"{h.quantile(q) * 1000:.0f}" for q in (0.5, 0.95, 0.99))
+
+
+def _cache_counts() -> dict[str, dict[str, int]]:
+    from .cache import response_cache
+
+    return response_cache.stats()["tools"]
+
+
+def format_stats() -> str:
+    """Markdown summary of tool, upstream, cache and rate-limit statistics."""
+    tools, rpcs = registry.snapshot()
+    cache_counts = _cache_counts()
+    uptime = int(time.time() - registry.started)
+    calls = sum(s.latency.count for s in tools.values())
+    errors = sum(sum(s.errors.values()) for s in tools.values())
+    upstream = sum(s.latency.count for s in rpcs.values())
+    lines = [
+        f"## Server stats (uptime {uptime // 3600}h {uptime % 3600 // 60}m {uptime % 60}s)",
+        "",
+        f"**Tool calls**: {calls} | **Errors**: {errors} | **Upstream requests**: {upstream}",
+    ]
+    if not tools:
+        lines.append("\nNo tool calls recorded yet.")
+        return "\n".join(lines)
+
+    lines += [
+        "",
+        "### Tools",
+        "| Tool | Calls | Errors | p50 / p95 / p99 ms | Upstream/call | Avg bytes | Cache hit ratio |",
+        "|---|---:|---:|---|---:|---:|---:|",
+    ]
+    for name, s in sorted(tools.items(), key=lambda kv: -kv[1].latency.sum):
+        n = s.latency.count
+        c = cache_counts.get(name)
+        lookups = c["hits"] + c["misses"] if c else 0
+        ratio = f"{c['hits'] / lookups:.0%}" if lookups else "—"
+        lines.append(
+            f"| `{name}` | {n} | {sum(s.errors.values())} | {_quantiles_ms(s.latency)} "
+            f"| {s.upstream / n:.1f} | {s.bytes // n} | {ratio} |"
+        )
+
+    if rpcs:
+        lines += [
+            "",
+            "### Upstream requests",
+            "| RPC | Requests | Errors | p50 / p95 / p99 ms | KB received | Top callers |",
+            "|---|---:|---:|---|---:|---|",
+        ]
+        for (service, rpc), s in sorted(rpcs.items(), key=lambda kv: -kv[1].latency.sum):
+            callers = ", ".join(f"{t or '(none)'} ×{n}" for t, n in s.by_tool.most_common(3))
+            lines.append(
+                f"| `{service.split('.')[0]}/{rpc}` | {s.latency.count} | {sum(s.errors.values())} "
+                f"| {_quantiles_ms(s.latency)} | {s.bytes / 1024:.1f} | {callers} |"
+            )
+
+    error_lines = [
+        f"- `{name}`: " + ", ".join(f"{cls} ×{n}" for cls, n in s.errors.most_common())
+        for name, s in sorted(tools.items())
+        if s.errors
+    ]
+    if error_lines:
+        lines += ["", "### Errors", *error_lines]
+
+    limiter = ratelimit.get_limiter()
+    if limiter is not None:
+        limits = [
+            f"- `{service}`: {b['rate']:.2f}/{b['max_rate']:g} req/s, "
+            f"{b['throttled']} throttled (429), {b['retries']} retries"
+            for service, b in limiter.stats().items()
+        ]
+        if limits:
+            lines += ["", "### Rate limiting", *limits]
+
+    from .client import get_pool
+
+    accounts = get_pool().stats()
+    if len(accounts) > 1:
+        lines += ["", "### Accounts", *(f"- `{a['name']}`: {a['requests']} requests" for a in accounts)]
+    return "\n".join(lines)
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _histogram_lines(name: str, labels: str, h: Histogram) -> list[str]:
+    lines = [f'{name}_bucket{{{labels},le="{le}"}} {n}' for le, n in h.cumulative()]
+    lines.append(f"{name}_count{{{labels}}} {h.count}")
+    lines.append(f"{name}_sum{{{labels}}} {h.sum:.6f}")
+    return lines
+
+
+def render_openmetrics() -> str:
+    """All metrics in OpenMetrics text exposition format."""
+    tools, rpcs = registry.snapshot()
+    out = [
+        "# TYPE kaggle_mcp_tool_duration_seconds histogram",
+        "# UNIT kaggle_mcp_tool_duration_seconds seconds",
+        "# HELP kaggle_mcp_tool_duration_seconds Time to answer a tool call, cache hits included.",
+    ]
+    for name, s in sorted(tools.items()):
+        out += _histogram_lines("kaggle_mcp_tool_duration_seconds", f'tool="{_label(name)}"', s.latency)
+    out += [
+        "# TYPE kaggle_mcp_tool_errors counter",
+        "# HELP kaggle_mcp_tool_errors Tool calls that returned an error, by error class.",
+    ]
+    for name, s in sorted(tools.items()):
+        for cls, n in sorted(s.errors.items()):
+            out.append(f'kaggle_mcp_tool_errors_total{{tool="{_label(name)}",class="{_label(cls)}"}} {n}')
+    out += [
+        "# TYPE kaggle_mcp_tool_response_bytes counter",
+        "# UNIT kaggle_mcp_tool_response_bytes bytes",
+        "# HELP kaggle_mcp_tool_response_bytes Bytes of tool results returned to clients.",
+    ]
+    out += [f'kaggle_mcp_tool_response_bytes_total{{tool="{_label(n)}"}} {s.bytes}' for n, s in sorted(tools.items())]
+    out += [
+        "# TYPE kaggle_mcp_upstream_duration_seconds histogram",
+        "# UNIT kaggle_mcp_upstream_duration_seconds seconds",
+        "# HELP kaggle_mcp_upstream_duration_seconds Time of each HTTP request to the Kaggle API.",
+    ]
+    for (service, rpc), s in sorted(rpcs.items()):
+        labels = f'service="{_label(service)}",rpc="{_label(rpc)}"'
+        out += _histogram_lines("kaggle_mcp_upstream_duration_seconds", labels, s.latency)
+    out += [
+        "# TYPE kaggle_mcp_upstream_requests counter",
+        "# HELP kaggle_mcp_upstream_requests Kaggle API requests by calling tool.",
+    ]
+    for (service, rpc), s in sorted(rpcs.items()):
+        for tool, n in sorted(s.by_tool.items()):
+            out.append(
+                f'kaggle_mcp_upstream_requests_total{{service="{_label(service)}",rpc="{_label(rpc)}",'
+                f'tool="{_label(tool)}"}} {n}'
+            )
+    out += [
+        "# TYPE kaggle_mcp_upstream_errors counter",
+        "# HELP kaggle_mcp_upstream_errors Failed Kaggle API requests by error class.",
+    ]
+    for (service, rpc), s in sorted(rpcs.items()):
+        for cls, n in sorted(s.errors.items()):
+            out.append(
+                f'kaggle_mcp_upstream_errors_total{{service="{_label(service)}",rpc="{_label(rpc)}",'
+                f'class="{_label(cls)}"}} {n}'
+            )
+    out += [
+        "# TYPE kaggle_mcp_upstream_response_bytes counter",
+        "# UNIT kaggle_mcp_upstream_response_bytes bytes",
+        "# HELP kaggle_mcp_upstream_response_bytes Bytes of JSON responses received from the Kaggle API.",
+    ]
+    out += [
+        f'kaggle_mcp_upstream_response_bytes_total{{service="{_label(svc)}",rpc="{_label(rpc)}"}} {s.bytes}'
+        for (svc, rpc), s in sorted(rpcs.items())
+    ]
+
+    out += [
+        "# TYPE kaggle_mcp_cache_requests counter",
+        "# HELP kaggle_mcp_cache_requests Response cache lookups by tool and result.",
+    ]
+    for name, c in sorted(_cache_counts().items()):
+        out.append(f'kaggle_mcp_cache_requests_total{{cache="memory",tool="{_label(name)}",result="hit"}} {c["hits"]}')
+        out.append(f'kaggle_mcp_cache_requests_total{{cache="memory",tool="{_label(name)}",result="miss"}} {c["misses"]}')
+    disk = disk_cache.get_cache()
+    if disk is not None:
+        d = disk.stats()
+        for result, key in (("hit", "hits"), ("stale_hit", "stale_hits"), ("miss", "misses")):
+            out.append(f'kaggle_mcp_cache_requests_total{{cache="disk",tool="",result="{result}"}} {d[key]}')
+
+    flights = singleflight.stats()
+    out += [
+        "# TYPE kaggle_mcp_coalesced_requests counter",
+        "# HELP kaggle_mcp_coalesced_requests Reads that joined an identical request already in flight.",
+        f"kaggle_mcp_coalesced_requests_total {flights['coalesced']}",
+    ]
+    limiter = ratelimit.get_limiter()
+    if limiter is not None:
+        limits = limiter.stats()
+        out += [
+            "# TYPE kaggle_mcp_rate_limit_rate gauge",
+            "# HELP kaggle_mcp_rate_limit_rate Current requests per second allowed per service.",
+        ]
+        out += [f'kaggle_mcp_rate_limit_rate{{service="{_label(s)}"}} {b["rate"]:g}' for s, b in limits.items()]
+        out += ["# TYPE kaggle_mcp_rate_limit_throttled counter",
+                "# HELP kaggle_mcp_rate_limit_throttled HTTP 429 responses per service."]
+        out += [f'kaggle_mcp_rate_limit_throttled_total{{service="{_label(s)}"}} {b["throttled"]}'
+                for s, b in limits.items()]
+        out += ["# TYPE kaggle_mcp_rate_limit_retries counter",
+                "# HELP kaggle_mcp_rate_limit_retries Retried Kaggle API requests per service."]
+        out += [f'kaggle_mcp_rate_limit_retries_total{{service="{_label(s)}"}} {b["retries"]}'
+                for s, b in limits.items()]
+    out.append("# EOF")
+    return "\n".join(out) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = render_openmetrics().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def serve(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve /metrics on a background thread."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="kaggle-mcp-metrics", daemon=True).start()
+    logger.info("Serving OpenMetrics on http://%s:%d/metrics", host, server.server_address[1])
+    return server
+
+
+def write_file(path: str | Path) -> None:
+    """Write the metrics atomically to path."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(render_openmetrics())
+    tmp.replace(path)
+
+
+def write_periodically(path: str | Path, interval: float = FILE_INTERVAL) -> threading.Thread:
+    """Rewrite the metrics file every interval seconds on a background thread."""
+    def loop() -> None:
+        while True:
+            try:
+                write_file(path)
+            except OSError as e:
+                logger.warning("Could not write metrics to %s: %s", path, e)
+            time.sleep(interval)
+
+    thread = threading.Thread(target=loop, name="kaggle-mcp-metrics-file", daemon=True)
+    thread.start()
+    return thread
+
+
+def configure(port: int = 0, path: str | None = None) -> None:
+    """Start the requested exporters; arguments fall back to the environment.
+
+    KAGGLE_MCP_METRICS_PORT serves /metrics on that port, KAGGLE_MCP_METRICS_FILE
+    names a file rewritten every FILE_INTERVAL seconds.
+    """
+    if not port:
+        raw = os.getenv("KAGGLE_MCP_METRICS_PORT", "")
+        try:
+            port = int(raw) if raw else 0
+        except ValueError:
+            logger.warning("Ignoring invalid KAGGLE_MCP_METRICS_PORT=%r", raw)
+    path = path or os.getenv("KAGGLE_MCP_METRICS_FILE", "") or None
+    if port > 0:
+        serve(port)
+    if path:
+        write_periodically(path)
+
+
+def register(mcp: FastMCP) -> None:
+    """Register the server statistics tool."""
+
+    @mcp.tool()
+    def server_stats() -> str:
+        """Show per-tool latency, error and upstream-call statistics since the server started.
+
+        Lists p50/p95/p99 latency, error classes, Kaggle API requests per call,
+        result sizes and cache hit ratios for each tool, the slowest Kaggle API
+        requests, and the current rate-limit state.
+        """
+        return format_stats()
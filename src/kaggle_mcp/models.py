@@ -2,6 +2,7 @@
 
 from mcp.server.fastmcp import FastMCP
 
+from . import pagination
 from .client import get_client
 
 
@@ -14,6 +15,7 @@ def register(mcp: FastMCP) -> None:
         owner: str = "",
         sort_by: str = "",
         page_size: int = 20,
+        max_results: int = 0,
     ) -> str:
         """Search and list Kaggle models.
 
@@ -22,22 +24,32 @@ def register(mcp: FastMCP) -> None:
             owner: Filter by owner.
             sort_by: Sort order (hotness, downloadCount, createTime, updateTime).
             page_size: Number of results per page.
+            max_results: If > 0, follow page tokens and return up to this many
+                unique models.
         """
         from kagglesdk.models.services.model_api_service import (
             ApiListModelsRequest,
         )
 
-        req = ApiListModelsRequest()
-        if search:
-            req.search = search
-        if owner:
-            req.owner = owner
-        if sort_by:
-            req.sort_by = sort_by
-        req.page_size = page_size
-
-        resp = get_client().models.model_api_client.list_models(req)
-        models = resp.models
+        def fetch(page_token: str) -> tuple[list, str]:
+            req = ApiListModelsRequest()
+            if search:
+                req.search = search
+            if owner:
+                req.owner = owner
+            if sort_by:
+                req.sort_by = sort_by
+            req.page_size = page_size
+            if page_token:
+                req.page_token = page_token
+            resp = get_client().models.model_api_client.list_models(req)
+            return resp.models or [], resp.next_page_token
+
+        if max_results > 0:
+            pages = pagination.iter_token_pages(fetch)
+            models = pagination.collect(pages, max_results, key=lambda m: m.ref)
+        else:
+            models, _ = fetch("")
         if not models:
             return "No models found."
         lines = []
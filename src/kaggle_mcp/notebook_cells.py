@@ -0,0 +1,130 @@
+"""Cell index for notebook sources.
+
+A notebook's ipynb JSON is parsed once into a plain-text blob holding every
+cell's source back to back, plus an index giving each cell's type, line count,
+byte offset and length in that blob. Cells can then be read by seeking into the
+blob, without parsing the notebook again or touching its outputs. Sources that
+are not notebooks (scripts) are indexed as a single code cell.
+"""
+
+import json
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+
+@dataclass
+class Cell:
+    """Position and shape of one cell in the blob."""
+
+    index: int
+    cell_type: str
+    lines: int
+    offset: int
+    length: int
+    outputs: int = 0
+
+
+def _text(value) -> str:
+    return "".join(value) if isinstance(value, list) else (value or "")
+
+
+def build(source: str) -> tuple[list[Cell], bytes]:
+    """Split a kernel source into cells; returns (index, blob of cell sources)."""
+    try:
+        nb = json.loads(source)
+    except ValueError:
+        nb = None
+    if isinstance(nb, dict) and isinstance(nb.get("cells"), list):
+        raw_cells = [
+            (c.get("cell_type", "code"), _text(c.get("source")), len(c.get("outputs") or []))
+            for c in nb["cells"]
+        ]
+    else:
+        raw_cells = [("code", source, 0)]
+
+    cells = []
+    chunks = []
+    offset = 0
+    for i, (cell_type, text, outputs) in enumerate(raw_cells):
+        data = text.encode("utf-8")
+        cells.append(Cell(i, cell_type, len(text.splitlines()), offset, len(data), outputs))
+        chunks.append(data)
+        offset += len(data)
+    return cells, b"".join(chunks)
+
+
+def save(cells: list[Cell], blob: bytes, index_path: Path, blob_path: Path) -> None:
+    """Write an index and its blob next to each other."""
+    blob_path.write_bytes(blob)
+    index_path.write_text(json.dumps([asdict(c) for c in cells]))
+
+
+def load(index_path: Path) -> list[Cell] | None:
+    """Read a saved index, or None if it is missing or unreadable."""
+    try:
+        return [Cell(**c) for c in json.loads(index_path.read_text())]
+    except (OSError, ValueError, TypeError):
+        return None
+
+
+def read(blob_path: Path, cells: list[Cell]) -> list[str]:
+    """Sources of the given cells, read by offset from the blob."""
+    texts = []
+    with open(blob_path, "rb") as f:
+        for cell in cells:
+            f.seek(cell.offset)
+            texts.append(f.read(cell.length).decode("utf-8"))
+    return texts
+
+
+def parse_selection(selection: str, count: int) -> list[int]:
+    """Cell numbers from a selection like ``"0,3,5-8,-2"``; negatives count from the end.
+
+    Raises:
+        ValueError: If the selection is malformed or out of range.
+    """
+    picked: list[int] = []
+    for part in selection.replace(" ", "").split(","):
+        if not part:
+            continue
+        if "-" in part[1:]:
+            cut = part.index("-", 1)
+            start, end = int(part[:cut]), int(part[cut + 1:])
+        else:
+            start = end = int(part)
+        start, end = (start + count if start < 0 else start), (end + count if end < 0 else end)
+        if not 0 <= start <= end < count:
+            raise ValueError(f"cell range '{part}' is outside 0-{count - 1}")
+        picked.extend(i for i in range(start, end + 1) if i not in picked)
+    return picked
+
+
+def parse_cells(source: str) -> list[dict]:
+    """Cells of a notebook's JSON source, or an empty list for anything else.
+
+    Parse once and pass the result to outputs_text for every selected cell.
+    """
+    try:
+        cells = json.loads(source)["cells"]
+    except (ValueError, KeyError, TypeError):
+        return []
+    return cells if isinstance(cells, list) else []
+
+
+def outputs_text(cells: list[dict], index: int, limit: int = 2000) -> str:
+    """Text outputs (streams and text/plain results) of one cell of parse_cells' result, truncated."""
+    if not 0 <= index < len(cells) or not isinstance(cells[index], dict):
+        return ""
+    cell = cells[index]
+    parts = []
+    for out in cell.get("outputs") or []:
+        if out.get("output_type") == "stream":
+            parts.append(_text(out.get("text")))
+        elif out.get("output_type") == "error":
+            parts.append(f"{out.get('ename', 'Error')}: {out.get('evalue', '')}")
+        else:
+            plain = (out.get("data") or {}).get("text/plain")
+            if plain:
+                parts.append(_text(plain))
+    text = "".join(p if p.endswith("\n") else p + "\n" for p in parts)
+    return text if len(text) <= limit else text[:limit] + f"... ({len(text) - limit} more chars)\n"
@@ -0,0 +1,94 @@
+"""Auto-pagination helpers for list tools.
+
+Page-numbered endpoints (competitions, datasets, kernels) are walked with a
+window of pages requested concurrently ahead of the consumer. Token-based
+endpoints (models) can only be walked one page after another. Both feed
+``collect``, which deduplicates and stops as soon as enough results are found.
+"""
+
+import contextvars
+import math
+from collections.abc import Callable, Hashable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+PREFETCH_PAGES = 4
+MAX_PAGES = 50
+# Items per page the list endpoints return when no page_size is sent.
+DEFAULT_PAGE_SIZE = 20
+
+
+def prefetch_for(max_results: int, page_size: int = DEFAULT_PAGE_SIZE) -> int:
+    """Pages worth requesting ahead: no more than max_results can fill, at most PREFETCH_PAGES."""
+    return max(1, min(PREFETCH_PAGES, math.ceil(max_results / page_size)))
+
+
+def iter_numbered_pages(
+    fetch: Callable[[int], list],
+    start_page: int = 1,
+    prefetch: int = PREFETCH_PAGES,
+    max_pages: int = MAX_PAGES,
+) -> Iterator[list]:
+    """Yield pages in order, keeping up to prefetch page requests in flight.
+
+    Iteration ends at the first empty page or after max_pages. Requests that
+    are still queued when the consumer stops early are cancelled.
+    """
+    last_page = start_page + max_pages - 1
+    ctx = contextvars.copy_context()
+    pool = ThreadPoolExecutor(max_workers=max(1, prefetch), thread_name_prefix="kaggle-mcp-page")
+    in_flight: list[Future] = []
+    next_page = start_page
+    try:
+        while next_page <= last_page and len(in_flight) < prefetch:
+            in_flight.append(pool.submit(ctx.copy().run, fetch, next_page))
+            next_page += 1
+        while in_flight:
+            items = in_flight.pop(0).result()
+            if not items:
+                return
+            if next_page <= last_page:
+                in_flight.append(pool.submit(ctx.copy().run, fetch, next_page))
+                next_page += 1
+            yield items
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_token_pages(
+    fetch: Callable[[str], tuple[list, str]],
+    max_pages: int = MAX_PAGES,
+) -> Iterator[list]:
+    """Yield pages from a page-token endpoint; fetch returns (items, next_page_token)."""
+    token = ""
+    for _ in range(max_pages):
+        items, token = fetch(token)
+        if items:
+            yield items
+        if not items or not token:
+            return
+
+
+def collect(
+    pages: Iterable[list],
+    max_results: int,
+    key: Callable[[Any], Hashable],
+) -> list:
+    """Flatten pages into at most max_results items, dropping duplicate keys.
+
+    Stops consuming pages as soon as max_results unique items have been seen.
+    """
+    seen: set[Hashable] = set()
+    results: list = []
+    for page in pages:
+        for item in page:
+            k = key(item)
+            if k in seen:
+                continue
+            seen.add(k)
+            results.append(item)
+            if len(results) >= max_results:
+                if hasattr(pages, "close"):
+                    pages.close()
+                return results
+    return results
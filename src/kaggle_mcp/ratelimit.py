@@ -0,0 +1,239 @@
+"""Per-service rate limiting and retries for Kaggle API calls.
+
+Each Kaggle service (competitions, datasets, kernels, models, search,
+benchmarks, ...) gets a token bucket shared by every thread. A 429 response
+pauses that service's bucket for the Retry-After interval and halves its rate;
+successful calls then raise the rate back towards the configured maximum. The
+rate therefore settles just below what Kaggle accepts instead of alternating
+between bursts and rejections.
+
+With several Kaggle accounts (see ``client.ClientPool``) each account has its
+own buckets, since Kaggle limits every account separately.
+
+Calls rejected with 429 are always retried. Read-only calls are also retried
+after 5xx responses and connection errors; write calls are not, since they may
+already have taken effect.
+"""
+
+import email.utils
+import logging
+import os
+import random
+import threading
+import time
+from collections.abc import Callable
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any
+
+from . import tracing
+
+if TYPE_CHECKING:
+    import requests
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RATE = 5.0
+DEFAULT_BURST = 10
+DEFAULT_MAX_RETRIES = 5
+_BACKOFF_BASE = 0.5
+_BACKOFF_MAX = 30.0
+_MIN_RATE_FRACTION = 0.05
+_RECOVERY_FRACTION = 0.02
+_READ_PREFIXES = ("Get", "List", "Download")
+_RETRYABLE_STATUS = (500, 502, 503, 504)
+
+
+class TokenBucket:
+    """Thread-safe token bucket whose rate adapts to 429 responses."""
+
+    def __init__(self, rate: float, burst: int):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self.throttled = 0
+        self.retries = 0
+        self.throttled_at = 0.0
+
+    def acquire(self) -> float:
+        """Take one token, sleeping until it is available; returns seconds waited."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Reserve the token now (the balance may go negative) and sleep outside
+            # the lock, so waiting callers are served in arrival order.
+            self._tokens -= 1
+            wait = max(-self._tokens / self.rate, self._paused_until - now, 0.0)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def throttle(self, retry_after: float) -> None:
+        """Record a 429: pause the bucket and halve its rate."""
+        with self._lock:
+            self.throttled += 1
+            self.throttled_at = time.monotonic()
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+            self.rate = max(self.max_rate * _MIN_RATE_FRACTION, self.rate / 2)
+            self._tokens = min(self._tokens, 0.0)
+
+    def succeed(self) -> None:
+        """Record an accepted call: move the rate back towards max_rate."""
+        if self.rate >= self.max_rate:
+            return
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * _RECOVERY_FRACTION)
+
+
+class RateLimiter:
+    """One TokenBucket per Kaggle service, created on first use."""
+
+    def __init__(self, rate: float, burst: int, max_retries: int):
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, service: str, account: str = "") -> TokenBucket:
+        """The bucket of a service, keyed by the part before the first dot.
+
+        Buckets of a named account are kept apart as ``account:service``.
+        """
+        key = service.split(".", 1)[0]
+        if account:
+            key = f"{account}:{key}"
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.setdefault(key, TokenBucket(self.rate, self.burst))
+        return bucket
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """Current rate, 429 count and retry count per service."""
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {
+            name: {"rate": b.rate, "max_rate": b.max_rate, "throttled": b.throttled, "retries": b.retries}
+            for name, b in sorted(buckets.items())
+        }
+
+
+def _env_number(name: str, default: float) -> float:
+    raw = os.getenv(name, "")
+    try:
+        return float(raw)
+    except ValueError:
+        if raw:
+            logger.warning("Ignoring invalid %s=%r", name, raw)
+        return default
+
+
+def _limiter_from_env() -> RateLimiter | None:
+    rate = _env_number("KAGGLE_MCP_RATE_LIMIT", DEFAULT_RATE)
+    if rate <= 0:
+        return None
+    return RateLimiter(
+        rate,
+        int(_env_number("KAGGLE_MCP_RATE_BURST", DEFAULT_BURST)),
+        int(_env_number("KAGGLE_MCP_MAX_RETRIES", DEFAULT_MAX_RETRIES)),
+    )
+
+
+_limiter: RateLimiter | None = None
+_limiter_lock = threading.Lock()
+_configured = False
+
+
+def get_limiter() -> RateLimiter | None:
+    """Get the shared limiter (lazy init from the environment), or None when disabled."""
+    global _limiter, _configured
+    if not _configured:
+        with _limiter_lock:
+            if not _configured:
+                _limiter = _limiter_from_env()
+                _configured = True
+    return _limiter
+
+
+def _retry_after(response: "requests.Response | None") -> float | None:
+    """Seconds from a Retry-After header (delta-seconds or HTTP date)."""
+    if response is None:
+        return None
+    raw = response.headers.get("Retry-After", "").strip()
+    if not raw:
+        return None
+    try:
+        return max(0.0, float(raw))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(raw)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def _backoff(attempt: int) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(_BACKOFF_MAX, _BACKOFF_BASE * 2**attempt))
+
+
+def wrap(call: Callable[..., Any], account: str = "") -> Callable[..., Any]:
+    """Wrap ``KaggleHttpClient.call`` with the per-service limiter and retries.
+
+    Args:
+        call: The call to wrap.
+        account: Name of the Kaggle account call authenticates as, if the
+            server uses several; its requests get buckets of their own.
+    """
+    import requests
+
+    def limited_call(service: str, request_name: str, request, response_type):
+        limiter = get_limiter()
+        if limiter is None:
+            return call(service, request_name, request, response_type)
+        bucket = limiter.bucket(service, account)
+        is_read = request_name.startswith(_READ_PREFIXES)
+        attempt = 0
+        while True:
+            start_ns = time.time_ns()
+            if bucket.acquire():
+                tracing.record("rate_limit.wait", start_ns, time.time_ns(), service=service)
+            try:
+                resp = call(service, request_name, request, response_type)
+            except requests.HTTPError as e:
+                status = e.response.status_code if e.response is not None else None
+                if attempt >= limiter.max_retries:
+                    raise
+                if status == 429:
+                    retry_after = _retry_after(e.response)
+                    delay = retry_after if retry_after is not None else _backoff(attempt)
+                    # Spread the retries of callers throttled at the same moment.
+                    bucket.throttle(delay + random.uniform(0, 0.1 + delay * 0.1))
+                    delay = 0.0
+                elif is_read and status in _RETRYABLE_STATUS:
+                    retry_after = _retry_after(e.response)
+                    delay = retry_after if retry_after is not None else _backoff(attempt)
+                else:
+                    raise
+            except (requests.ConnectionError, requests.Timeout):
+                if not is_read or attempt >= limiter.max_retries:
+                    raise
+                delay = _backoff(attempt)
+            else:
+                bucket.succeed()
+                return resp
+            bucket.retries += 1
+            attempt += 1
+            logger.info("Retrying %s/%s (attempt %d)", service, request_name, attempt + 1)
+            if delay:
+                time.sleep(delay)
+
+    return limited_call
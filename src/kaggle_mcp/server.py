@@ -1,23 +1,373 @@
 """Kaggle MCP Server - main entry point."""
 
+import argparse
+import importlib
+import logging
+import os
+import sys
+import threading
+import time
+import weakref
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any
+
+import anyio
 from mcp.server.fastmcp import FastMCP
+from mcp.server.transport_security import TransportSecuritySettings
+from mcp.types import ContentBlock, InitializedNotification
+
+from . import cache, client, disk_cache, executor, metrics, tracing
+
+logger = logging.getLogger(__name__)
+
+TRANSPORTS = ("stdio", "streamable-http", "sse")
+DEFAULT_SESSION_CONCURRENCY = 4
+LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+# Modules whose register(mcp) adds tools, in registration order. None of them
+# imports kagglesdk at module level, so registering every tool schema stays
+# cheap; the SDK is loaded by warm_up once the client has connected.
+TOOL_MODULES = ("benchmarks", "competitions", "datasets", "kernels", "models", "discussions", "cache", "metrics")
+
+
+class KaggleMCP(FastMCP):
+    """FastMCP server that runs synchronous tools on the shared worker pool.
+
+    Read-only tools are additionally served from the response cache, and write
+    tools invalidate the cached responses they make stale. Every call is timed
+    and recorded in the metrics registry, and traced when tracing is enabled.
+    Calls naming an owner send their requests with that Kaggle account when it
+    is one of several configured. With session_concurrency set, each client
+    session runs at most that many tool calls at once; further calls wait for a
+    free slot. The first completed handshake starts the kagglesdk warm-up.
+    """
+
+    session_concurrency = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._session_slots: weakref.WeakKeyDictionary[Any, anyio.Semaphore] = weakref.WeakKeyDictionary()
+        self._mcp_server.notification_handlers[InitializedNotification] = self._on_initialized
+
+    async def _on_initialized(self, notification: InitializedNotification) -> None:
+        start_warm_up()
+
+    def _slots(self) -> anyio.Semaphore | None:
+        """Semaphore limiting tool calls of the current client session, if any."""
+        if self.session_concurrency <= 0:
+            return None
+        try:
+            session = self.get_context().session
+        except ValueError:
+            return None
+        slots = self._session_slots.get(session)
+        if slots is None:
+            slots = self._session_slots[session] = anyio.Semaphore(self.session_concurrency)
+        return slots
+
+    async def call_tool(self, name: str, arguments: dict[str, Any]) -> Sequence[ContentBlock] | dict[str, Any]:
+        slots = self._slots()
+        if slots is None:
+            return await self._call_tool(name, arguments)
+        async with slots:
+            return await self._call_tool(name, arguments)
+
+    async def _call_tool(self, name: str, arguments: dict[str, Any]) -> Sequence[ContentBlock] | dict[str, Any]:
+        if not tracing.enabled():
+            return await super().call_tool(name, arguments)
+        with tracing.span(f"tool {name}", kind="server", tool=name):
+            result = await self._tool_manager.call_tool(name, arguments, context=self.get_context())
+            with tracing.span("serialize"):
+                return self._tool_manager.get_tool(name).fn_metadata.convert_result(result)
+
+    def tool(self, name: str | None = None, *args, **kwargs):
+        register = super().tool(name, *args, **kwargs)
+
+        def decorator(fn):
+            tool_name = name or fn.__name__
+            traced = executor.offload(client.pin_owner(tracing.instrument(fn)))
+            register(metrics.instrument(cache.cached(traced, tool_name), tool_name))
+            return fn
+
+        return decorator
+
+
+@dataclass
+class ModuleStartup:
+    """Time spent importing one tool module and registering its tools."""
+
+    module: str
+    import_s: float
+    register_s: float
+    tools: int
+
+
+def register_tools(server: FastMCP) -> list[ModuleStartup]:
+    """Import every module in TOOL_MODULES and register its tools, timing each step."""
+    timings = []
+    for name in TOOL_MODULES:
+        before = len(server._tool_manager.list_tools())
+        start = time.perf_counter()
+        module = importlib.import_module(f".{name}", __package__)
+        imported = time.perf_counter()
+        module.register(server)
+        timings.append(ModuleStartup(
+            name, imported - start, time.perf_counter() - imported,
+            len(server._tool_manager.list_tools()) - before,
+        ))
+    return timings
+
+
+_warm_up: threading.Thread | None = None
+_warm_up_lock = threading.Lock()
+_warm_up_s: float | None = None
+
+
+def _run_warm_up() -> None:
+    global _warm_up_s
+    start = time.perf_counter()
+    try:
+        client.get_client()
+    except Exception as e:
+        logger.debug("Warm-up failed; the first tool call will retry: %s", e)
+    _warm_up_s = time.perf_counter() - start
+
+
+def start_warm_up() -> threading.Thread:
+    """Load kagglesdk and build the Kaggle client on a background thread, once.
+
+    Called when a client finishes the MCP handshake, so the import overlaps
+    with the client listing tools instead of delaying the first tool call.
+    """
+    global _warm_up
+    with _warm_up_lock:
+        if _warm_up is None:
+            _warm_up = threading.Thread(target=_run_warm_up, name="kaggle-mcp-warm-up", daemon=True)
+            _warm_up.start()
+        return _warm_up
+
+
+def format_startup(timings: list[ModuleStartup]) -> str:
+    """Markdown report of tool module import and registration times."""
+    lines = [
+        "| Module | Import ms | Register ms | Tools |",
+        "|---|---:|---:|---:|",
+        *(f"| `{t.module}` | {t.import_s * 1000:.1f} | {t.register_s * 1000:.1f} | {t.tools} |" for t in timings),
+        f"| **total** | {sum(t.import_s for t in timings) * 1000:.1f} "
+        f"| {sum(t.register_s for t in timings) * 1000:.1f} | {sum(t.tools for t in timings)} |",
+        "",
+        f"Process CPU time until the server was ready: {time.process_time() * 1000:.0f} ms",
+        "Heavy modules loaded before the handshake: "
+        + (", ".join(m for m in ("kagglesdk", "requests") if m in sys.modules) or "none"),
+    ]
+    return "\n".join(lines)
+
+
+mcp = KaggleMCP("kaggle")
+startup = register_tools(mcp)
+
+
+def _env_int(name: str) -> int | None:
+    """Integer value of an environment variable, or None if unset or invalid."""
+    raw = os.getenv(name, "")
+    try:
+        return int(raw)
+    except ValueError:
+        if raw:
+            logger.warning("Ignoring invalid %s=%r", name, raw)
+        return None
+
 
-from . import benchmarks, competitions, datasets, discussions, kernels, models
+def configure_transport(transport: str, host: str | None = None, port: int | None = None,
+                        session_concurrency: int | None = None, allow_remote: bool = False,
+                        allowed_hosts: Sequence[str] = ()) -> None:
+    """Apply network settings for the HTTP transports and the per-session call limit.
 
-mcp = FastMCP("kaggle")
+    Args:
+        transport: "stdio", "streamable-http" or "sse".
+        host: Interface to bind the HTTP transports to (default 127.0.0.1).
+        port: Port of the HTTP transports (default 8000).
+        session_concurrency: Tool calls each client session may run at once; 0 for
+            no limit. Defaults to 4 for the HTTP transports and no limit for stdio.
+        allow_remote: Permit an HTTP transport to bind a non-loopback interface.
+            The server has no authentication of its own, so anyone who can reach
+            it acts with its Kaggle credentials.
+        allowed_hosts: Host header values ("name" or "name:port") accepted by a
+            non-loopback server; any Host is accepted when empty.
 
-# Register all tool modules
-benchmarks.register(mcp)
-competitions.register(mcp)
-datasets.register(mcp)
-kernels.register(mcp)
-models.register(mcp)
-discussions.register(mcp)
+    Raises:
+        ValueError: If host is not a loopback address and allow_remote is False.
+    """
+    if host:
+        mcp.settings.host = host
+        if transport != "stdio" and host not in LOOPBACK_HOSTS:
+            if not allow_remote:
+                raise ValueError(
+                    f"refusing to bind {host}: the server has no authentication, so every client that "
+                    "can reach it would use your Kaggle credentials; pass --allow-remote "
+                    "(or KAGGLE_MCP_ALLOW_REMOTE=1) to do so anyway"
+                )
+            # FastMCP only turns on Host-header checks for loopback binds; a server
+            # bound to another interface is reached under names it cannot know.
+            if allowed_hosts:
+                mcp.settings.transport_security = TransportSecuritySettings(
+                    allowed_hosts=list(allowed_hosts),
+                    allowed_origins=[f"{scheme}://{h}" for h in allowed_hosts for scheme in ("http", "https")],
+                )
+            else:
+                mcp.settings.transport_security = None
+            logger.warning(
+                "*** Serving every Kaggle tool WITHOUT AUTHENTICATION on %s: anyone who can reach this "
+                "address acts with this server's Kaggle credentials. %s ***",
+                host,
+                f"Accepted Host headers: {', '.join(allowed_hosts)}." if allowed_hosts
+                else "Any Host header is accepted (see --allowed-hosts).",
+            )
+    if port:
+        mcp.settings.port = port
+    if session_concurrency is None:
+        session_concurrency = 0 if transport == "stdio" else DEFAULT_SESSION_CONCURRENCY
+    mcp.session_concurrency = max(0, session_concurrency)
 
 
 def main() -> None:
     """Run the MCP server."""
-    mcp.run(transport="stdio")
+    parser = argparse.ArgumentParser(prog="kaggle-mcp-server", description=__doc__)
+    parser.add_argument(
+        "--transport",
+        choices=TRANSPORTS,
+        default=None,
+        help="stdio for one client per process, or a long-running streamable-http/sse server "
+        "shared by many clients (default: $KAGGLE_MCP_TRANSPORT or stdio).",
+    )
+    parser.add_argument(
+        "--host",
+        default=None,
+        help="Interface for the HTTP transports (default: $KAGGLE_MCP_HOST or 127.0.0.1).",
+    )
+    parser.add_argument(
+        "--allow-remote",
+        action="store_true",
+        help="Allow --host to be a non-loopback interface. The server has no authentication: anyone "
+        "who can reach it uses your Kaggle credentials (also $KAGGLE_MCP_ALLOW_REMOTE=1).",
+    )
+    parser.add_argument(
+        "--allowed-hosts",
+        default=None,
+        metavar="HOSTS",
+        help="Comma-separated Host header values a non-loopback server accepts, e.g. "
+        "kaggle-mcp.internal:8000 (default: $KAGGLE_MCP_ALLOWED_HOSTS or any).",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=0,
+        help="Port for the HTTP transports (default: $KAGGLE_MCP_PORT or 8000).",
+    )
+    parser.add_argument(
+        "--session-concurrency",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Tool calls each client session may run at once, 0 for no limit (default: "
+        f"$KAGGLE_MCP_SESSION_CONCURRENCY, {DEFAULT_SESSION_CONCURRENCY} for HTTP transports, no limit for stdio).",
+    )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Print import and registration time per tool module, and the warm-up time, then exit.",
+    )
+    parser.add_argument(
+        "--accounts",
+        default=None,
+        metavar="PATH",
+        help="JSON list of Kaggle accounts to spread requests over (also $KAGGLE_MCP_ACCOUNTS).",
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=0,
+        help="Worker threads for blocking Kaggle API calls "
+        f"(default: $KAGGLE_MCP_MAX_WORKERS or {executor.DEFAULT_MAX_WORKERS}).",
+    )
+    parser.add_argument(
+        "--disk-cache",
+        nargs="?",
+        const=str(disk_cache.DEFAULT_PATH),
+        default=None,
+        metavar="PATH",
+        help="Persist read-only API responses in a SQLite file across restarts "
+        f"(default path: {disk_cache.DEFAULT_PATH}; also $KAGGLE_MCP_DISK_CACHE).",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=0,
+        metavar="PORT",
+        help="Serve OpenMetrics on http://127.0.0.1:PORT/metrics (also $KAGGLE_MCP_METRICS_PORT).",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        default=None,
+        metavar="PATH",
+        help=f"Rewrite OpenMetrics text to PATH every {metrics.FILE_INTERVAL:g}s "
+        "(also $KAGGLE_MCP_METRICS_FILE).",
+    )
+    parser.add_argument(
+        "--trace-file",
+        default=None,
+        metavar="PATH",
+        help="Append trace spans of every tool call to PATH as JSON lines (also $KAGGLE_MCP_TRACE_FILE).",
+    )
+    parser.add_argument(
+        "--trace-otlp",
+        default=None,
+        metavar="URL",
+        help="Send trace spans to an OTLP/HTTP collector, e.g. http://localhost:4318 "
+        "(also $KAGGLE_MCP_TRACE_OTLP).",
+    )
+    args = parser.parse_args()
+    if args.profile_startup:
+        report = format_startup(startup)
+        start_warm_up().join()
+        print(report, file=sys.stderr)
+        print(f"Warm-up after the handshake (kagglesdk import, client setup): {(_warm_up_s or 0) * 1000:.1f} ms",
+              file=sys.stderr)
+        return
+    transport = args.transport or os.getenv("KAGGLE_MCP_TRANSPORT") or "stdio"
+    if transport not in TRANSPORTS:
+        parser.error(f"invalid KAGGLE_MCP_TRANSPORT {transport!r} (choose from {', '.join(TRANSPORTS)})")
+    allowed_hosts = args.allowed_hosts or os.getenv("KAGGLE_MCP_ALLOWED_HOSTS", "")
+    try:
+        configure_transport(
+            transport,
+            host=args.host or os.getenv("KAGGLE_MCP_HOST"),
+            port=args.port or _env_int("KAGGLE_MCP_PORT"),
+            session_concurrency=(
+                args.session_concurrency if args.session_concurrency is not None
+                else _env_int("KAGGLE_MCP_SESSION_CONCURRENCY")
+            ),
+            allow_remote=args.allow_remote
+            or os.getenv("KAGGLE_MCP_ALLOW_REMOTE", "").lower() in ("1", "true", "yes"),
+            allowed_hosts=[h.strip() for h in allowed_hosts.split(",") if h.strip()],
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    if args.accounts:
+        try:
+            client.configure_accounts(args.accounts)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.max_workers > 0:
+        executor.configure(args.max_workers)
+    if args.disk_cache:
+        disk_cache.configure(args.disk_cache)
+    else:
+        disk_cache.configure_from_env()
+    metrics.configure(args.metrics_port, args.metrics_file)
+    tracing.configure(args.trace_file, args.trace_otlp)
+    mcp.run(transport=transport)
 
 
 if __name__ == "__main__":
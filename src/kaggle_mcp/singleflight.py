@@ -0,0 +1,63 @@
+"""Coalescing of identical concurrent Kaggle API reads.
+
+When several tool calls issue the same read RPC with the same request fields
+while one is already in flight, only the first goes upstream; the others wait
+for it and receive the same response (or the same exception). Responses are
+shared, so callers treat them as read-only, which every tool already does.
+"""
+
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future
+from typing import Any
+
+from . import tracing
+
+# Download RPCs are excluded: their responses wrap a streamed HTTP body.
+_COALESCED_PREFIXES = ("Get", "List")
+
+_inflight: dict[tuple[str, str, str], Future] = {}
+_lock = threading.Lock()
+_counts = {"leaders": 0, "coalesced": 0}
+
+
+def stats() -> dict[str, int]:
+    """Upstream calls made (leaders) and calls that joined one in flight (coalesced)."""
+    with _lock:
+        return {**_counts, "in_flight": len(_inflight)}
+
+
+def wrap(call: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap ``KaggleHttpClient.call`` so identical concurrent reads share one request."""
+    def coalesced_call(service: str, request_name: str, request, response_type):
+        if not request_name.startswith(_COALESCED_PREFIXES):
+            return call(service, request_name, request, response_type)
+
+        key = (service, request_name, request.to_json())
+        with _lock:
+            future = _inflight.get(key)
+            leader = future is None
+            if leader:
+                future = _inflight[key] = Future()
+                _counts["leaders"] += 1
+            else:
+                _counts["coalesced"] += 1
+        if not leader:
+            span = tracing.current()
+            if span is not None:
+                span.set(coalesced=True)
+            return future.result()
+
+        try:
+            resp = call(service, request_name, request, response_type)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(resp)
+            return resp
+        finally:
+            with _lock:
+                del _inflight[key]
+
+    return coalesced_call
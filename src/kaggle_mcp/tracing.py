@@ -0,0 +1,403 @@
+"""Optional trace spans from an MCP tool call down to individual Kaggle API requests.
+
+A traced tool call produces a tree of spans:
+
+- ``tool <name>``: the whole call as seen by FastMCP, argument validation included;
+- ``execute``: the tool body, on its worker thread (the gap before it is time
+  spent waiting for a free worker);
+- ``<service>/<Rpc>``: one kagglesdk request, including cache lookups,
+  coalescing, rate-limit waits (``rate_limit.wait``) and retries;
+- ``http``: one HTTP attempt, until the response has arrived;
+- ``deserialize``: parsing the JSON response into SDK objects;
+- ``format``: the tool body after its last Kaggle API request, i.e. turning
+  responses into the result text;
+- ``serialize``: converting the result into MCP content.
+
+Tracing is off unless an exporter is configured: ``--trace-file PATH`` appends
+spans as JSON lines, ``--trace-otlp URL`` posts them to an OTLP/HTTP collector
+in its JSON encoding. Recorded files can be summarised, slowest traces first::
+
+    python -m kaggle_mcp.tracing traces.jsonl --top 5
+"""
+
+import argparse
+import atexit
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = 2.0
+_OTLP_KINDS = {"internal": 1, "server": 2, "client": 3}
+
+
+@dataclass
+class Span:
+    """One timed operation; times are Unix epoch nanoseconds."""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str = ""
+    kind: str = "internal"
+    start_ns: int = 0
+    end_ns: int = 0
+    attributes: dict[str, Any] = field(default_factory=dict)
+    error: str = ""
+    # End of the most recent child span, used to derive the "format" span.
+    last_child_end_ns: int = field(default=0, repr=False)
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> dict[str, Any]:
+        data = asdict(self)
+        del data["last_child_end_ns"]
+        data["duration_ms"] = round((self.end_ns - self.start_ns) / 1e6, 3)
+        return data
+
+
+class JsonlExporter:
+    """Appends spans to a file, one JSON object per line."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def export(self, spans: list[Span]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(s.to_dict()) + "\n" for s in spans)
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OtlpExporter:
+    """Posts spans to an OTLP/HTTP collector using the protobuf JSON encoding."""
+
+    def __init__(self, endpoint: str, service_name: str = "kaggle-mcp"):
+        endpoint = endpoint.rstrip("/")
+        self.url = endpoint if endpoint.endswith("/v1/traces") else endpoint + "/v1/traces"
+        self.service_name = service_name
+
+    def payload(self, spans: list[Span]) -> dict[str, Any]:
+        return {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+            "scopeSpans": [{
+                "scope": {"name": "kaggle_mcp"},
+                "spans": [{
+                    "traceId": s.trace_id,
+                    "spanId": s.span_id,
+                    "parentSpanId": s.parent_id,
+                    "name": s.name,
+                    "kind": _OTLP_KINDS.get(s.kind, 1),
+                    "startTimeUnixNano": str(s.start_ns),
+                    "endTimeUnixNano": str(s.end_ns),
+                    "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()],
+                    "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+                } for s in spans],
+            }],
+        }]}
+
+    def export(self, spans: list[Span]) -> None:
+        import httpx
+
+        httpx.post(self.url, json=self.payload(spans), timeout=10.0).raise_for_status()
+
+
+class _BatchProcessor:
+    """Queues finished spans and exports them from a background thread."""
+
+    def __init__(self, exporters: list, interval: float = FLUSH_INTERVAL):
+        self.exporters = exporters
+        self._pending: list[Span] = []
+        self._lock = threading.Lock()
+        self._export_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name="kaggle-mcp-trace", daemon=True)
+        self._thread.start()
+
+    def submit(self, span: Span) -> None:
+        with self._lock:
+            self._pending.append(span)
+
+    def _run(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if not batch:
+            return
+        with self._export_lock:
+            for exporter in self.exporters:
+                try:
+                    exporter.export(batch)
+                except Exception as e:
+                    logger.warning("Dropped %d spans: %s export failed: %s", len(batch), type(exporter).__name__, e)
+
+    def shutdown(self) -> None:
+        self._stop.set()
+        self.flush()
+
+
+_processor: _BatchProcessor | None = None
+_current: contextvars.ContextVar[Span | None] = contextvars.ContextVar("kaggle_mcp_span", default=None)
+
+
+def enabled() -> bool:
+    """True when an exporter is configured."""
+    return _processor is not None
+
+
+def _new_span(name: str, kind: str, start_ns: int, attributes: dict[str, Any]) -> Span:
+    parent = _current.get()
+    return Span(
+        name,
+        trace_id=parent.trace_id if parent else f"{random.getrandbits(128):032x}",
+        span_id=f"{random.getrandbits(64):016x}",
+        parent_id=parent.span_id if parent else "",
+        kind=kind,
+        start_ns=start_ns,
+        attributes=attributes,
+    )
+
+
+def _finish(span: Span) -> None:
+    parent = _current.get()
+    if parent is not None and parent.span_id == span.parent_id:
+        parent.last_child_end_ns = max(parent.last_child_end_ns, span.end_ns)
+    processor = _processor
+    if processor is not None:
+        processor.submit(span)
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attributes: Any) -> Iterator[Span | None]:
+    """Time a block as a child of the current span; yields None when tracing is off."""
+    if _processor is None:
+        yield None
+        return
+    s = _new_span(name, kind, time.time_ns(), attributes)
+    token = _current.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.error = f"{type(e).__name__}: {e}"[:500]
+        raise
+    finally:
+        _current.reset(token)
+        s.end_ns = time.time_ns()
+        _finish(s)
+
+
+def record(name: str, start_ns: int, end_ns: int, kind: str = "internal", **attributes: Any) -> None:
+    """Add an already finished child span to the current span."""
+    if _processor is None:
+        return
+    s = _new_span(name, kind, start_ns, attributes)
+    s.end_ns = end_ns
+    _finish(s)
+
+
+def current() -> Span | None:
+    """The innermost open span of this context, if any."""
+    return _current.get()
+
+
+def instrument(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Trace a tool body as ``execute``, followed by a derived ``format`` span.
+
+    Sync tools are wrapped before being offloaded, so the span runs on the
+    worker thread. A returned "Error ..." string marks the span as failed.
+    """
+    def finish(s: Span | None, result: Any) -> None:
+        if s is None:
+            return
+        if isinstance(result, str) and result.startswith("Error"):
+            s.error = result[:500]
+        if s.last_child_end_ns:
+            record("format", s.last_child_end_ns, time.time_ns())
+
+    if inspect.iscoroutinefunction(fn):
+
+        @functools.wraps(fn)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _processor is None:
+                return await fn(*args, **kwargs)
+            with span("execute") as s:
+                result = await fn(*args, **kwargs)
+                finish(s, result)
+                return result
+
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        if _processor is None:
+            return fn(*args, **kwargs)
+        with span("execute", thread=threading.current_thread().name) as s:
+            result = fn(*args, **kwargs)
+            finish(s, result)
+            return result
+
+    return wrapper
+
+
+def wrap_request(call: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap ``KaggleHttpClient.call`` (outermost) with one span per SDK request."""
+    def traced_call(service: str, request_name: str, request, response_type):
+        if _processor is None:
+            return call(service, request_name, request, response_type)
+        with span(f"{service.split('.', 1)[0]}/{request_name}", service=service, rpc=request_name):
+            return call(service, request_name, request, response_type)
+
+    return traced_call
+
+
+def wrap_http(call: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap ``KaggleHttpClient.call`` (innermost) with ``http`` and ``deserialize`` spans per attempt."""
+    def traced_call(service: str, request_name: str, request, response_type):
+        if _processor is None:
+            return call(service, request_name, request, response_type)
+        s = _new_span("http", "client", time.time_ns(), {"rpc": request_name})
+        token = _current.set(s)
+        try:
+            resp = call(service, request_name, request, response_type)
+        except BaseException as e:
+            s.error = f"{type(e).__name__}: {e}"[:500]
+            status = getattr(getattr(e, "response", None), "status_code", None)
+            if status is not None:
+                s.set(**{"http.status_code": status})
+            raise
+        finally:
+            _current.reset(token)
+            # record_response ends the span when the response arrives; what
+            # follows is kagglesdk parsing it.
+            received_ns = s.end_ns
+            s.end_ns = received_ns or time.time_ns()
+            _finish(s)
+        if received_ns:
+            record("deserialize", received_ns, time.time_ns())
+        return resp
+
+    return traced_call
+
+
+def record_response(response) -> None:
+    """kagglesdk response processor: close the network part of the current ``http`` span."""
+    s = _current.get()
+    if s is not None and s.name == "http":
+        s.end_ns = time.time_ns()
+        s.set(**{"http.status_code": response.status_code})
+        length = response.headers.get("Content-Length")
+        if length and length.isdigit():
+            s.set(**{"http.response_content_length": int(length)})
+
+
+def configure(path: str | None = None, otlp: str | None = None) -> bool:
+    """Enable tracing for the given exporters; arguments fall back to the environment.
+
+    KAGGLE_MCP_TRACE_FILE names a JSONL file, KAGGLE_MCP_TRACE_OTLP an OTLP/HTTP
+    endpoint such as ``http://localhost:4318``. Returns whether tracing is on.
+    """
+    global _processor
+    path = path or os.getenv("KAGGLE_MCP_TRACE_FILE", "") or None
+    otlp = otlp or os.getenv("KAGGLE_MCP_TRACE_OTLP", "") or None
+    exporters: list = []
+    if path:
+        exporters.append(JsonlExporter(path))
+    if otlp:
+        exporters.append(OtlpExporter(otlp))
+    if not exporters:
+        return False
+    if _processor is not None:
+        _processor.shutdown()
+    _processor = _BatchProcessor(exporters)
+    atexit.register(shutdown)
+    return True
+
+
+def shutdown() -> None:
+    """Export pending spans and turn tracing off."""
+    global _processor
+    processor, _processor = _processor, None
+    if processor is not None:
+        processor.shutdown()
+
+
+def _self_time(s: dict[str, Any], children: list[dict[str, Any]]) -> float:
+    return max(0.0, s["duration_ms"] - sum(c["duration_ms"] for c in children))
+
+
+def format_traces(spans: list[dict[str, Any]], top: int = 10) -> str:
+    """Span trees of the slowest traces, each with its largest self-time hop."""
+    by_trace: dict[str, list[dict[str, Any]]] = defaultdict(list)
+    for s in spans:
+        by_trace[s["trace_id"]].append(s)
+    roots = []
+    for trace in by_trace.values():
+        ids = {s["span_id"] for s in trace}
+        roots += [(s, trace) for s in trace if s["parent_id"] not in ids]
+    roots.sort(key=lambda r: -r[0]["duration_ms"])
+
+    lines = []
+    for root, trace in roots[:top]:
+        children = defaultdict(list)
+        for s in trace:
+            children[s["parent_id"]].append(s)
+        hops = []
+
+        def walk(s: dict[str, Any], depth: int, parent: str = "") -> None:
+            kids = sorted(children[s["span_id"]], key=lambda c: c["start_ns"])
+            self_ms = _self_time(s, kids)
+            hops.append((self_ms, f"{parent} > {s['name']}" if parent else s["name"]))
+            offset = (s["start_ns"] - root["start_ns"]) / 1e6
+            mark = f"  ERROR: {s['error'][:80]}" if s.get("error") else ""
+            lines.append(f"{'  ' * depth}- {s['name']}: {s['duration_ms']:.1f} ms (+{offset:.1f} ms){mark}")
+            for kid in kids:
+                walk(kid, depth + 1, s["name"])
+
+        walk(root, 0)
+        slowest = max(hops)
+        lines.append(f"  slowest hop: {slowest[1]} ({slowest[0]:.1f} ms self time)\n")
+    return "\n".join(lines) if lines else "No spans found."
+
+
+def main() -> None:
+    """Print the slowest traces of a JSONL trace file."""
+    parser = argparse.ArgumentParser(prog="python -m kaggle_mcp.tracing", description=main.__doc__)
+    parser.add_argument("path", help="JSONL file written with --trace-file.")
+    parser.add_argument("--top", type=int, default=10, help="Number of traces to show (default: 10).")
+    parser.add_argument("--tool", default="", help="Only traces of this tool.")
+    args = parser.parse_args()
+    spans = [json.loads(line) for line in Path(args.path).read_text().splitlines() if line.strip()]
+    if args.tool:
+        keep = {s["trace_id"] for s in spans if s["name"] == f"tool {args.tool}"}
+        spans = [s for s in spans if s["trace_id"] in keep]
+    print(format_traces(spans, args.top))
+
+
+if __name__ == "__main__":
+    main()
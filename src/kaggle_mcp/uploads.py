@@ -0,0 +1,201 @@
+"""Chunked, resumable uploads to Kaggle's blob storage for dataset files.
+
+``UploadDatasetFile`` hands back a resumable upload session URL. Files are
+streamed from disk in fixed-size chunks with ``Content-Range`` headers, so memory
+use is bounded by the chunk size. After a failure the server is asked how many
+bytes it has acknowledged and the upload continues from there. Sessions are
+remembered on disk, so calling again for the same unchanged file resumes too.
+"""
+
+import io
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO
+
+import httpx
+
+from .client import get_client
+
+logger = logging.getLogger(__name__)
+
+# Resumable sessions require chunk sizes that are multiples of 256 KiB.
+CHUNK_SIZE = 32 * 256 * 1024
+_RETRIES = 5
+_STATE_PATH = Path.home() / ".cache" / "kaggle-mcp" / "uploads.json"
+_state_lock = threading.Lock()
+
+
+@dataclass
+class UploadResult:
+    """Outcome of an upload: the file token plus transfer statistics."""
+
+    token: str
+    file_name: str
+    size: int
+    seconds: float
+    resumed_bytes: int = 0
+
+    @property
+    def throughput(self) -> float:
+        """Bytes per second sent in this run (excluding resumed bytes)."""
+        sent = self.size - self.resumed_bytes
+        return sent / self.seconds if self.seconds > 0 else 0.0
+
+
+class UploadExpiredError(Exception):
+    """The resumable session URL is no longer valid."""
+
+
+def _load_state() -> dict:
+    try:
+        return json.loads(_STATE_PATH.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _remember(key: str, session: dict | None) -> None:
+    with _state_lock:
+        state = _load_state()
+        if session is None:
+            state.pop(key, None)
+        else:
+            state[key] = session
+        _STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        _STATE_PATH.write_text(json.dumps(state))
+
+
+def _start_session(file_name: str, size: int, mtime: int) -> tuple[str, str]:
+    """Register the file with Kaggle; returns (token, create_url)."""
+    from kagglesdk.datasets.services.dataset_api_service import (
+        ApiUploadDatasetFileRequest,
+    )
+
+    req = ApiUploadDatasetFileRequest()
+    req.file_name = file_name
+    req.content_length = size
+    req.last_modified_epoch_seconds = mtime
+    resp = get_client().datasets.dataset_api_client.upload_dataset_file(req)
+    return resp.token, resp.create_url
+
+
+def _acknowledged(response: httpx.Response) -> int:
+    """Offset of the next byte to send, from a 308 response's Range header."""
+    rng = response.headers.get("range")
+    if not rng:
+        return 0
+    return int(rng.rsplit("-", 1)[1]) + 1
+
+
+def _query_offset(client: httpx.Client, url: str, size: int) -> int:
+    r = client.put(url, headers={"Content-Range": f"bytes */{size}", "Content-Length": "0"})
+    if r.status_code in (200, 201):
+        return size
+    if r.status_code == 308:
+        return _acknowledged(r)
+    if r.status_code in (404, 410):
+        raise UploadExpiredError(f"upload session expired (HTTP {r.status_code})")
+    r.raise_for_status()
+    raise httpx.HTTPError(f"unexpected status {r.status_code} while querying upload offset")
+
+
+def _send(client: httpx.Client, url: str, fp: BinaryIO, size: int, offset: int) -> None:
+    if size == 0:
+        r = client.put(url, content=b"", headers={"Content-Range": "bytes */0"})
+        r.raise_for_status()
+        return
+    while offset < size:
+        fp.seek(offset)
+        data = fp.read(CHUNK_SIZE)
+        end = offset + len(data) - 1
+        r = client.put(url, content=data, headers={"Content-Range": f"bytes {offset}-{end}/{size}"})
+        if r.status_code in (200, 201):
+            return
+        if r.status_code == 308:
+            offset = _acknowledged(r)
+            continue
+        if r.status_code in (404, 410):
+            raise UploadExpiredError(f"upload session expired (HTTP {r.status_code})")
+        r.raise_for_status()
+        raise httpx.HTTPError(f"unexpected status {r.status_code} while uploading")
+
+
+def upload_stream(
+    fp: BinaryIO,
+    size: int,
+    file_name: str,
+    mtime: int = 0,
+    resume_key: str = "",
+) -> UploadResult:
+    """Upload size bytes from a seekable binary stream and return its file token.
+
+    Args:
+        fp: Seekable binary file object positioned anywhere.
+        size: Total number of bytes to upload.
+        file_name: Name the file will have in the dataset.
+        mtime: Last-modified time in epoch seconds.
+        resume_key: If set, the session is persisted under this key so a later
+            call with the same key resumes instead of starting over.
+    """
+    started = time.monotonic()
+    session = _load_state().get(resume_key) if resume_key else None
+    if session is None:
+        token, url = _start_session(file_name, size, mtime)
+        if resume_key:
+            _remember(resume_key, {"token": token, "url": url})
+    else:
+        token, url = session["token"], session["url"]
+
+    resumed = 0
+    timeout = httpx.Timeout(30.0, write=120.0)
+    with httpx.Client(timeout=timeout) as client:
+        offset = 0
+        # A stored session, or one whose transfer was interrupted, first asks the
+        # server how much it already holds; that query is retried like a send.
+        needs_query = stored = session is not None
+        for attempt in range(_RETRIES):
+            try:
+                if needs_query:
+                    offset = _query_offset(client, url, size)
+                    if stored:
+                        resumed = offset
+                    needs_query = stored = False
+                _send(client, url, fp, size, offset)
+                break
+            except UploadExpiredError:
+                if attempt == _RETRIES - 1:
+                    raise
+                token, url = _start_session(file_name, size, mtime)
+                if resume_key:
+                    _remember(resume_key, {"token": token, "url": url})
+                offset = resumed = 0
+                needs_query = stored = False
+            except httpx.HTTPError as e:
+                if attempt == _RETRIES - 1:
+                    raise
+                logger.warning("Upload of %s interrupted (%s); resuming", file_name, e)
+                time.sleep(0.5 * 2**attempt)
+                needs_query = True
+
+    if resume_key:
+        _remember(resume_key, None)
+    return UploadResult(token, file_name, size, time.monotonic() - started, resumed)
+
+
+def upload_file(path: str | Path, file_name: str = "") -> UploadResult:
+    """Stream a local file (text or binary) to Kaggle and return its file token."""
+    path = Path(path).expanduser().resolve()
+    st = path.stat()
+    name = file_name or path.name
+    key = f"{path}:{st.st_size}:{st.st_mtime_ns}:{name}"
+    with open(path, "rb") as fp:
+        return upload_stream(fp, st.st_size, name, int(st.st_mtime), resume_key=key)
+
+
+def upload_bytes(data: bytes, file_name: str) -> UploadResult:
+    """Upload an in-memory payload and return its file token."""
+    return upload_stream(io.BytesIO(data), len(data), file_name)